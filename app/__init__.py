@@ -54,6 +54,10 @@ def create_app(config_name=None):
     login_manager.init_app(app)
     CORS(app, supports_credentials=True)
     
+    # Cache em camadas partilhado por app.utils.cache e app.utils.cache_manager
+    from app.utils.tiered_cache import tiered_cache
+    tiered_cache.init_app(app)
+    
     # Inicializar rate limiter
     if rate_limiter is not None:
         try:
@@ -120,7 +124,7 @@ def create_app(config_name=None):
                 AuthDebugLogger.log_user_loading(user_id, False, "Invalid user_id")
                 return None
                 
-            user = User.query.get(int(user_id))
+            user = User.get_by_id(user_id)
             if user and user.is_active:
                 AuthDebugLogger.log_user_loading(user_id, True)
                 return user
@@ -136,7 +140,7 @@ def create_app(config_name=None):
             return None
     
     # Registrar modelos para que as migrações funcionem (marketplace removido)
-    from app.models import user, farm, culture, activity, conversation, alerts
+    from app.models import user, farm, culture, activity, conversation, alerts, dashboard
     
     # Registrar blueprints (controllers)
     register_blueprints(app)
@@ -161,6 +165,26 @@ def create_app(config_name=None):
     # Registrar rotas adicionais para compatibilidade
     register_compatibility_routes(app)
     
+    # Agendador de coleta climática (lock de liderança: um único processo executa os jobs)
+    if app.config.get('WEATHER_SCHEDULER_ENABLED') and not app.config.get('TESTING'):
+        try:
+            from app.services.weather_scheduler import init_weather_scheduler
+            init_weather_scheduler(app)
+        except ImportError as e:
+            print(f"⚠️ Aviso: Agendador climático não disponível: {e}")
+    
+    # Aquecimento do cache em segundo plano (snapshots e clima dos usuários mais ativos)
+    from app.services.cache_warmer import cache_warmer
+    cache_warmer.init_app(app)
+    
+    # Memoização por pedido (descartada no teardown)
+    from app.utils import request_memo
+    request_memo.init_app(app)
+    
+    # Contadores do cache partilhados entre workers (/metrics)
+    from app.utils.cache_metrics import process_counters
+    process_counters.init_app(app)
+    
     return app
 
 
@@ -251,6 +275,7 @@ def register_blueprints(app):
     from app.controllers.reports_controller import reports_bp  # REPORTS SYSTEM
     from app.controllers.geocoding_controller import geocoding_bp  # GEOCODING SERVICE
     from app.controllers.fixes_controller import fixes_bp  # CORREÇÕES CRÍTICAS
+    from app.controllers.weather_controller import weather_bp  # API DE DADOS CLIMÁTICOS
     
     # Registrar com prefixos apropriados (marketplace removido)
     app.register_blueprint(auth_bp, url_prefix='/auth')
@@ -263,6 +288,7 @@ def register_blueprints(app):
     app.register_blueprint(health_bp, url_prefix='/')  # CORREÇÃO SPRINT 1 - Health Check
     app.register_blueprint(reports_bp, url_prefix='/reports')  # REPORTS SYSTEM
     app.register_blueprint(geocoding_bp, url_prefix='/api/geocoding')  # GEOCODING SERVICE
+    app.register_blueprint(weather_bp, url_prefix='/api/weather')  # API DE DADOS CLIMÁTICOS
     app.register_blueprint(fixes_bp, url_prefix='/admin/fixes')  # CORREÇÕES CRÍTICAS
     app.register_blueprint(admin_bp, url_prefix='/admin/bots')  # DETECÇÃO DE BOTS
     
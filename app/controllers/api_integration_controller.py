@@ -9,7 +9,8 @@ from flask_login import login_required, current_user
 
 from app.services.weather_data_service import WeatherDataService
 from app.services.ai_service_v2 import AIServiceV2
-from app.utils.api_integration import APIIntegrationManager, BatchAPIProcessor
+from app.utils.api_integration import APIIntegrationManager, BatchAPIProcessor, api_manager, weather_fetch_layer
+from app.services.weather_read_cache import weather_read_cache
 from app.utils.response_helpers import ResponseHandler, LoggingHelper
 
 # Configurar logging
@@ -29,9 +30,7 @@ def integration_status():
         weather_api_configured = bool(current_app.config.get('WEATHER_API_KEY'))
         ai_api_configured = bool(current_app.config.get('OPENAI_API_KEY'))
         
-        # Inicializar gerenciador de integração
-        api_manager = APIIntegrationManager()
-        
+        # Usar gerenciador global (mesmos rate limiters e circuit breakers do coletor)
         # Obter estatísticas dos rate limiters e circuit breakers
         rate_limiter_stats = {}
         circuit_breaker_stats = {}
@@ -58,6 +57,8 @@ def integration_status():
             },
             'rate_limiters': rate_limiter_stats,
             'circuit_breakers': circuit_breaker_stats,
+            'weather_fetch': weather_fetch_layer.get_stats(),
+            'weather_read_cache': weather_read_cache.get_stats(),
             'integration_healthy': weather_api_configured or ai_api_configured
         }
         
@@ -495,12 +496,11 @@ def get_integration_metrics():
     try:
         LoggingHelper.log_request('api_integration.metrics', 'GET', current_user.email)
         
-        # Inicializar gerenciador
-        api_manager = APIIntegrationManager()
-        
         metrics = {
             'rate_limiters': {},
             'circuit_breakers': {},
+            'weather_fetch': weather_fetch_layer.get_stats(),
+            'weather_read_cache': weather_read_cache.get_stats(),
             'cache_stats': {},
             'performance': {}
         }
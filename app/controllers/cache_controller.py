@@ -10,6 +10,9 @@ from app.services.weather_data_service import WeatherDataService
 from app.services.ai_service import AIService
 from app.services.dashboard_service import DashboardService
 from app.services.culture_service import CultureService
+from app.services.dashboard_snapshot import dashboard_snapshots
+from app.utils.cache_metrics import build_cache_report
+from app.utils.fragment_cache import fragment_cache
 
 cache_bp = Blueprint('cache', __name__)
 logger = LoggingHelper()
@@ -20,16 +23,8 @@ logger = LoggingHelper()
 def get_cache_stats():
     """Obter estatísticas do cache"""
     try:
-        stats = cache.get_stats()
-        
-        # Adicionar estatísticas específicas por namespace
-        namespace_stats = {}
-        
-        # Stats de IA
-        ai_stats = AIService.get_ai_cache_stats()
-        namespace_stats['ai'] = ai_stats
-        
-        stats['namespaces'] = namespace_stats
+        # Mesma vista de /api/performance/cache/stats (namespaces, latências, chaves, aquecimento, IA)
+        stats = build_cache_report()
         
         logger.log_user_action("cache_stats", "get_cache_stats", "Estatísticas obtidas")
         return ResponseHandler.handle_success(
@@ -70,30 +65,26 @@ def clear_cache():
         
         if namespace:
             # Limpar namespace específico
-            if namespace == 'weather':
-                # cleared = WeatherDataService.clear_cache()  # TODO: implementar se necessário
-                cleared = 0  # Temporário até implementar cache no WeatherDataService
-            elif namespace == 'ai':
-                cleared = AIService.clear_all_ai_cache()
-            elif namespace == 'dashboard':
-                cleared = DashboardService.clear_all_dashboard_cache()
-            elif namespace == 'culture':
-                cleared = CultureService.clear_all_culture_cache()
+            if namespace == 'dashboard':
+                # Snapshots (Redis ou tabela) e fragmentos não usam gerações de namespace
+                cleared = dashboard_snapshots.invalidate_all() + fragment_cache.clear()
+                message = f"Snapshots e fragmentos do dashboard removidos ({cleared} entradas locais)"
             else:
-                cleared = cache.clear_namespace(namespace)
-            
-            message = f"Cache do namespace '{namespace}' limpo: {cleared} chaves removidas"
+                # Nova geração do namespace: as chaves antigas expiram pelo TTL
+                if namespace == 'ai':
+                    generation = AIService.clear_all_ai_cache()
+                elif namespace == 'culture':
+                    generation = CultureService.clear_all_culture_cache()
+                else:
+                    generation = cache.clear_namespace(namespace)
+                
+                cleared = 0
+                message = f"Cache do namespace '{namespace}' invalidado (geração {generation})"
         else:
-            # Limpar todos os namespaces
-            total_cleared = 0
-            # total_cleared += WeatherDataService.clear_cache()  # TODO: implementar se necessário
-            total_cleared += 0  # Temporário
-            total_cleared += AIService.clear_all_ai_cache()
-            total_cleared += DashboardService.clear_all_dashboard_cache()
-            total_cleared += CultureService.clear_all_culture_cache()
+            # Limpar tudo (ambos os adaptadores usam o mesmo cache; Redis via SCAN em segundo plano)
+            cleared = cache.clear_pattern('*')
             
-            message = f"Todo o cache limpo: {total_cleared} chaves removidas"
-            cleared = total_cleared
+            message = f"Todo o cache limpo: {cleared} chaves removidas da memória, Redis em segundo plano"
         
         logger.log_user_action(current_user.email if hasattr(current_user, 'email') else 'user', "clear_cache", f"Cache limpo: {message}")
         return ResponseHandler.handle_success(
@@ -116,8 +107,8 @@ def invalidate_user_cache():
         invalidated = []
         
         if 'dashboard' in cache_types:
-            if DashboardService.invalidate_user_dashboard_cache(current_user.id):
-                invalidated.append('dashboard')
+            dashboard_snapshots.invalidate_users([current_user.id])
+            invalidated.append('dashboard')
         
         if 'culture' in cache_types:
             if CultureService.invalidate_user_culture_cache(current_user.id):
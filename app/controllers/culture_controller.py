@@ -6,8 +6,6 @@ import logging
 from flask import Blueprint, request, render_template, redirect, url_for
 from flask_login import login_required, current_user
 
-from app.models.culture import Culture
-from app.models.farm import Farm
 from app.services.culture_service import CultureService, CultureWizardService
 from app.services.base_conhecimento_culturas import buscar_cultura, calcular_custos_estimados, validar_condicoes_cultura, listar_culturas_por_categoria
 from app.validators.culture_validators import CultureValidator
@@ -65,21 +63,16 @@ def api_list_cultures():
                 'redirect_url': '/auth/onboarding'
             })
         
-        # Versão simplificada sem cache para debug
-        try:
-            cultures = Culture.query.join(Farm).filter(
-                Farm.user_id == current_user.id
-            ).all()
-            
-            cultures_data = [culture.to_dict() for culture in cultures]
-            
-            return ResponseHandler.handle_success({
-                'success': True,
-                'cultures': cultures_data
-            })
-        except Exception as db_error:
-            logger.error(f"Erro específico na query: {db_error}")
-            return ResponseHandler.handle_server_error(f'Erro no banco: {str(db_error)}')
+        # Listagem do cache (também guarda os detalhes de cada cultura)
+        result = CultureService.get_user_cultures()
+        
+        if not result['success']:
+            return ResponseHandler.handle_server_error(result['error'])
+        
+        return ResponseHandler.handle_success({
+            'success': True,
+            'cultures': result['cultures']
+        })
         
     except Exception as e:
         LoggingHelper.log_error(e, 'culture.api_list_cultures')
@@ -1,22 +1,76 @@
 """
 Controlador do dashboard - Simplificado
 """
+import json
+import hashlib
 import logging
-from flask import Blueprint, render_template, jsonify
+from flask import Blueprint, render_template, jsonify, request, make_response, current_app, stream_template, get_template_attribute
+from markupsafe import Markup
 from flask_login import login_required, current_user
 
 from app.services.dashboard_service import DashboardService
+from app.services.dashboard_sections import DashboardSectionLoader
+from app.services.dashboard_snapshot import dashboard_snapshots
+from app.utils.fragment_cache import fragment_cache
 from app.services.weather_data_service import WeatherDataService
-from app.services.weather_collector import WeatherCollectorService
 
 logger = logging.getLogger(__name__)
 dashboard_bp = Blueprint('dashboard', __name__)
 
 
+def _conditional_json(payload, version=None):
+    """
+    Resposta JSON com ETag; 304 quando If-None-Match coincide
+    
+    Args:
+        payload: Corpo da resposta
+        version: Versão dos dados (senão o ETag é o hash do corpo)
+    """
+    if version is None:
+        version = json.dumps(payload, sort_keys=True, default=str, separators=(',', ':'))
+    etag = hashlib.md5(version.encode()).hexdigest()
+    
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+    else:
+        response = make_response(jsonify(payload))
+    
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+def _dashboard_response(result):
+    """Dados do dashboard com versão; ?since=<versão> devolve apenas as secções alteradas"""
+    if not result['success']:
+        return jsonify(result)
+    
+    data = result['data']
+    version = DashboardService.get_data_version(data)
+    since = request.args.get('since')
+    
+    if not since:
+        return _conditional_json(dict(result, version=version), version)
+    
+    changed = DashboardService.get_changed_sections(data, since)
+    payload = {
+        'success': True,
+        'version': version,
+        'since': since,
+        'changed': changed,
+        'data': {section: data.get(section) for section in changed}
+    }
+    return _conditional_json(payload, f"{version}:{since}")
+
+
+
 @dashboard_bp.route('/')
 @login_required  
 def index():
     """Dashboard principal"""
+    if _progressive_rendering_enabled():
+        return _progressive_index()
+    
     try:
         # Importar datetime para fornecer a data atual
         from datetime import datetime, timedelta
@@ -47,9 +101,13 @@ def index():
         # Adicionar a variável hoje para o template
         context['hoje'] = 0  # Começa com 0 para o dia atual
         
+        # Clima já incluído no snapshot do dashboard; senão consultar o serviço
+        if context.get('weather') is not None:
+            return render_template('dashboard/index.html', **context)
+        
         # Tentar obter dados de clima do novo serviço
         try:
-            weather_result = WeatherDataService.get_current_weather()
+            weather_result = WeatherDataService.get_weather_for_user(current_user)
             
             if weather_result['success']:
                 context['weather'] = weather_result['data']
@@ -70,31 +128,108 @@ def index():
                              alerts=[], weather=None, recent_activities=[], cultures=[])
 
 
+def _section_fragment(name, data):
+    """
+    (nome, âmbito, dados, versão) do fragmento de uma secção do dashboard
+    
+    O cartão do clima é partilhado por todos os usuários da mesma localização
+    (versão = coleta); as restantes secções são por usuário (versão = dados).
+    """
+    if name == 'weather':
+        if not data:
+            return f'dashboard/{name}', 'location:none', None, 'none'
+        scope = f"location:{data.get('latitude')},{data.get('longitude')}"
+        return f'dashboard/{name}', scope, None, str(data.get('collected_at'))
+    return f'dashboard/{name}', f"user:{current_user.id}", data, None
+
+
+@dashboard_bp.app_template_global()
+def render_dashboard_section(name, data):
+    """Secção do dashboard renderizada através do cache de fragmentos"""
+    macro = get_template_attribute('dashboard/_sections.html', 'render_section')
+    fragment_name, scope, version_data, version = _section_fragment(name, data)
+    html = fragment_cache.get_or_render(fragment_name, scope, version_data, lambda: macro(name, data), version)
+    return Markup(html)
+
+
+@dashboard_bp.route('/api/render-cache/stats')
+@login_required
+def api_render_cache_stats():
+    """Taxa de acerto do cache de fragmentos e do snapshot do dashboard"""
+    return jsonify({
+        'success': True,
+        'data': {
+            'fragments': fragment_cache.get_stats(),
+            'snapshots': dashboard_snapshots.get_stats()
+        }
+    })
+
+
+def _progressive_rendering_enabled():
+    """Modo progressivo por configuração ou com ?progressive=1 (?progressive=0 desativa)"""
+    flag = request.args.get('progressive')
+    if flag is not None:
+        return flag == '1'
+    return current_app.config.get('DASHBOARD_PROGRESSIVE_RENDERING', False)
+
+
+def _progressive_index():
+    """
+    Envia o esqueleto da página de imediato e cada secção quando fica pronta
+    
+    As secções são calculadas em paralelo; as que excedem o prazo chegam com
+    o fallback e o browser pede-as depois em /api/sections/<secção>.
+    """
+    user = DashboardSectionLoader.user_context(current_user)
+    snapshot = dashboard_snapshots.get(user['id'])
+    
+    if snapshot is not None:
+        # Todas as secções já são conhecidas: ler os fragmentos num único MGET
+        sections = list(DashboardSectionLoader.iter_snapshot_sections(snapshot))
+        fragment_cache.prefetch(_section_fragment(name, data) for name, data, _ in sections)
+    else:
+        sections = DashboardSectionLoader.iter_sections(current_app._get_current_object(), user)
+    
+    response = current_app.response_class(
+        stream_template(
+            'dashboard/index_progressive.html',
+            sections=sections,
+            section_names=DashboardSectionLoader.SECTIONS
+        ),
+        mimetype='text/html'
+    )
+    # Impedir que o proxy acumule a resposta antes de a enviar
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@dashboard_bp.route('/api/sections/<section>')
+@login_required
+def api_dashboard_section(section):
+    """Uma secção do dashboard (JSON ou fragmento HTML com ?format=html)"""
+    if section not in DashboardSectionLoader.SECTIONS:
+        return jsonify({'success': False, 'message': 'Secção desconhecida'}), 404
+    
+    try:
+        user = DashboardSectionLoader.user_context(current_user)
+        data = DashboardSectionLoader.load(section, user)
+        
+        if request.args.get('format') == 'html':
+            return render_template('dashboard/_section.html', section=section, data=data)
+        return _conditional_json({'success': True, 'section': section, 'data': data})
+    
+    except Exception as e:
+        logger.error(f"Erro ao carregar secção {section} do dashboard: {e}")
+        return jsonify({'success': False, 'message': 'Erro interno'}), 500
+
+
 @dashboard_bp.route('/weather/refresh')
 @login_required
 def refresh_weather():
     """Endpoint para atualizar dados meteorológicos baseado na localização do usuário"""
     try:
         # Usar localização do usuário logado se disponível
-        location_name = None
-        lat = None
-        lon = None
-        
-        if current_user.cidade:
-            location_name = current_user.cidade
-            logger.info(f"Usando localização do usuário: {location_name}")
-        elif current_user.latitude and current_user.longitude:
-            lat = current_user.latitude
-            lon = current_user.longitude
-            logger.info(f"Usando coordenadas do usuário: {lat}, {lon}")
-        else:
-            logger.info("Usuário sem localização definida, usando localização padrão")
-        
-        result = WeatherDataService.get_current_weather(
-            location_name=location_name,
-            lat=lat,
-            lon=lon
-        )
+        result = WeatherDataService.get_weather_for_user(current_user)
         
         if result['success']:
             return jsonify({
@@ -118,42 +253,47 @@ def refresh_weather():
 @dashboard_bp.route('/weather/force-collect')
 @login_required
 def force_collect_weather():
-    """Endpoint para forçar coleta da API e retornar dados atualizados"""
+    """
+    Endpoint para forçar coleta da API em segundo plano
+    
+    Devolve imediatamente o job de coleta (ou o job já em curso) e os dados
+    atuais; a localização do usuário é coletada primeiro.
+    """
     try:
-        # Executar coleta da API
-        collection_result = WeatherCollectorService.force_collection_now()
-        
-        # Aguardar um pouco para garantir que os dados foram salvos
-        import time
-        time.sleep(1)
+        from flask import current_app
+        from app.models.weather import WeatherLocation
+        from app.services.location_manager import LocationManager
+        from app.services.weather_collection_jobs import weather_collection_jobs
         
-        # Usar localização do usuário logado se disponível
-        location_name = None
-        lat = None
-        lon = None
-        
-        if current_user.cidade:
-            location_name = current_user.cidade
-        elif current_user.latitude and current_user.longitude:
-            lat = current_user.latitude
-            lon = current_user.longitude
+        # Localização do usuário a coletar primeiro
+        priority_location = LocationManager.ensure_user_location(current_user)
+        if not priority_location and current_user.cidade:
+            priority_location = WeatherLocation.query.filter(
+                WeatherLocation.name.ilike(f'%{current_user.cidade}%'),
+                WeatherLocation.is_active == True
+            ).first()
         
-        # Obter dados atualizados
-        result = WeatherDataService.get_current_weather(
-            location_name=location_name,
-            lat=lat,
-            lon=lon
+        started = weather_collection_jobs.start(
+            current_app._get_current_object(),
+            priority_location_id=priority_location.id if priority_location else None,
+            requested_by=current_user.id
         )
+        job = started['job']
+        
+        # Dados atuais enquanto a coleta corre
+        result = WeatherDataService.get_weather_for_user(current_user)
         
         return jsonify({
             'success': result['success'],
             'data': result.get('data'),
             'collection': {
-                'success': collection_result.get('success', False),
-                'locations_processed': collection_result.get('locations_processed', 0),
-                'message': f"{collection_result.get('locations_processed', 0)} localizações atualizadas"
+                'job_id': job['job_id'],
+                'status': job['status'],
+                'coalesced': started['coalesced'],
+                'status_url': f"/weather/force-collect/{job['job_id']}",
+                'message': 'Coleta já em curso' if started['coalesced'] else 'Coleta iniciada'
             }
-        })
+        }), 202
         
     except Exception as e:
         logger.error(f"Erro ao forçar coleta: {e}")
@@ -163,13 +303,41 @@ def force_collect_weather():
         }), 500
 
 
+@dashboard_bp.route('/weather/force-collect/<job_id>')
+@login_required
+def force_collect_status(job_id):
+    """Endpoint de progresso de uma coleta forçada"""
+    try:
+        from app.services.weather_collection_jobs import weather_collection_jobs
+        
+        job = weather_collection_jobs.get_job(job_id)
+        if not job:
+            return jsonify({
+                'success': False,
+                'message': 'Coleta não encontrada'
+            }), 404
+        
+        return jsonify({
+            'success': True,
+            'job': job,
+            'message': f"{job['locations_processed']} localizações atualizadas"
+        })
+        
+    except Exception as e:
+        logger.error(f"Erro ao obter estado da coleta {job_id}: {e}")
+        return jsonify({
+            'success': False,
+            'message': 'Erro interno do servidor'
+        }), 500
+
+
 @dashboard_bp.route('/api')
 @login_required
 def api_dashboard():
     """API para dados do dashboard"""
     try:
         result = DashboardService.get_dashboard_data()
-        return jsonify(result)
+        return _dashboard_response(result)
     except Exception as e:
         logger.error(f"Erro na API do dashboard: {e}")
         return jsonify({'success': False, 'message': 'Erro interno'}), 500
@@ -181,7 +349,7 @@ def api_dashboard_stats():
     """API para estatísticas do dashboard"""
     try:
         result = DashboardService.get_dashboard_data()
-        return jsonify(result)
+        return _dashboard_response(result)
     except Exception as e:
         logger.error(f"Erro na API de estatísticas do dashboard: {e}")
         return jsonify({'success': False, 'message': 'Erro interno'}), 500
@@ -210,7 +378,7 @@ def api_dashboard_alertas():
                 'created_at': alert.created_at.isoformat() if alert.created_at else None
             })
         
-        return jsonify({
+        return _conditional_json({
             'success': True,
             'data': alerts_data,
             'total': len(alerts_data)
@@ -226,7 +394,7 @@ def api_dashboard_culturas():
     """API para culturas do dashboard"""
     try:
         result = DashboardService.get_dashboard_data()
-        return jsonify({
+        return _conditional_json({
             'success': True,
             'data': result.get('culturas', [])
         })
@@ -256,7 +424,7 @@ def api_dashboard_tarefas():
     """API para tarefas do dashboard"""
     try:
         result = DashboardService.get_dashboard_data()
-        return jsonify({
+        return _conditional_json({
             'success': True,
             'data': result.get('tarefas', [])
         })
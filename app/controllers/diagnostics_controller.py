@@ -139,7 +139,7 @@ def fix_session():
         
         # Verificar dados do usuário
         if current_user.is_authenticated:
-            user = User.query.get(current_user.id)
+            user = User.get_by_id(current_user.id)
             if user:
                 # Atualizar último acesso
                 from datetime import datetime, timezone
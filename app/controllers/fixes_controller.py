@@ -200,11 +200,24 @@ def get_cache_statistics():
 @login_required
 def warm_cache_manually():
     """
-    Cache warming desabilitado - Sistema simplificado
+    Agendar o aquecimento do cache (snapshots e clima dos usuários mais ativos)
     """
+    from flask import current_app
+    from app.services.cache_warmer import cache_warmer
+    
+    if not cache_warmer.enabled:
+        return jsonify({
+            'success': False,
+            'message': 'Cache warming desabilitado (CACHE_WARMING_ENABLED)',
+            'user': current_user.email,
+            'status': 'disabled'
+        }), 409
+    
+    scheduled = cache_warmer.warm_async(current_app._get_current_object(), 'manual')
     return jsonify({
         'success': True,
-        'message': 'Cache warming desabilitado - sistema simplificado',
+        'message': 'Aquecimento do cache agendado' if scheduled else 'Aquecimento do cache já pendente',
         'user': current_user.email,
-        'status': 'disabled'
-    }), 500
+        'status': 'scheduled' if scheduled else 'pending',
+        'last_result': cache_warmer.last_result
+    }), 202
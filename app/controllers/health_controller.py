@@ -408,3 +408,23 @@ def system_health():
             'error': str(e),
             'timestamp': datetime.now(timezone.utc).isoformat()
         }), 503
+
+
+@health_bp.route('/metrics')
+def prometheus_metrics():
+    """
+    Métricas do cache no formato do Prometheus (job 'agrotech-app' em monitoring/prometheus.yml)
+    Com METRICS_TOKEN configurado exige 'Authorization: Bearer <token>'
+    """
+    from flask import request, Response
+    from app.utils.cache_metrics import render_prometheus
+    
+    token = current_app.config.get('METRICS_TOKEN')
+    if token and request.headers.get('Authorization') != f"Bearer {token}":
+        return Response('unauthorized\n', status=401, mimetype='text/plain')
+    
+    try:
+        return Response(render_prometheus(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+    except Exception as e:
+        current_app.logger.error(f"Erro ao gerar métricas: {e}")
+        return Response('# erro ao gerar métricas\n', status=500, mimetype='text/plain')
@@ -2,13 +2,15 @@
 """
 Controller para APIs de performance e monitoramento do Sprint 4
 """
-from flask import Blueprint, jsonify, request, current_app
+from flask import Blueprint, jsonify, request
 from flask_login import login_required, current_user
 import time
 import psutil
 import logging
 
 from app.utils.cache_manager import cache
+from app.utils.cache import user_cache, weather_cache
+from app.utils.cache_metrics import build_cache_report
 from app.utils.database_optimization import DatabaseOptimizer, QueryOptimizer
 from app.utils.asset_optimization import performance_monitor
 from app import db
@@ -23,14 +25,9 @@ performance_bp = Blueprint('performance', __name__, url_prefix='/api/performance
 @performance_bp.route('/cache/stats', methods=['GET'])
 @login_required
 def get_cache_stats():
-    """Obter estatísticas do cache Redis"""
+    """Obter estatísticas do cache (mesma vista de /cache/stats)"""
     try:
-        stats = cache.get_stats()
-        
-        # Adicionar informações extras
-        stats['cache_enabled'] = current_app.config.get('CACHE_ENABLED', True)
-        stats['redis_url'] = current_app.config.get('REDIS_URL', 'N/A')
-        stats['fallback_enabled'] = current_app.config.get('CACHE_FALLBACK_ENABLED', True)
+        stats = build_cache_report()
         
         return jsonify({
             'success': True,
@@ -92,15 +89,15 @@ def clear_user_cache(user_id):
                 'error': 'Permissão negada.'
             }), 403
         
-        deleted_count = user_cache.invalidate_user_cache(user_id)
+        invalidated_count = user_cache.invalidate_user_cache(user_id)
         
-        logger.info(f"Cache do usuário {user_id} limpo por {current_user.id}. Deletados: {deleted_count}")
+        logger.info(f"Cache do usuário {user_id} invalidado por {current_user.id}. Namespaces: {invalidated_count}")
         
         return jsonify({
             'success': True,
             'data': {
                 'user_id': user_id,
-                'deleted_keys': deleted_count
+                'invalidated_namespaces': invalidated_count
             }
         })
         
@@ -0,0 +1,118 @@
+"""
+Controlador da API de dados climáticos armazenados
+"""
+import hashlib
+import logging
+from flask import Blueprint, jsonify, request, make_response
+from flask_login import login_required, current_user
+
+from app.services.weather_data_service import WeatherDataService
+from app.services.weather_bulk_reader import WeatherBulkReader
+
+logger = logging.getLogger(__name__)
+weather_bp = Blueprint('weather', __name__)
+
+
+def _resolve_request_location():
+    """Localização pedida (location_id ou location) ou a do usuário logado"""
+    location_id = request.args.get('location_id', type=int)
+    location_name = request.args.get('location')
+    
+    if location_id or location_name:
+        # Localização pedida e inexistente: None (404), sem cair na primeira ativa
+        return WeatherDataService.find_location(
+            location_id=location_id,
+            location_name=location_name,
+            fallback=False
+        )
+    
+    return WeatherDataService.find_location(
+        location_name=current_user.cidade,
+        lat=current_user.latitude,
+        lon=current_user.longitude
+    )
+
+
+@weather_bp.route('/history')
+@login_required
+def weather_history():
+    """
+    Histórico agregado por hora, dia ou semana
+    
+    Query params: location_id | location, days (1-366), bucket (hour|day|week).
+    Responde 304 quando ETag/Last-Modified coincidem com a última coleta.
+    """
+    try:
+        days = request.args.get('days', 7, type=int)
+        bucket = request.args.get('bucket') or ('hour' if days <= 2 else 'day')
+        
+        if days < 1 or days > 366:
+            return jsonify({'success': False, 'message': 'days deve estar entre 1 e 366'}), 400
+        if bucket not in WeatherDataService.HISTORY_BUCKETS:
+            return jsonify({'success': False, 'message': 'bucket deve ser hour, day ou week'}), 400
+        
+        location = _resolve_request_location()
+        if not location:
+            return jsonify({'success': False, 'message': 'Localização não encontrada'}), 404
+        
+        # Validação condicional antes de agregar
+        last_collection = WeatherDataService.get_last_collection_time(location)
+        start_date, _ = WeatherDataService.get_history_window(days, bucket)
+        etag = hashlib.md5(
+            f"{location.id}:{bucket}:{start_date.isoformat()}:"
+            f"{last_collection.isoformat() if last_collection else 'none'}".encode()
+        ).hexdigest()
+        
+        not_modified = request.if_none_match.contains(etag)
+        if not request.if_none_match and last_collection and request.if_modified_since:
+            not_modified = last_collection.replace(microsecond=0) <= request.if_modified_since
+        
+        if not_modified:
+            response = make_response('', 304)
+        else:
+            history = WeatherDataService.get_history_aggregates(location, days, bucket)
+            history['location'] = {
+                'id': location.id,
+                'name': location.name,
+                'latitude': location.latitude,
+                'longitude': location.longitude
+            }
+            history['last_collection'] = last_collection.isoformat() if last_collection else None
+            response = make_response(jsonify({'success': True, 'data': history}))
+        
+        response.set_etag(etag)
+        if last_collection:
+            response.last_modified = last_collection
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    
+    except Exception as e:
+        logger.error(f"Erro ao obter histórico agregado: {e}")
+        return jsonify({'success': False, 'message': 'Erro interno do servidor'}), 500
+
+
+@weather_bp.route('/bulk', methods=['POST'])
+@login_required
+def weather_bulk():
+    """
+    Dados atuais e previsão de várias localizações armazenadas
+    
+    Body JSON: {"location_ids": [1, 2], "coordinates": [{"lat": 38.7, "lon": -9.1}], "forecast_days": 5}
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        location_ids = data.get('location_ids') or []
+        coordinates = data.get('coordinates') or []
+        forecast_days = min(max(int(data.get('forecast_days', 5)), 0), 5)
+        
+        if not isinstance(location_ids, list) or not isinstance(coordinates, list):
+            return jsonify({'success': False, 'message': 'location_ids e coordinates devem ser listas'}), 400
+        
+        result = WeatherBulkReader.read(location_ids, coordinates, forecast_days)
+        return jsonify(result)
+    
+    except (ValueError, TypeError, KeyError) as e:
+        return jsonify({'success': False, 'message': f'Pedido inválido: {e}'}), 400
+    except Exception as e:
+        logger.error(f"Erro na leitura em lote de dados climáticos: {e}")
+        return jsonify({'success': False, 'message': 'Erro interno do servidor'}), 500
@@ -0,0 +1,19 @@
+"""
+Modelo de snapshot do dashboard por usuário
+"""
+import json
+from datetime import datetime
+from app import db
+
+
+class DashboardSnapshot(db.Model):
+    """Dados do dashboard já calculados (usado quando não há Redis)"""
+    __tablename__ = 'dashboard_snapshots'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    payload = db.Column(db.Text, nullable=False)  # JSON
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def get_payload(self):
+        """Dados do dashboard guardados no snapshot"""
+        return json.loads(self.payload)
@@ -6,6 +6,7 @@ from flask_login import UserMixin
 from werkzeug.security import check_password_hash, generate_password_hash
 from app import db
 from sqlalchemy import inspect
+from app.utils.request_memo import request_memo
 
 
 class User(UserMixin, db.Model):
@@ -174,5 +175,11 @@ class User(UserMixin, db.Model):
             import logging
             logging.getLogger(__name__).error(f"Erro ao sincronizar localização: {e}")
 
+    @staticmethod
+    @request_memo(key_func=lambda user_id: int(user_id))
+    def get_by_id(user_id):
+        """Usuário por id (carregado uma vez por pedido)"""
+        return User.query.get(int(user_id))
+    
     def __repr__(self):
         return f'<User {self.email}>'
@@ -1,6 +1,7 @@
 """
 Modelos para dados climáticos - ATUALIZADO conforme banco otimizado
 """
+import json
 from app import db
 from datetime import datetime, timedelta
 
@@ -31,6 +32,9 @@ class WeatherLocation(db.Model):
 class WeatherData(db.Model):
     """Modelo para dados climáticos coletados"""
     __tablename__ = 'weather_data'
+    __table_args__ = (
+        db.Index('ix_weather_data_collected_at', 'collected_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     location_name = db.Column(db.String(100), nullable=False)
@@ -153,6 +157,145 @@ class WeatherData(db.Model):
         return weather_record
 
 
+class WeatherForecast(db.Model):
+    """Modelo para previsão diária normalizada por localização"""
+    __tablename__ = 'weather_forecasts'
+    __table_args__ = (
+        db.Index('ix_weather_forecasts_location_date', 'location_id', 'target_date'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    location_id = db.Column(db.Integer, db.ForeignKey('weather_locations.id'), nullable=False)
+    target_date = db.Column(db.Date, nullable=False)
+    
+    # Valores previstos para o dia
+    temp_min = db.Column(db.Float)
+    temp_max = db.Column(db.Float)
+    humidity = db.Column(db.Integer)
+    pressure = db.Column(db.Integer)
+    wind_speed = db.Column(db.Float)
+    condition = db.Column(db.String(100))
+    
+    # Coleta que gerou a previsão
+    collected_at = db.Column(db.DateTime, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        """Converte a previsão para o formato usado nas respostas"""
+        return {
+            'date': self.target_date.isoformat(),
+            'condition': self.condition,
+            'temp_max': self.temp_max,
+            'temp_min': self.temp_min,
+            'humidity': self.humidity,
+            'pressure': self.pressure,
+            'wind_speed': self.wind_speed
+        }
+    
+    @staticmethod
+    def get_for_location(location_id, days=5):
+        """Obtém a previsão a partir de hoje para uma localização"""
+        today = datetime.utcnow().date()
+        return WeatherForecast.query.filter(
+            WeatherForecast.location_id == location_id,
+            WeatherForecast.target_date >= today
+        ).order_by(WeatherForecast.target_date.asc()).limit(days).all()
+    
+    @staticmethod
+    def get_for_coordinates(latitude, longitude, days=5, tolerance=0.01):
+        """Obtém a previsão da localização nas coordenadas indicadas"""
+        today = datetime.utcnow().date()
+        return WeatherForecast.query.join(
+            WeatherLocation, WeatherForecast.location_id == WeatherLocation.id
+        ).filter(
+            WeatherLocation.latitude.between(latitude - tolerance, latitude + tolerance),
+            WeatherLocation.longitude.between(longitude - tolerance, longitude + tolerance),
+            WeatherForecast.target_date >= today
+        ).order_by(WeatherForecast.target_date.asc()).limit(days).all()
+    
+    @staticmethod
+    def replace_for_location(location_id, forecast_list, collected_at):
+        """
+        Substitui a previsão de uma localização (sem commit)
+        
+        Args:
+            location_id: ID da localização
+            forecast_list: Lista de dias com date, condition, temp_min, temp_max...
+            collected_at: Momento da coleta
+        """
+        rows = []
+        for day in forecast_list:
+            target_date = day['date']
+            if isinstance(target_date, str):
+                target_date = datetime.fromisoformat(target_date).date()
+            
+            rows.append({
+                'location_id': location_id,
+                'target_date': target_date,
+                'temp_min': day.get('temp_min'),
+                'temp_max': day.get('temp_max'),
+                'humidity': day.get('humidity'),
+                'pressure': day.get('pressure'),
+                'wind_speed': day.get('wind_speed'),
+                'condition': day.get('condition'),
+                'collected_at': collected_at
+            })
+        
+        if not rows:
+            return 0
+        
+        WeatherForecast.query.filter(
+            WeatherForecast.location_id == location_id,
+            WeatherForecast.target_date >= min(row['target_date'] for row in rows)
+        ).delete(synchronize_session=False)
+        
+        db.session.bulk_insert_mappings(WeatherForecast, rows)
+        return len(rows)
+
+
+class WeatherSnapshot(db.Model):
+    """Resposta climática já formatada (atual + previsão) por localização"""
+    __tablename__ = 'weather_snapshots'
+    __table_args__ = (
+        db.UniqueConstraint('location_id', name='uq_weather_snapshots_location'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    location_id = db.Column(db.Integer, db.ForeignKey('weather_locations.id'), nullable=False)
+    collected_at = db.Column(db.DateTime, nullable=False)
+    payload = db.Column(db.Text, nullable=False)  # JSON
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def get_payload(self):
+        """Resposta formatada guardada no snapshot"""
+        return json.loads(self.payload)
+    
+    @staticmethod
+    def get_for_location(location_id):
+        """Obtém o snapshot de uma localização"""
+        return WeatherSnapshot.query.filter_by(location_id=location_id).first()
+    
+    @staticmethod
+    def store(location_id, collected_at, data):
+        """
+        Grava o snapshot de uma localização (sem commit)
+        
+        Args:
+            location_id: ID da localização
+            collected_at: Momento da coleta que originou o snapshot
+            data: Resposta formatada
+        """
+        snapshot = WeatherSnapshot.get_for_location(location_id)
+        if not snapshot:
+            snapshot = WeatherSnapshot(location_id=location_id)
+            db.session.add(snapshot)
+        
+        snapshot.collected_at = collected_at
+        snapshot.payload = json.dumps(data, separators=(',', ':'))
+        snapshot.created_at = datetime.utcnow()
+        return snapshot
+
+
 class WeatherStats(db.Model):
     """Modelo para estatísticas climáticas agregadas"""
     __tablename__ = 'weather_stats'
@@ -0,0 +1,117 @@
+"""
+Histórico climático compacto - arquivo diário por localização e ano
+"""
+import zlib
+from array import array
+from datetime import datetime, date, timedelta
+from app import db
+
+
+class WeatherHistoryArchive(db.Model):
+    """
+    Histórico diário compactado de uma localização para um ano
+    
+    Cada coluna é um array int16 de 366 posições (dia do ano), escalado e
+    comprimido com zlib num único BLOB. Um ano completo ocupa poucos KB.
+    """
+    __tablename__ = 'weather_history_archive'
+    __table_args__ = (db.UniqueConstraint('location_id', 'year'),)
+    
+    SCHEMA_VERSION = 1
+    DAYS_PER_YEAR = 366
+    MISSING = -32768
+    
+    # Coluna -> fator de escala aplicado antes de guardar como inteiro
+    COLUMNS = (
+        ('temp_min', 10),
+        ('temp_avg', 10),
+        ('temp_max', 10),
+        ('humidity_avg', 10),
+        ('pressure_avg', 1),
+        ('wind_avg', 10),
+        ('wind_max', 10),
+        ('rainy_hours', 1),
+        ('readings', 1),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    location_id = db.Column(db.Integer, db.ForeignKey('weather_locations.id'), nullable=False)
+    year = db.Column(db.Integer, nullable=False)
+    days_filled = db.Column(db.Integer, nullable=False, default=0)
+    schema_version = db.Column(db.Integer, nullable=False, default=SCHEMA_VERSION)
+    packed_columns = db.Column(db.LargeBinary, nullable=False)
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    @classmethod
+    def empty_columns(cls):
+        """Colunas vazias para um ano"""
+        return {name: array('h', [cls.MISSING]) * cls.DAYS_PER_YEAR for name, _ in cls.COLUMNS}
+    
+    @classmethod
+    def pack(cls, columns):
+        """Serializar colunas para o BLOB comprimido"""
+        raw = b''.join(columns[name].tobytes() for name, _ in cls.COLUMNS)
+        return zlib.compress(raw, 6)
+    
+    def unpack(self):
+        """Deserializar o BLOB em colunas int16"""
+        raw = zlib.decompress(self.packed_columns)
+        size = self.DAYS_PER_YEAR * array('h').itemsize
+        columns = {}
+        for index, (name, _) in enumerate(self.COLUMNS):
+            column = array('h')
+            column.frombytes(raw[index * size:(index + 1) * size])
+            columns[name] = column
+        return columns
+    
+    def store_days(self, daily_values):
+        """
+        Gravar agregados diários no arquivo
+        
+        Args:
+            daily_values: Dict {date: {coluna: valor}}
+        """
+        columns = self.unpack() if self.packed_columns else self.empty_columns()
+        scales = dict(self.COLUMNS)
+        
+        for day, values in daily_values.items():
+            slot = day.timetuple().tm_yday - 1
+            for name, value in values.items():
+                if name in scales and value is not None:
+                    scaled = int(round(value * scales[name]))
+                    columns[name][slot] = max(-32767, min(32767, scaled))
+        
+        self.packed_columns = self.pack(columns)
+        self.days_filled = sum(1 for value in columns['readings'] if value != self.MISSING)
+        self.schema_version = self.SCHEMA_VERSION
+    
+    def get_days(self, start_date: date = None, end_date: date = None):
+        """
+        Obter os dias preenchidos num intervalo
+        
+        Returns:
+            Lista de dicts com 'date' e valores já desescalados
+        """
+        columns = self.unpack()
+        first_day = date(self.year, 1, 1)
+        result = []
+        
+        for slot in range(self.DAYS_PER_YEAR):
+            if columns['readings'][slot] == self.MISSING:
+                continue
+            
+            day = first_day + timedelta(days=slot)
+            if day.year != self.year:
+                break
+            if (start_date and day < start_date) or (end_date and day > end_date):
+                continue
+            
+            entry = {'date': day}
+            for name, scale in self.COLUMNS:
+                value = columns[name][slot]
+                entry[name] = None if value == self.MISSING else value / scale
+            result.append(entry)
+        
+        return result
@@ -23,9 +23,11 @@ class AIService:
             context_str = json.dumps(context, sort_keys=True, default=str)
             context_hash = hashlib.md5(context_str.encode()).hexdigest()[:8]
             
-            # Tentar obter do cache primeiro
+            # Tentar obter do cache primeiro (namespace por usuário, invalidável à parte)
             cache_key = f"ai_response:{hashlib.md5(message.encode()).hexdigest()[:10]}_{context_hash}"
-            cached_response = cache.get(cache_key, 'ai')
+            user_id = (context.get('user_profile') or {}).get('id')
+            cache_namespace = f"ai:user_{user_id}" if user_id else 'ai'
+            cached_response = cache.get(cache_key, cache_namespace)
             
             if cached_response:
                 current_app.logger.info(f"Resposta IA obtida do cache para: {message[:50]}...")
@@ -36,16 +38,21 @@ class AIService:
             if offline_response:
                 # Cachear resposta offline (timeout menor)
                 cache.set(cache_key, offline_response, 
-                         current_app.config.get('CACHE_TIMEOUT_AI', 3600) // 4, 'ai')
+                         current_app.config.get('CACHE_TIMEOUT_AI', 3600) // 4, cache_namespace)
                 return offline_response
             
-            # Se não conseguir offline, usar IA em nuvem
-            cloud_response = AIService._process_with_cloud_ai(message, context)
-            
-            # Cachear resposta da nuvem (timeout completo)
-            if cloud_response.get('success'):
-                cache.set(cache_key, cloud_response, 
-                         current_app.config.get('CACHE_TIMEOUT_AI', 3600), 'ai')
+            # Se não conseguir offline, usar IA em nuvem (uma chamada por pergunta repetida)
+            with cache.single_flight(cache_key, cache_namespace):
+                cached_response = cache.get(cache_key, cache_namespace)
+                if cached_response:
+                    return cached_response
+                
+                cloud_response = AIService._process_with_cloud_ai(message, context)
+                
+                # Cachear resposta da nuvem (timeout completo)
+                if cloud_response.get('success'):
+                    cache.set(cache_key, cloud_response, 
+                             current_app.config.get('CACHE_TIMEOUT_AI', 3600), cache_namespace)
             
             return cloud_response
             
@@ -292,10 +299,8 @@ Mantenha as respostas concisas mas informativas."""
     def invalidate_user_ai_cache(user_id: int):
         """Invalidar cache de IA para um usuário específico"""
         try:
-            # Como o cache de IA usa hash de mensagem + contexto,
-            # não podemos invalidar por usuário facilmente.
-            # Em vez disso, podemos limpar todo o namespace de IA
-            current_app.logger.info(f"Solicitada invalidação de cache IA para usuário {user_id}")
+            cache.clear_namespace(f"ai:user_{user_id}")
+            current_app.logger.info(f"Cache IA invalidado para usuário {user_id}")
             return True
         except Exception as e:
             current_app.logger.error(f"Erro ao invalidar cache IA: {e}")
@@ -303,11 +308,11 @@ Mantenha as respostas concisas mas informativas."""
     
     @staticmethod
     def clear_all_ai_cache():
-        """Limpar todo o cache de IA"""
+        """Limpar todo o cache de IA (todos os usuários)"""
         try:
-            cleared = cache.clear_namespace('ai')
-            current_app.logger.info(f"Cache de IA limpo: {cleared} chaves removidas")
-            return cleared
+            generation = cache.clear_namespace('ai')
+            current_app.logger.info(f"Cache de IA invalidado (geração {generation})")
+            return generation
         except Exception as e:
             current_app.logger.error(f"Erro ao limpar cache de IA: {e}")
             return 0
@@ -316,14 +321,13 @@ Mantenha as respostas concisas mas informativas."""
     def get_ai_cache_stats():
         """Obter estatísticas do cache de IA"""
         try:
-            # Contar chaves do namespace 'ai'
-            ai_keys = 0
-            if cache.redis_client:
-                pattern = f"{cache.app.config.get('CACHE_KEY_PREFIX', 'agagri:')}ai:*"
-                ai_keys = len(cache.redis_client.keys(pattern))
+            # Contadores do namespace 'ai' (sem percorrer as chaves do Redis)
+            ai_stats = cache.get_stats().get('namespaces', {}).get('ai', {})
             
             return {
-                'ai_cached_responses': ai_keys,
+                'ai_cached_responses': ai_stats.get('sets', 0),
+                'hits': ai_stats.get('hits', 0),
+                'misses': ai_stats.get('misses', 0),
                 'cache_namespace': 'ai'
             }
         except Exception as e:
@@ -4,6 +4,7 @@ from app.models.alerts import Alert, AlertRule, AlertType, AlertPriority, AlertS
 from app.models.user import User
 from app.models.culture import Culture
 from app import db
+from app.utils.request_memo import request_memo
 import logging
 import json
 
@@ -281,6 +282,7 @@ class AlertEngine:
         if expired_alerts:
             logger.info(f"Marcados {len(expired_alerts)} alertas como expirados")
     
+    @request_memo(key_func=lambda self, user_id, alert_type: (user_id, alert_type))
     def _get_user_preferences(self, user_id: int, alert_type: AlertType) -> UserAlertPreference:
         """Obter preferências do usuário para tipo de alerta"""
         pref = UserAlertPreference.query.filter_by(
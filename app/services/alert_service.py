@@ -26,7 +26,7 @@ class AlertService:
         alerts = []
         
         try:
-            user = User.query.get(user_id)
+            user = User.get_by_id(user_id)
             if not user:
                 return alerts
 
@@ -256,17 +256,18 @@ class AlertService:
                 )
                 alerts.append(alert)
             
-            # Verificar previsão de geada nos próximos dias
+            # Verificar previsão de geada nos próximos dias (previsão da tabela weather_forecasts)
             for day in forecast[:3]:  # Próximos 3 dias
-                if day.get('temperature_min', 10) < 2:
+                temp_min = day.get('temp_min')
+                if temp_min is not None and temp_min < 2:
                     alert = Alert(
                         user_id=user.id,
                         type='weather',
                         priority='medium',
                         title='❄️ Previsão de Geada',
-                        message=f'Previsão de temperatura mínima de {day.get("temperature_min")}°C. Prepare proteções para as culturas.',
+                        message=f'Previsão de temperatura mínima de {temp_min}°C. Prepare proteções para as culturas.',
                         data_dict={
-                            'forecast_temp': day.get('temperature_min'),
+                            'forecast_temp': temp_min,
                             'date': day.get('date'),
                             'recommendation': 'prepare_frost_protection'
                         }
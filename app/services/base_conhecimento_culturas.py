@@ -1,6 +1,7 @@
 """
 Base de Conhecimento de Culturas para Portugal
 """
+from app.utils.request_memo import request_memo
 
 CULTURAS_PORTUGAL = {
     # HORTÍCOLAS
@@ -767,6 +768,7 @@ DIFICULDADES = {
     }
 }
 
+@request_memo(key_func=lambda nome: nome.lower().strip())
 def buscar_cultura(nome):
     """
     Busca informações sobre uma cultura
@@ -1077,6 +1079,7 @@ def adicionar_cultura_dinamica(cultura_info):
         
         # 1. Adicionar à base dinâmica (memória)
         CULTURAS_DINAMICAS[nome_key] = cultura_formatada
+        buscar_cultura.forget()
         
         # 2. PERSISTIR NO BANCO DE DADOS
         try:
@@ -0,0 +1,221 @@
+"""
+Aquecimento do cache
+Após um arranque ou uma coleta climática, pré-calcula as entradas mais
+pedidas (snapshots do dashboard e clima das localizações dos usuários mais
+ativos) para que os primeiros pedidos não paguem o arranque a frio
+"""
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from flask import Flask
+
+from app import db
+from app.services.dashboard_snapshot import dashboard_snapshots
+from app.utils.tiered_cache import tiered_cache
+
+logger = logging.getLogger(__name__)
+
+
+class CacheWarmer:
+    """
+    Pré-preenchimento do cache com prazo máximo
+    
+    Os usuários a aquecer são os das chaves de snapshot mais lidas segundo as
+    contagens de acesso do próprio cache (top-N); sem contagens (ex: primeiro
+    arranque sem Redis) usam-se os últimos usuários a aceder. Os snapshots do
+    dashboard são partilhados e o seu cálculo gera alertas (escritas), pelo
+    que só o worker que obtém o lock entre processos (advisory lock no
+    PostgreSQL, lock de arquivo nos outros bancos) os calcula; o clima
+    (namespace weather:current, barato de ler) é aquecido por todos, o que
+    também preenche o L1 de cada processo.
+    """
+    
+    ADVISORY_LOCK_ID = 7243011
+    LOCK_NAME = 'cache_warmer'
+    
+    _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='cache-warmer')
+    
+    def __init__(self, top_n: int = 50, timeout: float = 20.0):
+        self.top_n = top_n
+        self.timeout = timeout
+        self.enabled = False
+        self._pending = set()
+        self._lock = threading.Lock()
+        self.runs = 0
+        self.last_result = None
+    
+    def init_app(self, app: Flask):
+        """Configurar e aquecer em segundo plano no arranque do worker"""
+        self.enabled = app.config.get('CACHE_WARMING_ENABLED', False) and not app.config.get('TESTING', False)
+        self.top_n = app.config.get('CACHE_WARMING_TOP_N', self.top_n)
+        self.timeout = app.config.get('CACHE_WARMING_TIMEOUT', self.timeout)
+        
+        if self.enabled:
+            self.warm_async(app, 'startup')
+    
+    def warm_async(self, app: Flask, reason: str) -> bool:
+        """
+        Agendar um aquecimento (pedidos repetidos com a mesma razão enquanto
+        um está pendente são ignorados)
+        
+        Returns:
+            True se foi agendado
+        """
+        if not self.enabled:
+            return False
+        
+        with self._lock:
+            if reason in self._pending:
+                return False
+            self._pending.add(reason)
+        
+        self._executor.submit(self._run, app, reason)
+        return True
+    
+    def _run(self, app: Flask, reason: str):
+        with self._lock:
+            self._pending.discard(reason)
+        
+        with app.app_context():
+            try:
+                self.warm(reason)
+            except Exception as e:
+                logger.error(f"Erro no aquecimento do cache ({reason}): {e}")
+            finally:
+                db.session.remove()
+    
+    def hot_user_ids(self, limit: int) -> List[int]:
+        """Usuários com mais leituras do snapshot do dashboard (ou os últimos a aceder)"""
+        user_ids = []
+        for name, _ in tiered_cache.hot_keys(limit, prefix=dashboard_snapshots.KEY_PREFIX):
+            try:
+                user_ids.append(int(name[len(dashboard_snapshots.KEY_PREFIX):]))
+            except ValueError:
+                continue
+        
+        if len(user_ids) < limit:
+            from app.models.user import User
+            
+            recent = db.session.query(User.id).filter(
+                User.is_active == True,
+                User.ultimo_acesso.isnot(None)
+            ).order_by(User.ultimo_acesso.desc()).limit(limit).all()
+            for (user_id,) in recent:
+                if user_id not in user_ids and len(user_ids) < limit:
+                    user_ids.append(user_id)
+        
+        return user_ids
+    
+    def warm(self, reason: str = 'manual', timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Pré-calcular as entradas mais pedidas até ao prazo
+        
+        Args:
+            reason: Origem do aquecimento ('startup', 'weather_collection', ...)
+            timeout: Prazo em segundos (por omissão CACHE_WARMING_TIMEOUT)
+        
+        Returns:
+            Dict com o que foi aquecido
+        """
+        from flask import current_app
+        from app.models.user import User
+        from app.services.dashboard_service import DashboardService
+        from app.services.weather_data_service import WeatherDataService
+        from app.services.weather_scheduler import SchedulerLeaderLock
+        
+        started = time.monotonic()
+        deadline = started + (timeout or self.timeout)
+        result = {
+            'reason': reason,
+            'users': 0,
+            'weather_locations': 0,
+            'dashboards': 0,
+            'dashboards_skipped': 0,
+            'errors': 0,
+            'timed_out': False
+        }
+        
+        user_ids = self.hot_user_ids(self.top_n)
+        users = User.query.filter(User.id.in_(user_ids)).all() if user_ids else []
+        users.sort(key=lambda user: user_ids.index(user.id))
+        result['users'] = len(users)
+        
+        # Clima por localização (namespace weather:current)
+        try:
+            WeatherDataService.get_current_snapshot()
+        except Exception as e:
+            result['errors'] += 1
+            logger.warning(f"Erro ao aquecer snapshot climático: {e}")
+        
+        locations = set()
+        for user in users:
+            if time.monotonic() >= deadline:
+                result['timed_out'] = True
+                break
+            location = user.cidade or ((user.latitude, user.longitude) if user.latitude and user.longitude else None)
+            if location is None or location in locations:
+                continue
+            locations.add(location)
+            try:
+                WeatherDataService.get_weather_for_user(user)
+                result['weather_locations'] += 1
+            except Exception as e:
+                result['errors'] += 1
+                logger.warning(f"Erro ao aquecer clima de {location}: {e}")
+        
+        # Snapshots do dashboard (partilhados: um worker de cada vez, em
+        # todos os processos, com ou sem Redis)
+        warm_lock = SchedulerLeaderLock(
+            current_app._get_current_object(),
+            lock_id=self.ADVISORY_LOCK_ID,
+            name=self.LOCK_NAME
+        )
+        if not warm_lock.acquire():
+            result['dashboards_skipped'] = len(users)
+        else:
+            try:
+                existing = dashboard_snapshots.get_many(user.id for user in users)
+                for user in users:
+                    if time.monotonic() >= deadline:
+                        result['timed_out'] = True
+                        break
+                    if user.id in existing:
+                        result['dashboards_skipped'] += 1
+                        continue
+                    try:
+                        dashboard_snapshots.set(user.id, DashboardService.build_dashboard_data(user))
+                        result['dashboards'] += 1
+                    except Exception as e:
+                        db.session.rollback()
+                        result['errors'] += 1
+                        logger.warning(f"Erro ao aquecer dashboard do usuário {user.id}: {e}")
+            finally:
+                warm_lock.release()
+        
+        result['duration_ms'] = round((time.monotonic() - started) * 1000, 1)
+        result['finished_at'] = datetime.now(timezone.utc).isoformat()
+        self.runs += 1
+        self.last_result = result
+        
+        logger.info(
+            f"Cache aquecido ({reason}): {result['dashboards']} dashboards, "
+            f"{result['weather_locations']} localizações em {result['duration_ms']}ms"
+        )
+        return result
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Estado do aquecimento"""
+        return {
+            'enabled': self.enabled,
+            'top_n': self.top_n,
+            'timeout': self.timeout,
+            'runs': self.runs,
+            'last_result': self.last_result
+        }
+
+
+# Instância global do aquecimento do cache
+cache_warmer = CacheWarmer()
@@ -17,13 +17,22 @@ from app.utils.cache_manager import cache, cached
 logger = logging.getLogger(__name__)
 
 
+def _user_culture_namespace(*args, **kwargs) -> str:
+    """Namespace de cache das culturas do usuário atual (invalidável por usuário)"""
+    return f"culture:user_{current_user.id if current_user.is_authenticated else 'anonymous'}"
+
+
+def _culture_by_id_key(culture_id, *args, **kwargs) -> str:
+    return f"culture_by_id:id_{culture_id}_user_{current_user.id if current_user.is_authenticated else 'anonymous'}"
+
+
 class CultureService:
     """Service para operações de cultura"""
     
     @staticmethod
     @cached(
         timeout=lambda: current_app.config.get('CACHE_TIMEOUT_CULTURE', 86400),
-        namespace='culture',
+        namespace=_user_culture_namespace,
         key_func=lambda: f"user_cultures:user_{current_user.id if current_user.is_authenticated else 'anonymous'}"
     )
     def get_user_cultures() -> Dict[str, Any]:
@@ -47,9 +56,18 @@ class CultureService:
             
             logger.info(f"Culturas encontradas: {len(cultures)}")
             
+            cultures_data = [culture.to_dict() for culture in cultures]
+            
+            # Detalhes de cada cultura guardados num único pipeline (get_culture_by_id)
+            cache.prime_many(
+                {_culture_by_id_key(data['id']): {'success': True, 'culture': data} for data in cultures_data},
+                current_app.config.get('CACHE_TIMEOUT_CULTURE', 86400),
+                _user_culture_namespace()
+            )
+            
             return {
                 'success': True,
-                'cultures': [culture.to_dict() for culture in cultures]
+                'cultures': cultures_data
             }
             
         except Exception as e:
@@ -96,14 +114,6 @@ class CultureService:
             db.session.add(culture)
             db.session.commit()
             
-            logger.info(f"Cultura criada com sucesso: ID {culture.id}")
-            
-            return {
-                'success': True,
-                'message': 'Cultura criada com sucesso',
-                'culture': culture.to_dict()
-            }
-            
         except Exception as e:
             logger.error(f"Erro ao criar cultura: {e}")
             db.session.rollback()
@@ -112,12 +122,23 @@ class CultureService:
                 'error': 'Erro ao criar cultura',
                 'status_code': 500
             }
+        
+        # Após o commit: falhas do cache não desfazem a cultura criada
+        CultureService.invalidate_user_culture_cache(current_user.id)
+        
+        logger.info(f"Cultura criada com sucesso: ID {culture.id}")
+        
+        return {
+            'success': True,
+            'message': 'Cultura criada com sucesso',
+            'culture': culture.to_dict()
+        }
     
     @staticmethod
     @cached(
         timeout=lambda: current_app.config.get('CACHE_TIMEOUT_CULTURE', 86400),
-        namespace='culture',
-        key_func=lambda culture_id: f"culture_by_id:id_{culture_id}_user_{current_user.id if current_user.is_authenticated else 'anonymous'}"
+        namespace=_user_culture_namespace,
+        key_func=_culture_by_id_key
     )
     def get_culture_by_id(culture_id: int) -> Dict[str, Any]:
         """
@@ -203,14 +224,6 @@ class CultureService:
             
             db.session.commit()
             
-            logger.info(f"Cultura atualizada com sucesso: ID {culture.id}")
-            
-            return {
-                'success': True,
-                'message': 'Cultura atualizada com sucesso',
-                'culture': culture.to_dict()
-            }
-            
         except Exception as e:
             logger.error(f"Erro ao atualizar cultura: {e}")
             db.session.rollback()
@@ -219,6 +232,16 @@ class CultureService:
                 'error': 'Erro ao atualizar cultura',
                 'status_code': 500
             }
+        
+        CultureService.invalidate_user_culture_cache(culture.user_id)
+        
+        logger.info(f"Cultura atualizada com sucesso: ID {culture.id}")
+        
+        return {
+            'success': True,
+            'message': 'Cultura atualizada com sucesso',
+            'culture': culture.to_dict()
+        }
     
     @staticmethod
     def delete_culture(culture_id: int) -> Dict[str, Any]:
@@ -247,16 +270,10 @@ class CultureService:
                 }
             
             culture_name = culture.nome
+            culture_user_id = culture.user_id
             db.session.delete(culture)
             db.session.commit()
             
-            logger.info(f"Cultura excluída com sucesso: {culture_name}")
-            
-            return {
-                'success': True,
-                'message': 'Cultura excluída com sucesso'
-            }
-            
         except Exception as e:
             logger.error(f"Erro ao excluir cultura: {e}")
             db.session.rollback()
@@ -265,6 +282,15 @@ class CultureService:
                 'error': 'Erro ao excluir cultura',
                 'status_code': 500
             }
+        
+        CultureService.invalidate_user_culture_cache(culture_user_id)
+        
+        logger.info(f"Cultura excluída com sucesso: {culture_name}")
+        
+        return {
+            'success': True,
+            'message': 'Cultura excluída com sucesso'
+        }
     
     @staticmethod
     def get_culture_types() -> Dict[str, Any]:
@@ -278,6 +304,30 @@ class CultureService:
             'success': True,
             'types': CultureValidator.get_culture_types()
         }
+    
+    @staticmethod
+    def invalidate_user_culture_cache(user_id: int) -> bool:
+        """
+        Invalidar o cache de culturas de um usuário (nova geração do namespace)
+        
+        Args:
+            user_id: ID do usuário
+        """
+        try:
+            cache.clear_namespace(f"culture:user_{user_id}")
+            return True
+        except Exception as e:
+            logger.error(f"Erro ao invalidar cache de culturas do usuário {user_id}: {e}")
+            return False
+    
+    @staticmethod
+    def clear_all_culture_cache() -> int:
+        """Invalidar o cache de culturas de todos os usuários"""
+        try:
+            return cache.clear_namespace('culture')
+        except Exception as e:
+            logger.error(f"Erro ao limpar cache de culturas: {e}")
+            return 0
 
 
 class CultureWizardService:
@@ -490,17 +540,6 @@ class CultureWizardService:
             db.session.commit()
             logger.info("DEBUG: Cultura commitada com sucesso")
             
-            # Limpar dados do wizard da sessão
-            session.pop('culture_wizard', None)
-            
-            logger.info(f"Cultura criada do wizard com sucesso: ID {culture.id}")
-            
-            return {
-                'success': True,
-                'message': 'Cultura criada com sucesso!',
-                'culture': culture.to_dict()
-            }
-            
         except Exception as e:
             logger.error(f"Erro ao criar cultura do wizard: {e}")
             logger.exception("Stack trace completo:")
@@ -510,6 +549,18 @@ class CultureWizardService:
                 'error': 'Erro ao criar cultura',
                 'status_code': 500
             }
+        
+        # Limpar dados do wizard da sessão (a cultura já está gravada)
+        session.pop('culture_wizard', None)
+        CultureService.invalidate_user_culture_cache(culture.user_id)
+        
+        logger.info(f"Cultura criada do wizard com sucesso: ID {culture.id}")
+        
+        return {
+            'success': True,
+            'message': 'Cultura criada com sucesso!',
+            'culture': culture.to_dict()
+        }
     
     @staticmethod
     def get_wizard_data() -> Dict[str, Any]:
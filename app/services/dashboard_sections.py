@@ -0,0 +1,156 @@
+"""
+Carregamento paralelo das secções do dashboard
+Cada secção é calculada numa thread própria (com app context e sessão
+próprios) e entregue assim que termina; secções que excedem o seu prazo
+ficam com um fallback e são pedidas depois pelo browser
+"""
+import time
+import logging
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Dict, Iterator, Tuple
+from flask import current_app
+
+from app import db
+from app.services.dashboard_service import DashboardService
+
+logger = logging.getLogger(__name__)
+
+
+class DashboardSectionLoader:
+    """Secções independentes do dashboard, cada uma com prazo e fallback"""
+    
+    SECTIONS = ('overview', 'alerts', 'weather', 'cultures', 'activities')
+    
+    # Prazo por secção em segundos (DASHBOARD_SECTION_TIMEOUTS sobrepõe)
+    DEFAULT_TIMEOUTS = {
+        'overview': 2.0,
+        'alerts': 3.0,
+        'weather': 2.0,
+        'cultures': 2.0,
+        'activities': 2.0
+    }
+    
+    FALLBACKS = {
+        'overview': {
+            'active_cultures': 0,
+            'total_area': 0,
+            'pending_activities': 0,
+            'monthly_production': 0,
+            'projected_revenue': 0
+        },
+        'alerts': {'items': [], 'unread': 0},
+        'weather': None,
+        'cultures': [],
+        'activities': []
+    }
+    
+    _executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='dashboard-section')
+    
+    @staticmethod
+    def get_timeouts() -> Dict[str, float]:
+        timeouts = dict(DashboardSectionLoader.DEFAULT_TIMEOUTS)
+        try:
+            timeouts.update(current_app.config.get('DASHBOARD_SECTION_TIMEOUTS') or {})
+        except RuntimeError:
+            pass
+        return timeouts
+    
+    @staticmethod
+    def user_context(user) -> Dict[str, Any]:
+        """Dados do usuário necessários às secções (seguros para outras threads)"""
+        return {
+            'id': user.id,
+            'cidade': user.cidade,
+            'latitude': user.latitude,
+            'longitude': user.longitude
+        }
+    
+    @staticmethod
+    def load(section: str, user: Dict[str, Any]) -> Any:
+        """
+        Calcula uma secção no contexto atual
+        
+        Args:
+            section: Nome da secção (SECTIONS)
+            user: Resultado de user_context
+        """
+        user_id = user['id']
+        
+        if section == 'overview':
+            return DashboardService.get_overview_data(user_id)
+        
+        if section == 'alerts':
+            items = DashboardService.get_alerts_data(user_id)
+            return {'items': items, 'unread': DashboardService.get_unread_alerts_count(user_id)}
+        
+        if section == 'weather':
+            from app.services.weather_data_service import WeatherDataService
+            result = WeatherDataService.get_weather_for_user(SimpleNamespace(**user))
+            return result['data'] if result.get('success') else None
+        
+        if section == 'cultures':
+            return DashboardService.get_active_cultures(user_id)
+        
+        if section == 'activities':
+            return DashboardService.get_recent_activities(user_id)
+        
+        raise ValueError(f"Secção desconhecida: {section}")
+    
+    @staticmethod
+    def _load_in_thread(app, section: str, user: Dict[str, Any]) -> Any:
+        with app.app_context():
+            try:
+                return DashboardSectionLoader.load(section, user)
+            finally:
+                db.session.remove()
+    
+    @staticmethod
+    def iter_sections(app, user: Dict[str, Any]) -> Iterator[Tuple[str, Any, str]]:
+        """
+        Calcula todas as secções em paralelo
+        
+        Yields:
+            (secção, dados, estado) pela ordem de conclusão; estado é 'ok',
+            'error' ou 'timeout' (dados de fallback nos dois últimos)
+        """
+        timeouts = DashboardSectionLoader.get_timeouts()
+        started = time.monotonic()
+        pending = {
+            DashboardSectionLoader._executor.submit(DashboardSectionLoader._load_in_thread, app, section, user): section
+            for section in DashboardSectionLoader.SECTIONS
+        }
+        
+        while pending:
+            now = time.monotonic()
+            next_deadline = min(started + timeouts[section] for section in pending.values())
+            done, _ = wait(list(pending), timeout=max(0, next_deadline - now), return_when=FIRST_COMPLETED)
+            
+            for future in done:
+                section = pending.pop(future)
+                try:
+                    yield section, future.result(), 'ok'
+                except Exception as e:
+                    logger.error(f"Erro ao carregar secção {section} do dashboard: {e}")
+                    yield section, DashboardSectionLoader.FALLBACKS[section], 'error'
+            
+            # Secções fora do prazo continuam na thread, mas deixam de bloquear a página
+            now = time.monotonic()
+            for future, section in list(pending.items()):
+                if now >= started + timeouts[section]:
+                    del pending[future]
+                    logger.warning(f"Secção {section} do dashboard excedeu {timeouts[section]}s")
+                    yield section, DashboardSectionLoader.FALLBACKS[section], 'timeout'
+    
+    @staticmethod
+    def iter_snapshot_sections(data: Dict[str, Any]) -> Iterator[Tuple[str, Any, str]]:
+        """Secções a partir do snapshot do dashboard (sem consultas)"""
+        sections = {
+            'overview': data.get('overview'),
+            'alerts': {'items': data.get('alerts') or [], 'unread': data.get('alerts_count') or 0},
+            'weather': data.get('weather'),
+            'cultures': data.get('cultures') or [],
+            'activities': data.get('recent_activities') or []
+        }
+        for section in DashboardSectionLoader.SECTIONS:
+            yield section, sections[section], 'ok'
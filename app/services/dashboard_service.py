@@ -1,6 +1,8 @@
 """
 Dashboard Service - Simplificado sem funcionalidades de clima
 """
+import json
+import hashlib
 import logging
 from typing import Dict, Any, List
 from datetime import datetime, timedelta
@@ -10,6 +12,7 @@ from flask import current_app
 from app import db
 from app.models.culture import Culture
 from app.models.activity import Activity
+from app.services.dashboard_snapshot import dashboard_snapshots
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +20,9 @@ logger = logging.getLogger(__name__)
 class DashboardService:
     """Serviço simplificado para dados do dashboard"""
     
+    # Secções versionadas individualmente (respostas delta com ?since=)
+    DASHBOARD_SECTIONS = ('overview', 'alerts', 'alerts_count', 'recent_activities', 'cultures', 'weather')
+    
     @staticmethod
     def get_dashboard_data() -> Dict[str, Any]:
         """Obtém dados básicos do dashboard"""
@@ -28,21 +34,18 @@ class DashboardService:
                     'status_code': 401
                 }
             
-            logger.info(f"Obtendo dados do dashboard para usuário: {current_user.email}")
-            
-            data = {
-                'overview': DashboardService.get_overview_data(),
-                'alerts': DashboardService.get_alerts_data(),
-                'alerts_count': DashboardService.get_unread_alerts_count(),
-                'recent_activities': DashboardService.get_recent_activities(),
-                'cultures': DashboardService.get_active_cultures()
-            }
+            # Snapshot por usuário, invalidado quando os dados do usuário mudam
+            data = dashboard_snapshots.get(current_user.id)
+            if data is None:
+                logger.info(f"Calculando dados do dashboard para usuário: {current_user.email}")
+                data = DashboardService.build_dashboard_data()
+                dashboard_snapshots.set(current_user.id, data)
             
             return {
                 'success': True,
                 'data': data
             }
-            
+        
         except Exception as e:
             logger.error(f"Erro ao obter dados do dashboard: {e}")
             return {
@@ -52,39 +55,55 @@ class DashboardService:
             }
     
     @staticmethod
-    def get_overview_data() -> Dict[str, Any]:
+    def build_dashboard_data(user=None) -> Dict[str, Any]:
+        """
+        Calcula todas as secções do dashboard
+        
+        Args:
+            user: Usuário (por omissão o logado; o aquecimento do cache passa-o fora de requests)
+        """
+        from app.services.weather_data_service import WeatherDataService
+        
+        if user is None:
+            user = current_user
+        
+        # Alertas primeiro: a geração grava e invalidaria um snapshot já calculado
+        alerts = DashboardService.get_alerts_data(user.id)
+        
+        # Contadores numa consulta agregada; culturas com próxima atividade noutra
+        counters = DashboardService._query_counters(user.id)
+        
+        weather = None
+        try:
+            weather_result = WeatherDataService.get_weather_for_user(user)
+            if weather_result['success']:
+                weather = weather_result['data']
+            else:
+                logger.warning(f"Falha ao obter dados meteorológicos: {weather_result.get('message')}")
+        except Exception as e:
+            logger.error(f"Erro ao acessar serviço meteorológico: {e}")
+        
+        return {
+            'overview': DashboardService._format_overview(counters),
+            'alerts': alerts,
+            'alerts_count': counters['unread_alerts'],
+            'recent_activities': DashboardService.get_recent_activities(user.id),
+            'cultures': DashboardService.get_active_cultures(user.id),
+            'weather': weather
+        }
+    
+    @staticmethod
+    def get_overview_data(user_id: int = None) -> Dict[str, Any]:
         """Obtém dados de visão geral"""
         try:
-            if not current_user.is_authenticated:
-                return {}
-            
-            # Contar culturas ativas
-            active_cultures = Culture.query.filter_by(
-                user_id=current_user.id,
-                is_active=True
-            ).count()
-            
-            # Contar atividades pendentes
-            pending_activities = Activity.query.filter_by(
-                user_id=current_user.id,
-                status='pendente'
-            ).count()
-            
-            # Calcular área total
-            total_area = db.session.query(
-                db.func.sum(Culture.area_plantada)
-            ).filter_by(
-                user_id=current_user.id,
-                is_active=True
-            ).scalar() or 0
-            
-            return {
-                'active_cultures': active_cultures,
-                'total_area': float(total_area),
-                'monthly_production': 0,  # Placeholder
-                'projected_revenue': 0   # Placeholder
-            }
+            if user_id is None:
+                if not current_user.is_authenticated:
+                    return {}
+                user_id = current_user.id
             
+            counters = DashboardService._query_counters(user_id)
+            return DashboardService._format_overview(counters)
+        
         except Exception as e:
             logger.error(f"Erro ao obter dados de overview: {e}")
             return {
@@ -95,11 +114,13 @@ class DashboardService:
             }
     
     @staticmethod
-    def get_alerts_data() -> List[Dict[str, Any]]:
+    def get_alerts_data(user_id: int = None) -> List[Dict[str, Any]]:
         """Obtém dados de alertas"""
         try:
-            if not current_user.is_authenticated:
-                return []
+            if user_id is None:
+                if not current_user.is_authenticated:
+                    return []
+                user_id = current_user.id
             
             # Importar AlertService localmente para evitar import circular
             from app.services.alert_service import AlertService
@@ -107,10 +128,10 @@ class DashboardService:
             alert_service = AlertService()
             
             # Primeiro gerar alertas atualizados
-            alert_service.generate_all_alerts(current_user.id)
+            alert_service.generate_all_alerts(user_id)
             
             # Depois buscar alertas ativos
-            alerts = alert_service.get_active_alerts(current_user.id, limit=5)
+            alerts = alert_service.get_active_alerts(user_id, limit=5)
             
             alerts_data = []
             for alert in alerts:
@@ -127,7 +148,7 @@ class DashboardService:
                 })
             
             return alerts_data
-            
+        
         except Exception as e:
             logger.error(f"Erro ao obter alertas: {e}")
             import traceback
@@ -135,33 +156,32 @@ class DashboardService:
             return []
     
     @staticmethod
-    def get_unread_alerts_count() -> int:
+    def get_unread_alerts_count(user_id: int = None) -> int:
         """Conta alertas não lidos"""
         try:
-            if not current_user.is_authenticated:
-                return 0
-            
-            # Importar AlertService localmente para evitar import circular
-            from app.services.alert_service import AlertService
-            
-            alert_service = AlertService()
-            unread_alerts = alert_service.get_unread_alerts(current_user.id)
-            return len(unread_alerts)
+            if user_id is None:
+                if not current_user.is_authenticated:
+                    return 0
+                user_id = current_user.id
             
+            return DashboardService._query_counters(user_id)['unread_alerts']
+        
         except Exception as e:
             logger.error(f"Erro ao contar alertas: {e}")
             return 0
     
     @staticmethod
-    def get_recent_activities() -> List[Dict[str, Any]]:
+    def get_recent_activities(user_id: int = None) -> List[Dict[str, Any]]:
         """Obtém atividades recentes"""
         try:
-            if not current_user.is_authenticated:
-                return []
+            if user_id is None:
+                if not current_user.is_authenticated:
+                    return []
+                user_id = current_user.id
             
             # Últimas 5 atividades
             activities = Activity.query.filter_by(
-                user_id=current_user.id
+                user_id=user_id
             ).order_by(Activity.created_at.desc()).limit(5).all()
             
             return [{
@@ -170,59 +190,173 @@ class DashboardService:
                 'status': activity.status,
                 'created_at': activity.created_at.isoformat()
             } for activity in activities]
-            
+        
         except Exception as e:
             logger.error(f"Erro ao obter atividades recentes: {e}")
             return []
     
     @staticmethod
-    def get_active_cultures() -> List[Dict[str, Any]]:
+    def get_active_cultures(user_id: int = None) -> List[Dict[str, Any]]:
         """Obtém lista de culturas ativas do usuário"""
         try:
-            if not current_user.is_authenticated:
-                return []
-            
-            cultures = Culture.query.filter_by(
-                user_id=current_user.id,
-                is_active=True
-            ).order_by(Culture.created_at.desc()).all()
+            if user_id is None:
+                if not current_user.is_authenticated:
+                    return []
+                user_id = current_user.id
             
             cultures_data = []
-            for culture in cultures:
+            for row in DashboardService._query_cultures_with_next_activity(user_id):
                 # Formatear data de plantio se existir
                 data_plantio_formatted = None
-                if culture.data_plantio:
-                    data_plantio_formatted = culture.data_plantio.strftime('%d/%m/%Y')
+                if row.data_plantio:
+                    data_plantio_formatted = row.data_plantio.strftime('%d/%m/%Y')
                 
                 # Determinar status de saúde (placeholder - pode ser expandido)
                 health_status = 'healthy'  # Padrão
                 
-                # Buscar próxima atividade
-                next_activity = Activity.query.filter_by(
-                    user_id=current_user.id,
-                    culture_id=culture.id,
-                    status='pendente'
-                ).order_by(Activity.data_prevista.asc()).first()
-                
                 next_activity_data = None
-                if next_activity:
+                if row.next_activity_title:
                     next_activity_data = {
-                        'title': next_activity.titulo,
-                        'date': next_activity.data_prevista.strftime('%d/%m/%Y') if next_activity.data_prevista else None
+                        'title': row.next_activity_title,
+                        'date': row.next_activity_date.strftime('%d/%m/%Y') if row.next_activity_date else None
                     }
                 
                 cultures_data.append({
-                    'id': culture.id,
-                    'nome': culture.nome,
-                    'variedade': culture.variedade,
-                    'area_plantada': float(culture.area_plantada) if culture.area_plantada else 0,
+                    'id': row.id,
+                    'nome': row.nome,
+                    'variedade': row.variedade,
+                    'area_plantada': float(row.area_plantada) if row.area_plantada else 0,
                     'data_plantio_formatted': data_plantio_formatted,
                     'health_status': health_status,
                     'next_activity': next_activity_data
                 })
             
             return cultures_data
-            
+        
         except Exception as e:
             logger.error(f"Erro ao obter culturas ativas: {e}")
             return []
+    
+    @staticmethod
+    def _query_counters(user_id: int) -> Dict[str, Any]:
+        """
+        Contadores do dashboard numa única consulta agregada
+        
+        Cada tabela é agregada uma vez com somas condicionais (uma linha por
+        subconsulta) e as três linhas são combinadas no mesmo SELECT.
+        """
+        from app.models.alerts import Alert, AlertStatus
+        
+        culture_stats = db.select(
+            db.func.sum(db.case((Culture.is_active == True, 1), else_=0)).label('active_cultures'),
+            db.func.sum(db.case((Culture.is_active == True, Culture.area_plantada), else_=0)).label('total_area')
+        ).where(Culture.user_id == user_id).subquery()
+        
+        activity_stats = db.select(
+            db.func.sum(db.case((Activity.status == 'pendente', 1), else_=0)).label('pending_activities')
+        ).where(Activity.user_id == user_id).subquery()
+        
+        alert_stats = db.select(
+            db.func.sum(db.case(
+                (Alert.status.in_([AlertStatus.PENDING, AlertStatus.ACTIVE, AlertStatus.SENT]), 1),
+                else_=0
+            )).label('unread_alerts')
+        ).where(Alert.user_id == user_id).subquery()
+        
+        row = db.session.execute(db.select(
+            culture_stats.c.active_cultures,
+            culture_stats.c.total_area,
+            activity_stats.c.pending_activities,
+            alert_stats.c.unread_alerts
+        )).one()
+        
+        return {
+            'active_cultures': int(row.active_cultures or 0),
+            'total_area': float(row.total_area or 0),
+            'pending_activities': int(row.pending_activities or 0),
+            'unread_alerts': int(row.unread_alerts or 0)
+        }
+    
+    @staticmethod
+    def _format_overview(counters: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'active_cultures': counters['active_cultures'],
+            'total_area': counters['total_area'],
+            'pending_activities': counters['pending_activities'],
+            'monthly_production': 0,  # Placeholder
+            'projected_revenue': 0   # Placeholder
+        }
+    
+    @staticmethod
+    def _query_cultures_with_next_activity(user_id: int):
+        """
+        Culturas ativas com a próxima atividade pendente numa única consulta
+        
+        ROW_NUMBER() por cultura ordena as atividades pendentes pela data
+        prevista; o LEFT JOIN fica apenas com a primeira.
+        """
+        ranked = db.select(
+            Activity.culture_id,
+            Activity.titulo,
+            Activity.data_prevista,
+            db.func.row_number().over(
+                partition_by=Activity.culture_id,
+                order_by=(Activity.data_prevista.asc(), Activity.id.asc())
+            ).label('position')
+        ).where(
+            Activity.user_id == user_id,
+            Activity.status == 'pendente',
+            Activity.culture_id.isnot(None)
+        ).subquery()
+        
+        return db.session.execute(
+            db.select(
+                Culture.id,
+                Culture.nome,
+                Culture.variedade,
+                Culture.area_plantada,
+                Culture.data_plantio,
+                ranked.c.titulo.label('next_activity_title'),
+                ranked.c.data_prevista.label('next_activity_date')
+            ).select_from(Culture).outerjoin(
+                ranked,
+                db.and_(ranked.c.culture_id == Culture.id, ranked.c.position == 1)
+            ).where(
+                Culture.user_id == user_id,
+                Culture.is_active == True
+            ).order_by(Culture.created_at.desc())
+        ).all()
+    
+    @staticmethod
+    def get_section_versions(data: Dict[str, Any]) -> Dict[str, str]:
+        """Hash curto do conteúdo de cada secção do dashboard"""
+        versions = {}
+        for section in DashboardService.DASHBOARD_SECTIONS:
+            content = json.dumps(data.get(section), sort_keys=True, default=str, separators=(',', ':'))
+            versions[section] = hashlib.md5(content.encode()).hexdigest()[:8]
+        return versions
+    
+    @staticmethod
+    def get_data_version(data: Dict[str, Any]) -> str:
+        """
+        Versão dos dados do usuário
+        
+        Concatena os hashes das secções pela ordem de DASHBOARD_SECTIONS, para
+        que uma versão antiga enviada em ?since= indique que secções mudaram
+        sem guardar histórico no servidor.
+        """
+        versions = DashboardService.get_section_versions(data)
+        return '.'.join(versions[section] for section in DashboardService.DASHBOARD_SECTIONS)
+    
+    @staticmethod
+    def get_changed_sections(data: Dict[str, Any], since: str) -> List[str]:
+        """Secções alteradas desde a versão indicada (todas se a versão for inválida)"""
+        versions = DashboardService.get_section_versions(data)
+        previous = (since or '').split('.')
+        if len(previous) != len(DashboardService.DASHBOARD_SECTIONS):
+            return list(DashboardService.DASHBOARD_SECTIONS)
+        
+        return [
+            section for section, previous_version in zip(DashboardService.DASHBOARD_SECTIONS, previous)
+            if versions[section] != previous_version
+        ]
@@ -0,0 +1,264 @@
+"""
+Snapshot do dashboard por usuário
+Os dados calculados ficam no cache (Redis) ou, sem Redis, na tabela
+dashboard_snapshots, e são invalidados por eventos do SQLAlchemy após o
+commit de alterações que afetam o usuário
+"""
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional
+from flask import current_app
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from app import db
+from app.models.activity import Activity
+from app.models.alerts import Alert
+from app.models.culture import Culture
+from app.models.dashboard import DashboardSnapshot
+from app.models.user import User
+from app.models.weather import WeatherData
+
+logger = logging.getLogger(__name__)
+
+DIRTY_USERS_KEY = 'dashboard_dirty_users'
+WEATHER_POINTS_KEY = 'dashboard_weather_points'
+USER_LOCATION_FIELDS = ('cidade', 'latitude', 'longitude')
+COORD_TOLERANCE = 0.01
+
+
+class DashboardSnapshotStore:
+    """
+    Dados do dashboard já calculados por usuário
+    
+    Com Redis o snapshot fica numa chave por usuário; sem Redis fica na
+    tabela dashboard_snapshots para que todos os workers vejam a mesma
+    invalidação. O TTL limita snapshots que escapem à invalidação.
+    """
+    
+    KEY_PREFIX = 'dashboard:snapshot:'
+    
+    def __init__(self, ttl: int = 300):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+    
+    def _get_ttl(self) -> int:
+        try:
+            return current_app.config.get('DASHBOARD_SNAPSHOT_TTL', self.ttl)
+        except RuntimeError:
+            return self.ttl
+    
+    def _shared_client(self):
+        """Cliente Redis partilhado, ou None se apenas houver cache em memória"""
+        try:
+            from app.utils.cache import cache, InMemoryCache
+            client = cache.redis
+            if client is None or isinstance(client, InMemoryCache):
+                return None
+            return client
+        except Exception:
+            return None
+    
+    def get(self, user_id: int) -> Optional[Dict[str, Any]]:
+        """Snapshot válido do usuário ou None"""
+        data = None
+        try:
+            if self._shared_client() is not None:
+                from app.utils.cache import cache
+                data = cache.get(f"{self.KEY_PREFIX}{user_id}", local=False)
+            else:
+                snapshot = db.session.get(DashboardSnapshot, user_id)
+                expires_before = datetime.utcnow() - timedelta(seconds=self._get_ttl())
+                if snapshot and snapshot.created_at >= expires_before:
+                    data = snapshot.get_payload()
+        except Exception as e:
+            logger.warning(f"Erro ao ler snapshot do dashboard de {user_id}: {e}")
+            data = None
+        
+        if data is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return data
+    
+    def get_many(self, user_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        """Snapshots válidos de vários usuários (um MGET ou uma consulta)"""
+        user_ids = list(dict.fromkeys(user_ids))
+        snapshots = {}
+        if not user_ids:
+            return snapshots
+        
+        try:
+            if self._shared_client() is not None:
+                from app.utils.cache import cache
+                keys = {f"{self.KEY_PREFIX}{user_id}": user_id for user_id in user_ids}
+                found = cache.get_many(list(keys), local=False)
+                snapshots = {keys[key]: data for key, data in found.items()}
+            else:
+                expires_before = datetime.utcnow() - timedelta(seconds=self._get_ttl())
+                rows = DashboardSnapshot.query.filter(
+                    DashboardSnapshot.user_id.in_(user_ids),
+                    DashboardSnapshot.created_at >= expires_before
+                ).all()
+                snapshots = {row.user_id: row.get_payload() for row in rows}
+        except Exception as e:
+            logger.warning(f"Erro ao ler snapshots do dashboard: {e}")
+            snapshots = {}
+        
+        self.hits += len(snapshots)
+        self.misses += len(user_ids) - len(snapshots)
+        return snapshots
+    
+    def set(self, user_id: int, data: Dict[str, Any]):
+        """Guardar o snapshot do usuário"""
+        try:
+            if self._shared_client() is not None:
+                from app.utils.cache import cache
+                cache.set(f"{self.KEY_PREFIX}{user_id}", data, self._get_ttl(), local=False)
+            else:
+                # Conexão própria: não fazer commit nem rollback da sessão do pedido
+                table = DashboardSnapshot.__table__
+                with db.engine.begin() as connection:
+                    connection.execute(table.delete().where(table.c.user_id == user_id))
+                    connection.execute(table.insert().values(
+                        user_id=user_id,
+                        payload=json.dumps(data, default=str, separators=(',', ':')),
+                        created_at=datetime.utcnow()
+                    ))
+        except Exception as e:
+            logger.warning(f"Erro ao guardar snapshot do dashboard de {user_id}: {e}")
+    
+    def invalidate_users(self, user_ids: Iterable[int]):
+        """Remover os snapshots dos usuários indicados"""
+        user_ids = [user_id for user_id in set(user_ids) if user_id]
+        if not user_ids:
+            return
+        
+        try:
+            if self._shared_client() is not None:
+                from app.utils.cache import cache
+                cache.delete_many([f"{self.KEY_PREFIX}{user_id}" for user_id in user_ids])
+            else:
+                # Chamado após o commit: conexão própria, fora da sessão
+                with db.engine.begin() as connection:
+                    connection.execute(DashboardSnapshot.__table__.delete().where(
+                        DashboardSnapshot.user_id.in_(user_ids)
+                    ))
+            self.invalidations += len(user_ids)
+        except Exception as e:
+            logger.warning(f"Erro ao invalidar snapshots do dashboard: {e}")
+    
+    def invalidate_all(self) -> int:
+        """
+        Remover os snapshots de todos os usuários
+        
+        Returns:
+            Linhas removidas da tabela; no Redis a remoção corre em segundo plano (0)
+        """
+        removed = 0
+        try:
+            if self._shared_client() is not None:
+                from app.utils.cache import cache
+                cache.clear_pattern(f"{self.KEY_PREFIX}*")
+            else:
+                with db.engine.begin() as connection:
+                    removed = connection.execute(DashboardSnapshot.__table__.delete()).rowcount or 0
+            self.invalidations += removed
+        except Exception as e:
+            logger.warning(f"Erro ao invalidar todos os snapshots do dashboard: {e}")
+        return removed
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Estatísticas do snapshot"""
+        total = self.hits + self.misses
+        return {
+            'backend': 'redis' if self._shared_client() is not None else 'database',
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total * 100, 2) if total else 0,
+            'invalidations': self.invalidations
+        }
+
+
+# Instância global do snapshot do dashboard
+dashboard_snapshots = DashboardSnapshotStore()
+
+
+def _dirty_users(session: Session) -> set:
+    return session.info.setdefault(DIRTY_USERS_KEY, set())
+
+
+def _mark_owner(mapper, connection, target):
+    """Culturas, atividades e alertas: invalidar o dono"""
+    session = object_session(target)
+    if session is not None and target.user_id:
+        _dirty_users(session).add(target.user_id)
+
+
+def _mark_user_location(mapper, connection, target):
+    """Usuário: invalidar apenas quando a localização muda"""
+    state = inspect(target)
+    if any(state.attrs[field].history.has_changes() for field in USER_LOCATION_FIELDS):
+        session = object_session(target)
+        if session is not None:
+            _dirty_users(session).add(target.id)
+
+
+def _mark_weather_point(mapper, connection, target):
+    """Nova leitura atual: usuários da localização resolvidos no after_flush"""
+    session = object_session(target)
+    if session is not None and target.is_current:
+        session.info.setdefault(WEATHER_POINTS_KEY, []).append(
+            (target.latitude, target.longitude, target.location_name)
+        )
+
+
+for model in (Culture, Activity, Alert):
+    for event_name in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(model, event_name, _mark_owner)
+
+event.listen(User, 'after_update', _mark_user_location)
+event.listen(WeatherData, 'after_insert', _mark_weather_point)
+
+
+@event.listens_for(Session, 'after_flush')
+def _resolve_weather_users(session, flush_context):
+    """Usuários próximos das novas leituras (uma consulta por flush)"""
+    points = session.info.pop(WEATHER_POINTS_KEY, None)
+    if not points:
+        return
+    
+    conditions = []
+    for lat, lon, location_name in points:
+        if lat is not None and lon is not None:
+            conditions.append(db.and_(
+                User.latitude.between(lat - COORD_TOLERANCE, lat + COORD_TOLERANCE),
+                User.longitude.between(lon - COORD_TOLERANCE, lon + COORD_TOLERANCE)
+            ))
+        if location_name:
+            conditions.append(User.cidade == location_name)
+    
+    if not conditions:
+        return
+    
+    try:
+        rows = session.connection().execute(db.select(User.id).where(db.or_(*conditions))).all()
+        _dirty_users(session).update(row[0] for row in rows)
+    except Exception as e:
+        logger.warning(f"Erro ao resolver usuários das novas leituras: {e}")
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session):
+    user_ids = session.info.pop(DIRTY_USERS_KEY, None)
+    if user_ids:
+        dashboard_snapshots.invalidate_users(user_ids)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop(DIRTY_USERS_KEY, None)
+    session.info.pop(WEATHER_POINTS_KEY, None)
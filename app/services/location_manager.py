@@ -61,7 +61,8 @@ class LocationManager:
                 name=location_name,
                 latitude=user.latitude,
                 longitude=user.longitude,
-                country=user.estado or 'Portugal',
+                country='PT',
+                timezone=user.timezone or 'Europe/Lisbon',
                 is_active=True,
                 is_default=False  # Localizações de usuários não são padrão
             )
@@ -203,7 +204,7 @@ class LocationManager:
             WeatherLocation ou None
         """
         try:
-            user = User.query.get(user_id)
+            user = User.get_by_id(user_id)
             if not user:
                 return None
             
@@ -0,0 +1,195 @@
+"""
+Leitura em lote de dados climáticos armazenados
+
+Resolve várias localizações (ids ou coordenadas) e devolve leituras atuais
+e previsões com um número fixo de consultas, independente do número de
+localizações pedidas.
+"""
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+from flask import current_app
+from app import db
+from app.models.weather import WeatherData, WeatherLocation, WeatherForecast, WeatherSnapshot
+from app.services.weather_data_service import WeatherDataService
+
+logger = logging.getLogger(__name__)
+
+COORD_TOLERANCE = 0.01
+
+
+class WeatherBulkReader:
+    """Leitura de muitas localizações sem consultas por localização"""
+    
+    @staticmethod
+    def get_max_locations() -> int:
+        """Máximo de localizações por pedido"""
+        try:
+            return current_app.config.get('WEATHER_BULK_MAX_LOCATIONS', 100)
+        except RuntimeError:
+            return 100
+    
+    @staticmethod
+    def read(location_ids: List[int] = None, coordinates: List[Dict[str, float]] = None,
+             forecast_days: int = 5) -> Dict[str, any]:
+        """
+        Lê dados atuais e previsão de várias localizações
+        
+        Consultas: 1 para resolver localizações, 1 para snapshots e, só para
+        localizações sem snapshot, 1 para leituras atuais e 1 para previsões.
+        
+        Args:
+            location_ids: IDs de WeatherLocation
+            coordinates: Lista de {'lat': ..., 'lon': ...}
+            forecast_days: Dias de previsão por localização
+        
+        Returns:
+            Dict com um resultado por item pedido, na ordem do pedido
+        """
+        location_ids = [int(location_id) for location_id in (location_ids or [])]
+        coordinates = [(float(item['lat']), float(item['lon'])) for item in (coordinates or [])]
+        
+        requested = len(location_ids) + len(coordinates)
+        max_locations = WeatherBulkReader.get_max_locations()
+        if requested == 0:
+            raise ValueError("Indique location_ids ou coordinates")
+        if requested > max_locations:
+            raise ValueError(f"Máximo de {max_locations} localizações por pedido")
+        
+        locations = WeatherBulkReader._resolve_locations(location_ids, coordinates)
+        by_id = {location.id: location for location in locations}
+        
+        requests = [({'location_id': location_id}, by_id.get(location_id)) for location_id in location_ids]
+        for lat, lon in coordinates:
+            location = WeatherBulkReader._nearest_location(locations, lat, lon)
+            requests.append(({'lat': lat, 'lon': lon}, location))
+        
+        resolved = {location.id: location for _, location in requests if location}
+        payloads = WeatherBulkReader._load_payloads(list(resolved.values()), forecast_days)
+        
+        results = []
+        found = 0
+        for request_item, location in requests:
+            payload = payloads.get(location.id) if location else None
+            if payload:
+                found += 1
+                payload = dict(payload, forecast=(payload.get('forecast') or [])[:forecast_days])
+            results.append({
+                'request': request_item,
+                'location': WeatherBulkReader._location_info(location),
+                'success': payload is not None,
+                'data': payload,
+                'message': None if payload else (
+                    'Dados não encontrados' if location else 'Localização não encontrada'
+                )
+            })
+        
+        return {
+            'success': True,
+            'requested': requested,
+            'found': found,
+            'results': results
+        }
+    
+    @staticmethod
+    def _box_filter(model, lat: float, lon: float):
+        return db.and_(
+            model.latitude.between(lat - COORD_TOLERANCE, lat + COORD_TOLERANCE),
+            model.longitude.between(lon - COORD_TOLERANCE, lon + COORD_TOLERANCE)
+        )
+    
+    @staticmethod
+    def _resolve_locations(location_ids: List[int], coordinates: List[tuple]) -> List[WeatherLocation]:
+        """Uma consulta para todos os ids e caixas de coordenadas"""
+        conditions = []
+        if location_ids:
+            conditions.append(WeatherLocation.id.in_(set(location_ids)))
+        if coordinates:
+            conditions.append(db.and_(
+                WeatherLocation.is_active == True,
+                db.or_(*[WeatherBulkReader._box_filter(WeatherLocation, lat, lon) for lat, lon in coordinates])
+            ))
+        
+        return WeatherLocation.query.filter(db.or_(*conditions)).all()
+    
+    @staticmethod
+    def _nearest_location(locations: List[WeatherLocation], lat: float, lon: float) -> Optional[WeatherLocation]:
+        """Localização ativa mais próxima dentro da tolerância"""
+        candidates = [
+            location for location in locations
+            if location.is_active
+            and abs(location.latitude - lat) <= COORD_TOLERANCE
+            and abs(location.longitude - lon) <= COORD_TOLERANCE
+        ]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda location: (location.latitude - lat) ** 2 + (location.longitude - lon) ** 2)
+    
+    @staticmethod
+    def _load_payloads(locations: List[WeatherLocation], forecast_days: int) -> Dict[int, Dict[str, any]]:
+        """Respostas formatadas por localização (snapshots + fallback em lote)"""
+        if not locations:
+            return {}
+        
+        payloads = {}
+        snapshots = WeatherSnapshot.query.filter(
+            WeatherSnapshot.location_id.in_([location.id for location in locations])
+        ).all()
+        for snapshot in snapshots:
+            try:
+                payloads[snapshot.location_id] = snapshot.get_payload()
+            except ValueError as e:
+                logger.warning(f"Snapshot inválido para localização {snapshot.location_id}: {e}")
+        
+        missing = [location for location in locations if location.id not in payloads]
+        if not missing:
+            return payloads
+        
+        # Leituras atuais de todas as localizações sem snapshot numa consulta
+        current_rows = WeatherData.query.filter(
+            WeatherData.is_current == True,
+            db.or_(*[WeatherBulkReader._box_filter(WeatherData, location.latitude, location.longitude)
+                     for location in missing])
+        ).order_by(WeatherData.collected_at.desc()).all()
+        
+        latest = {}
+        for location in missing:
+            for row in current_rows:
+                if (abs(row.latitude - location.latitude) <= COORD_TOLERANCE
+                        and abs(row.longitude - location.longitude) <= COORD_TOLERANCE):
+                    latest[location.id] = row
+                    break
+        
+        if not latest:
+            return payloads
+        
+        # Previsões das mesmas localizações numa consulta
+        today = datetime.utcnow().date()
+        forecast_rows = WeatherForecast.query.filter(
+            WeatherForecast.location_id.in_(list(latest)),
+            WeatherForecast.target_date >= today
+        ).order_by(WeatherForecast.location_id, WeatherForecast.target_date.asc()).all()
+        
+        forecasts = {location_id: [] for location_id in latest}
+        for row in forecast_rows:
+            if len(forecasts[row.location_id]) < forecast_days:
+                forecasts[row.location_id].append(row)
+        
+        for location_id, weather_data in latest.items():
+            payloads[location_id] = WeatherDataService._format_weather_response(
+                weather_data,
+                forecasts[location_id]
+            )
+        
+        return payloads
+    
+    @staticmethod
+    def _location_info(location: Optional[WeatherLocation]) -> Optional[Dict[str, any]]:
+        if not location:
+            return None
+        return {
+            'id': location.id,
+            'name': location.name,
+            'latitude': location.latitude,
+            'longitude': location.longitude
+        }
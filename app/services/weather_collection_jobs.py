@@ -0,0 +1,257 @@
+"""
+Coleta forçada de dados climáticos em segundo plano
+Pedidos de coleta devolvem um identificador de job e o progresso é consultado por polling
+"""
+import uuid
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Optional
+from flask import Flask
+from app.services.weather_collector import WeatherCollectorService
+from app.services.cache_warmer import cache_warmer
+from app.utils.cache import cache, InMemoryCache
+
+logger = logging.getLogger(__name__)
+
+
+class WeatherCollectionJobManager:
+    """
+    Gestor de jobs de coleta forçada
+    
+    Apenas uma coleta forçada corre de cada vez: pedidos duplicados recebem o
+    job em curso. O estado dos jobs fica no cache (Redis quando configurado),
+    para que o polling funcione em qualquer worker.
+    
+    O registo do job guarda apenas os contadores; o estado de cada
+    localização fica numa chave própria, pelo que cada passo grava entradas
+    de tamanho constante. O lock de coleta ativa é renovado a cada
+    localização e expira pouco depois de um worker morrer a meio.
+    """
+    
+    JOB_KEY_PREFIX = 'weather:force_collect:job:'
+    ACTIVE_KEY = 'weather:force_collect:active'
+    JOB_TTL = 3600
+    ACTIVE_TIMEOUT = 120
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active_job_id = None
+    
+    def _shared_client(self):
+        """Cliente Redis para o lock de coleta ativa, ou None em modo memória"""
+        try:
+            client = cache.redis
+            if client is None or isinstance(client, InMemoryCache):
+                return None
+            return client
+        except Exception:
+            return None
+    
+    def start(self, app: Flask, priority_location_id: int = None, requested_by: int = None) -> Dict[str, any]:
+        """
+        Inicia uma coleta forçada ou devolve a que já está em curso
+        
+        Args:
+            app: Instância Flask (o job corre noutra thread)
+            priority_location_id: Localização coletada primeiro
+            requested_by: ID do usuário que pediu a coleta
+        
+        Returns:
+            Dict com o estado do job e se foi reaproveitado
+        """
+        job_id = uuid.uuid4().hex
+        
+        with self._lock:
+            if self._active_job_id:
+                active_job = self.get_job(self._active_job_id)
+                if active_job and active_job['status'] in ('queued', 'running'):
+                    return {'job': active_job, 'coalesced': True}
+                self._active_job_id = None
+            
+            client = self._shared_client()
+            if client is not None:
+                try:
+                    if not client.set(self.ACTIVE_KEY, job_id, nx=True, ex=self.ACTIVE_TIMEOUT):
+                        active_id = client.get(self.ACTIVE_KEY)
+                        active_id = active_id.decode() if isinstance(active_id, bytes) else active_id
+                        active_job = self.get_job(active_id) if active_id else None
+                        if active_job:
+                            return {'job': active_job, 'coalesced': True}
+                        client.set(self.ACTIVE_KEY, job_id, ex=self.ACTIVE_TIMEOUT)
+                except Exception as e:
+                    logger.warning(f"Lock partilhado de coleta indisponível: {e}")
+            
+            job = self._new_job(job_id, priority_location_id, requested_by)
+            self._save(job)
+            self._active_job_id = job_id
+        
+        thread = threading.Thread(
+            target=self._run,
+            args=(app, job_id, priority_location_id),
+            name=f'weather-force-collect-{job_id[:8]}',
+            daemon=True
+        )
+        thread.start()
+        
+        logger.info(f"Coleta forçada iniciada em segundo plano (job {job_id})")
+        return {'job': job, 'coalesced': False}
+    
+    @staticmethod
+    def _new_job(job_id: str, priority_location_id: int = None, requested_by: int = None) -> Dict[str, any]:
+        """Registo inicial de um job"""
+        return {
+            'job_id': job_id,
+            'status': 'queued',
+            'requested_by': requested_by,
+            'priority_location_id': priority_location_id,
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'started_at': None,
+            'finished_at': None,
+            'locations_total': 0,
+            'locations_processed': 0,
+            'locations_failed': 0,
+            'priority_location_done': priority_location_id is None,
+            'errors': []
+        }
+    
+    def get_job(self, job_id: str) -> Optional[Dict[str, any]]:
+        """
+        Obtém o estado de um job, com o estado de cada localização
+        
+        Args:
+            job_id: Identificador do job
+        """
+        job = self._load(job_id)
+        if not job:
+            return job
+        
+        # Estados por localização: um único MGET
+        keys = [self._location_key(job_id, index) for index in range(job['locations_total'])]
+        found = cache.get_many(keys, local=False) if keys else {}
+        job['locations'] = [found[key] for key in keys if key in found]
+        job['errors'] = [
+            f"Falha na coleta para {location['name']}"
+            for location in job['locations'] if location['status'] == 'failed'
+        ] + job['errors']
+        return job
+    
+    def _load(self, job_id: str) -> Optional[Dict[str, any]]:
+        """Registo do job (apenas contadores)"""
+        return cache.get(f"{self.JOB_KEY_PREFIX}{job_id}", local=False)
+    
+    def _location_key(self, job_id: str, index: int) -> str:
+        return f"{self.JOB_KEY_PREFIX}{job_id}:location:{index}"
+    
+    def _save(self, job: Dict[str, any]):
+        cache.set(f"{self.JOB_KEY_PREFIX}{job['job_id']}", job, self.JOB_TTL, local=False)
+    
+    def _save_location(self, job_id: str, index: int, location: Dict[str, any]):
+        cache.set(self._location_key(job_id, index), location, self.JOB_TTL, local=False)
+    
+    def _renew(self, job_id: str):
+        """Prolongar o lock de coleta ativa enquanto o job avança"""
+        client = self._shared_client()
+        if client is None:
+            return
+        try:
+            active_id = client.get(self.ACTIVE_KEY)
+            active_id = active_id.decode() if isinstance(active_id, bytes) else active_id
+            if active_id == job_id:
+                client.expire(self.ACTIVE_KEY, self.ACTIVE_TIMEOUT)
+        except Exception as e:
+            logger.warning(f"Erro ao renovar lock de coleta: {e}")
+    
+    def _run(self, app: Flask, job_id: str, priority_location_id: int = None):
+        """Executa a coleta, atualizando o progresso por localização"""
+        try:
+            with app.app_context():
+                job = self._load(job_id)
+                if job is None:
+                    # Registo perdido (gravação falhada, erro do Redis ou removido do L1)
+                    logger.warning(f"Registo do job de coleta {job_id} não encontrado; recriado")
+                    job = self._new_job(job_id, priority_location_id)
+                
+                try:
+                    locations = WeatherCollectorService.get_collection_targets(priority_location_id)
+                    
+                    entries = [
+                        {'id': location.id, 'name': location.name, 'status': 'pending'}
+                        for location in locations
+                    ]
+                    cache.set_many({
+                        self._location_key(job_id, index): entry for index, entry in enumerate(entries)
+                    }, self.JOB_TTL, local=False)
+                    
+                    job['status'] = 'running'
+                    job['started_at'] = datetime.now(timezone.utc).isoformat()
+                    job['locations_total'] = len(locations)
+                    self._save(job)
+                    
+                    for index, location in enumerate(locations):
+                        entry = entries[index]
+                        entry['status'] = 'running'
+                        self._save_location(job_id, index, entry)
+                        
+                        try:
+                            success = WeatherCollectorService.collect_location_data(location)
+                        except Exception as e:
+                            success = False
+                            logger.error(f"Erro ao processar {location.name}: {e}")
+                        
+                        if success:
+                            job['locations_processed'] += 1
+                            entry['status'] = 'done'
+                        else:
+                            job['locations_failed'] += 1
+                            entry['status'] = 'failed'
+                        self._save_location(job_id, index, entry)
+                        
+                        if location.id == priority_location_id:
+                            job['priority_location_done'] = True
+                        self._save(job)
+                        self._renew(job_id)
+                    
+                    if job['locations_processed'] > 0:
+                        WeatherCollectorService.update_statistics()
+                        cache_warmer.warm_async(app, 'weather_collection')
+                    
+                    job['status'] = 'completed'
+                    job['priority_location_done'] = True
+                
+                except Exception as e:
+                    job['status'] = 'failed'
+                    job['errors'].append(f"Erro geral na coleta: {str(e)}")
+                    logger.error(f"Erro na coleta forçada (job {job_id}): {e}")
+                
+                finally:
+                    job['finished_at'] = datetime.now(timezone.utc).isoformat()
+                    self._save(job)
+                
+                logger.info(
+                    f"Coleta forçada {job_id} terminada: {job['locations_processed']} processadas, "
+                    f"{job['locations_failed']} com falha"
+                )
+        
+        finally:
+            # Sempre libertar o lock de coleta ativa, mesmo sem registo do job
+            self._release(job_id)
+    
+    def _release(self, job_id: str):
+        with self._lock:
+            if self._active_job_id == job_id:
+                self._active_job_id = None
+        
+        client = self._shared_client()
+        if client is not None:
+            try:
+                active_id = client.get(self.ACTIVE_KEY)
+                active_id = active_id.decode() if isinstance(active_id, bytes) else active_id
+                if active_id == job_id:
+                    client.delete(self.ACTIVE_KEY)
+            except Exception as e:
+                logger.warning(f"Erro ao libertar lock de coleta: {e}")
+
+
+# Instância global do gestor de jobs
+weather_collection_jobs = WeatherCollectionJobManager()
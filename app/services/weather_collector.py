@@ -2,14 +2,17 @@
 Serviço de Coleta de Dados Climáticos
 Sistema automatizado para buscar e armazenar dados meteorológicos
 """
-import requests
 import logging
 from datetime import datetime, timezone, timedelta
 from typing import Dict, List, Optional, Tuple
 from flask import current_app
 from app import db
-from app.models.weather import WeatherData, WeatherLocation, WeatherStats
+from app.models.weather import WeatherData, WeatherLocation, WeatherStats, WeatherForecast
 from app.services.location_manager import LocationManager
+from app.utils.api_integration import weather_fetch_layer
+from app.services.weather_read_cache import weather_read_cache
+from app.services.weather_data_service import WeatherDataService
+from app.services.cache_warmer import cache_warmer
 
 logger = logging.getLogger(__name__)
 
@@ -38,14 +41,7 @@ class WeatherCollectorService:
         }
         
         try:
-            # Sincronizar localizações dos usuários antes da coleta
-            try:
-                LocationManager.sync_all_users()
-            except Exception as e:
-                logger.warning(f"Erro na sincronização de localizações: {e}")
-            
-            # Obter todas as localizações ativas da tabela
-            locations = WeatherLocation.query.filter_by(is_active=True).all()
+            locations = WeatherCollectorService.get_collection_targets()
             
             if not locations:
                 logger.warning("Nenhuma localização ativa encontrada")
@@ -67,9 +63,10 @@ class WeatherCollectorService:
                     results['errors'].append(error_msg)
                     logger.error(error_msg)
             
-            # Atualizar estatísticas se houve coletas bem-sucedidas
+            # Atualizar estatísticas e reaquecer o cache se houve coletas bem-sucedidas
             if results['locations_processed'] > 0:
                 WeatherCollectorService.update_statistics()
+                cache_warmer.warm_async(current_app._get_current_object(), 'weather_collection')
                 
         except Exception as e:
             results['success'] = False
@@ -78,6 +75,31 @@ class WeatherCollectorService:
         
         return results
     
+    @staticmethod
+    def get_collection_targets(priority_location_id: int = None) -> List[WeatherLocation]:
+        """
+        Sincroniza localizações dos usuários e devolve as localizações ativas
+        
+        Args:
+            priority_location_id: Localização a coletar primeiro (ex: a do usuário que pediu a coleta)
+            
+        Returns:
+            Lista de localizações ativas, com a prioritária no início
+        """
+        # Sincronizar localizações dos usuários antes da coleta
+        try:
+            LocationManager.sync_all_users()
+        except Exception as e:
+            logger.warning(f"Erro na sincronização de localizações: {e}")
+        
+        # Obter todas as localizações ativas da tabela
+        locations = WeatherLocation.query.filter_by(is_active=True).all()
+        
+        if priority_location_id is not None:
+            locations.sort(key=lambda location: location.id != priority_location_id)
+        
+        return locations
+    
     @staticmethod
     def collect_location_data(location: WeatherLocation) -> bool:
         """
@@ -116,20 +138,37 @@ class WeatherCollectorService:
             # Marcar registros anteriores como não-atuais
             WeatherCollectorService._mark_previous_as_old(location)
             
-            # Criar novo registro
+            # Criar novo registro (previsão fica na tabela weather_forecasts)
             weather_record = WeatherData.create_from_api_data(
                 current_data,
                 {
                     'name': location.name,
                     'latitude': location.latitude,
                     'longitude': location.longitude
-                },
-                forecast_data
+                }
             )
             
             db.session.add(weather_record)
+            
+            if forecast_data:
+                WeatherForecast.replace_for_location(
+                    location.id,
+                    forecast_data,
+                    weather_record.collected_at
+                )
+            
             db.session.commit()
             
+            # Resposta formatada pré-calculada (falha não invalida a coleta)
+            try:
+                WeatherDataService.build_location_snapshot(location)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logger.warning(f"Erro ao gerar snapshot para {location.name}: {e}")
+            
+            weather_read_cache.invalidate()
+            
             logger.info(f"Dados salvos para {location.name}: {weather_record.temperature}°C")
             return True
             
@@ -152,19 +191,11 @@ class WeatherCollectorService:
             Dict com dados da API ou None se falhou
         """
         try:
-            url = f"https://api.openweathermap.org/data/2.5/weather"
-            params = {
-                'lat': lat,
-                'lon': lon,
-                'appid': api_key,
-                'units': 'metric',
-                'lang': 'pt'
-            }
-            
-            response = requests.get(url, params=params, timeout=30)
-            response.raise_for_status()
+            # Camada de busca: cache por coordenadas, coalescência e orçamento de quota
+            data = weather_fetch_layer.fetch_current(lat, lon, api_key)
             
-            data = response.json()
+            if not data:
+                return None
             
             # Validar estrutura básica
             if not data.get('main') or not data.get('weather'):
@@ -173,9 +204,6 @@ class WeatherCollectorService:
             
             return data
             
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Erro na requisição da API: {e}")
-            return None
         except Exception as e:
             logger.error(f"Erro ao processar dados da API: {e}")
             return None
@@ -194,46 +222,39 @@ class WeatherCollectorService:
             List com dados de previsão ou None
         """
         try:
-            url = f"https://api.openweathermap.org/data/2.5/forecast"
-            params = {
-                'lat': lat,
-                'lon': lon,
-                'appid': api_key,
-                'units': 'metric',
-                'lang': 'pt'
-            }
-            
-            response = requests.get(url, params=params, timeout=30)
-            response.raise_for_status()
+            data = weather_fetch_layer.fetch_forecast(lat, lon, api_key)
             
-            data = response.json()
-            
-            if not data.get('list'):
+            if not data or not data.get('list'):
                 return None
             
-            # Processar previsão para próximos 5 dias (pegar 1 registro por dia ao meio-dia)
-            forecast_list = []
-            processed_dates = set()
+            # Processar previsão para próximos 5 dias (1 registro por dia,
+            # com mínima/máxima de todos os intervalos de 3h do dia)
+            forecast_by_date = {}
             
             for item in data['list']:
                 # Obter data do item
                 dt = datetime.fromtimestamp(item['dt'], tz=timezone.utc)
-                date_str = dt.strftime('%Y-%m-%d')
+                day = dt.date()
                 
-                # Pegar apenas 1 registro por dia (preferencialmente meio-dia)
-                if date_str not in processed_dates and len(forecast_list) < 5:
-                    forecast_list.append({
-                        'date': dt.isoformat(),
+                if day not in forecast_by_date:
+                    if len(forecast_by_date) >= 5:
+                        break
+                    forecast_by_date[day] = {
+                        'date': day.isoformat(),
                         'condition': item['weather'][0]['description'],
                         'temp_max': item['main']['temp_max'],
                         'temp_min': item['main']['temp_min'],
                         'humidity': item['main']['humidity'],
                         'pressure': item['main']['pressure'],
                         'wind_speed': item.get('wind', {}).get('speed', 0)
-                    })
-                    processed_dates.add(date_str)
+                    }
+                else:
+                    day_data = forecast_by_date[day]
+                    day_data['temp_max'] = max(day_data['temp_max'], item['main']['temp_max'])
+                    day_data['temp_min'] = min(day_data['temp_min'], item['main']['temp_min'])
+                    day_data['wind_speed'] = max(day_data['wind_speed'], item.get('wind', {}).get('speed', 0))
             
-            return forecast_list
+            return list(forecast_by_date.values())
             
         except Exception as e:
             logger.error(f"Erro ao buscar previsão: {e}")
@@ -372,12 +393,10 @@ class WeatherCollectorService:
             Dict com informações de status
         """
         try:
-            # Obter registro mais recente
-            latest_record = WeatherData.query.filter_by(
-                is_current=True
-            ).order_by(WeatherData.collected_at.desc()).first()
+            # Resumo dos registros atuais (em cache até a próxima coleta)
+            snapshot = WeatherDataService.get_current_snapshot()
             
-            if not latest_record:
+            if not snapshot:
                 return {
                     'status': 'no_data',
                     'message': 'Nenhum dado coletado ainda',
@@ -386,12 +405,7 @@ class WeatherCollectorService:
             
             # Verificar se dados estão atualizados (menos de 2 horas)
             now = datetime.now(timezone.utc)
-            
-            # Garantir que collected_at seja timezone aware
-            if latest_record.collected_at.tzinfo is None:
-                collected_at = latest_record.collected_at.replace(tzinfo=timezone.utc)
-            else:
-                collected_at = latest_record.collected_at
+            collected_at = snapshot['collected_at']
             
             time_diff = now - collected_at
             
@@ -405,9 +419,9 @@ class WeatherCollectorService:
             return {
                 'status': status,
                 'message': message,
-                'last_collection': latest_record.collected_at.isoformat(),
-                'locations_with_data': WeatherData.query.filter_by(is_current=True).count(),
-                'data_quality': latest_record.data_quality
+                'last_collection': collected_at.isoformat(),
+                'locations_with_data': snapshot['current_count'],
+                'data_quality': snapshot['data_quality']
             }
             
         except Exception as e:
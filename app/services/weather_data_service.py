@@ -6,7 +6,11 @@ Foca apenas na consulta do banco de dados local
 import logging
 from datetime import datetime, timezone, timedelta
 from typing import Dict, List, Optional, Tuple
-from app.models.weather import WeatherData, WeatherLocation, WeatherStats
+from app import db
+from app.models.weather import WeatherData, WeatherLocation, WeatherStats, WeatherForecast, WeatherSnapshot
+from app.services.weather_history_store import WeatherHistoryStore
+from app.services.weather_read_cache import weather_read_cache
+from app.utils.request_memo import request_memo
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +22,9 @@ class WeatherDataService:
     Não faz chamadas para APIs externas
     """
     
+    HISTORY_BUCKETS = ('hour', 'day', 'week')
+    HISTORY_METRICS = ('temperature', 'humidity', 'pressure', 'wind_speed')
+    
     @staticmethod
     def get_current_weather(location_name: str = None, lat: float = None, lon: float = None) -> Dict[str, any]:
         """
@@ -32,8 +39,15 @@ class WeatherDataService:
             Dict com dados climáticos ou dados padrão se não encontrado
         """
         try:
+            # Respostas em cache até a próxima gravação do coletor
+            cache_key = WeatherDataService._current_cache_key(location_name, lat, lon)
+            cached_response = weather_read_cache.get(cache_key)
+            if cached_response is not None:
+                return cached_response
+            
             # Estratégia de busca em cascata
             weather_data = None
+            location = None
             
             if location_name:
                 # 1. Buscar por nome da localização primeiro
@@ -44,6 +58,12 @@ class WeatherDataService:
                 ).first()
                 
                 if location:
+                    # Resposta pré-calculada após a última coleta
+                    response = WeatherDataService._snapshot_response(location)
+                    if response:
+                        weather_read_cache.set(cache_key, response, location.id)
+                        return response
+                    
                     # Buscar dados climáticos para essa localização
                     weather_data = WeatherData.query.filter(
                         WeatherData.latitude.between(location.latitude - 0.01, location.latitude + 0.01),
@@ -62,6 +82,18 @@ class WeatherDataService:
                     logger.info(f"Dados encontrados via busca direta: {weather_data is not None}")
             
             elif lat is not None and lon is not None:
+                # Localização coletada nas coordenadas com resposta pré-calculada
+                location = WeatherLocation.query.filter(
+                    WeatherLocation.latitude.between(lat - 0.01, lat + 0.01),
+                    WeatherLocation.longitude.between(lon - 0.01, lon + 0.01),
+                    WeatherLocation.is_active == True
+                ).first()
+                if location:
+                    response = WeatherDataService._snapshot_response(location)
+                    if response:
+                        weather_read_cache.set(cache_key, response, location.id)
+                        return response
+                
                 # 1. Buscar por coordenadas exatas primeiro
                 logger.info(f"Buscando por coordenadas exatas: {lat}, {lon}")
                 weather_data = WeatherData.query.filter(
@@ -78,11 +110,14 @@ class WeatherDataService:
             
             if weather_data:
                 logger.info(f"Dados climáticos encontrados: {weather_data.location_name}, {weather_data.temperature}°C")
-                formatted_data = WeatherDataService._format_weather_response(weather_data)
-                return {
+                forecast_rows = WeatherForecast.get_for_location(location.id) if location else None
+                formatted_data = WeatherDataService._format_weather_response(weather_data, forecast_rows)
+                response = {
                     'success': True,
                     'data': formatted_data
                 }
+                weather_read_cache.set(cache_key, response, location.id if location else None)
+                return response
             else:
                 logger.warning(f"Nenhum dado climático encontrado para {location_name or 'coordenadas fornecidas'}")
                 default_data = WeatherDataService._get_default_weather()
@@ -101,6 +136,85 @@ class WeatherDataService:
                 'error': str(e)
             }
     
+    @staticmethod
+    def get_weather_for_user(user) -> Dict[str, any]:
+        """
+        Obtém dados climáticos atuais para a localização de um usuário
+        
+        A resposta da localização vem do snapshot/cache partilhado; por cima
+        aplica-se apenas a camada do usuário.
+        
+        Args:
+            user: Usuário (cidade ou coordenadas)
+            
+        Returns:
+            Dict no formato de get_current_weather
+        """
+        location_name = None
+        lat = None
+        lon = None
+        
+        if user.cidade:
+            location_name = user.cidade
+        elif user.latitude and user.longitude:
+            lat = user.latitude
+            lon = user.longitude
+        
+        result = WeatherDataService.get_current_weather(
+            location_name=location_name,
+            lat=lat,
+            lon=lon
+        )
+        
+        if result.get('success') and result.get('data'):
+            result['data']['user_location'] = {
+                'city': user.cidade,
+                'latitude': user.latitude,
+                'longitude': user.longitude
+            }
+        
+        return result
+    
+    @staticmethod
+    def build_location_snapshot(location: WeatherLocation) -> Optional[WeatherSnapshot]:
+        """
+        Pré-calcula a resposta formatada (atual + previsão) de uma localização (sem commit)
+        
+        Chamado após cada coleta; pedidos de usuários na mesma localização
+        passam a ler o snapshot em vez de reformatar os registros.
+        
+        Args:
+            location: Localização coletada
+            
+        Returns:
+            Snapshot gravado ou None se não houver dados atuais
+        """
+        weather_data = WeatherData.query.filter(
+            WeatherData.latitude.between(location.latitude - 0.01, location.latitude + 0.01),
+            WeatherData.longitude.between(location.longitude - 0.01, location.longitude + 0.01),
+            WeatherData.is_current == True
+        ).order_by(WeatherData.collected_at.desc()).first()
+        
+        if not weather_data:
+            return None
+        
+        forecast_rows = WeatherForecast.get_for_location(location.id)
+        formatted_data = WeatherDataService._format_weather_response(weather_data, forecast_rows)
+        
+        return WeatherSnapshot.store(location.id, weather_data.collected_at, formatted_data)
+    
+    @staticmethod
+    def _snapshot_response(location: WeatherLocation) -> Optional[Dict[str, any]]:
+        """Resposta de get_current_weather a partir do snapshot da localização"""
+        snapshot = WeatherSnapshot.get_for_location(location.id)
+        if not snapshot:
+            return None
+        
+        return {
+            'success': True,
+            'data': snapshot.get_payload()
+        }
+    
     @staticmethod
     def get_weather_forecast(location_name: str = None, days: int = 5) -> List[Dict[str, any]]:
         """
@@ -114,35 +228,16 @@ class WeatherDataService:
             Lista com previsão dos próximos dias
         """
         try:
-            # Encontrar localização
-            location = None
-            if location_name:
-                location = WeatherLocation.query.filter(
-                    WeatherLocation.name.ilike(f'%{location_name}%'),
-                    WeatherLocation.is_active == True
-                ).first()
-            
-            if not location:
-                # Usar primeira localização ativa
-                location = WeatherLocation.query.filter_by(is_active=True).first()
+            # Encontrar localização (ou a primeira ativa)
+            location = WeatherDataService.find_location(location_name=location_name)
             
             if not location:
                 return []
             
-            # Buscar dados de previsão mais recentes
-            weather_data = WeatherData.get_current_for_location(
-                location.latitude, 
-                location.longitude
-            )
+            # Buscar previsão normalizada da localização
+            forecasts = WeatherForecast.get_for_location(location.id, days)
             
-            if weather_data and weather_data.forecast_data:
-                forecast_list = weather_data.forecast_data
-                
-                # Limitar ao número de dias solicitado
-                if isinstance(forecast_list, list):
-                    return forecast_list[:days]
-            
-            return []
+            return [forecast.to_dict() for forecast in forecasts]
             
         except Exception as e:
             logger.error(f"Erro ao obter previsão: {e}")
@@ -161,16 +256,8 @@ class WeatherDataService:
             Lista com dados históricos
         """
         try:
-            # Encontrar localização
-            location = None
-            if location_name:
-                location = WeatherLocation.query.filter(
-                    WeatherLocation.name.ilike(f'%{location_name}%'),
-                    WeatherLocation.is_active == True
-                ).first()
-            
-            if not location:
-                location = WeatherLocation.query.filter_by(is_active=True).first()
+            # Encontrar localização (ou a primeira ativa)
+            location = WeatherDataService.find_location(location_name=location_name)
             
             if not location:
                 return []
@@ -179,18 +266,30 @@ class WeatherDataService:
             end_date = datetime.now(timezone.utc)
             start_date = end_date - timedelta(days=days)
             
-            # Buscar dados históricos
-            history_data = WeatherData.get_history_for_location(
-                location.latitude,
-                location.longitude,
-                start_date,
-                end_date
-            )
+            # Camada bruta: leituras horárias recentes
+            history_data = WeatherData.query.filter(
+                WeatherData.latitude.between(location.latitude - 0.01, location.latitude + 0.01),
+                WeatherData.longitude.between(location.longitude - 0.01, location.longitude + 0.01),
+                WeatherData.collected_at >= start_date,
+                WeatherData.collected_at <= end_date
+            ).order_by(WeatherData.collected_at.desc()).all()
             
             # Formatar resposta
             formatted_history = []
             for record in history_data:
-                formatted_history.append(WeatherDataService._format_weather_response(record))
+                formatted_record = WeatherDataService._format_weather_response(record, include_forecast=False)
+                formatted_record['resolution'] = 'raw'
+                formatted_history.append(formatted_record)
+            
+            # Camada de arquivo: agregados diários anteriores à retenção bruta
+            raw_start = history_data[-1].collected_at.date() if history_data else end_date.date()
+            archived_days = WeatherHistoryStore.get_archived_days(
+                location,
+                start_date.date(),
+                raw_start - timedelta(days=1)
+            )
+            for day in reversed(archived_days):
+                formatted_history.append(WeatherHistoryStore.format_archived_day(location, day))
             
             return formatted_history
             
@@ -198,6 +297,202 @@ class WeatherDataService:
             logger.error(f"Erro ao obter histórico: {e}")
             return []
     
+    @staticmethod
+    @request_memo()
+    def find_location(location_id: int = None, location_name: str = None,
+                      lat: float = None, lon: float = None,
+                      fallback: bool = True) -> Optional[WeatherLocation]:
+        """
+        Resolve uma localização por id, nome ou coordenadas
+        
+        Args:
+            fallback: Usar a primeira localização ativa quando nome/coordenadas
+                      não correspondem (False para localizações pedidas explicitamente)
+        
+        Returns:
+            WeatherLocation, a primeira localização ativa ou None
+        """
+        location = None
+        if location_id:
+            location = db.session.get(WeatherLocation, location_id)
+        elif location_name:
+            location = WeatherLocation.query.filter(
+                WeatherLocation.name.ilike(f'%{location_name}%'),
+                WeatherLocation.is_active == True
+            ).first()
+        elif lat is not None and lon is not None:
+            location = WeatherLocation.query.filter(
+                WeatherLocation.latitude.between(lat - 0.01, lat + 0.01),
+                WeatherLocation.longitude.between(lon - 0.01, lon + 0.01),
+                WeatherLocation.is_active == True
+            ).first()
+        
+        if not location and not location_id and fallback:
+            location = WeatherLocation.query.filter_by(is_active=True).first()
+        
+        return location
+    
+    @staticmethod
+    def get_last_collection_time(location: WeatherLocation) -> Optional[datetime]:
+        """Momento da coleta mais recente de uma localização"""
+        collected_at = db.session.query(db.func.max(WeatherData.collected_at)).filter(
+            *WeatherHistoryStore._location_filter(location)
+        ).scalar()
+        
+        if isinstance(collected_at, str):
+            collected_at = datetime.fromisoformat(collected_at)
+        if collected_at and collected_at.tzinfo is None:
+            collected_at = collected_at.replace(tzinfo=timezone.utc)
+        return collected_at
+    
+    @staticmethod
+    def get_history_window(days: int, bucket: str) -> Tuple[datetime, datetime]:
+        """Janela do histórico alinhada ao início do bucket"""
+        end_date = datetime.now(timezone.utc)
+        start_date = end_date - timedelta(days=days)
+        
+        if bucket == 'hour':
+            start_date = start_date.replace(minute=0, second=0, microsecond=0)
+        else:
+            start_date = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
+            if bucket == 'week':
+                start_date -= timedelta(days=start_date.weekday())
+        
+        return start_date, end_date
+    
+    @staticmethod
+    def get_history_aggregates(location: WeatherLocation, days: int = 7, bucket: str = 'day') -> Dict[str, any]:
+        """
+        Histórico agregado no servidor por hora, dia ou semana
+        
+        Leituras brutas são agrupadas com GROUP BY (mín/média/máx por métrica);
+        dias já compactados no arquivo completam os buckets diários e semanais.
+        
+        Args:
+            location: Localização
+            days: Dias de histórico
+            bucket: 'hour', 'day' ou 'week'
+            
+        Returns:
+            Dict com a janela e a lista de buckets ordenada
+        """
+        if bucket not in WeatherDataService.HISTORY_BUCKETS:
+            raise ValueError(f"Bucket inválido: {bucket}")
+        
+        start_date, end_date = WeatherDataService.get_history_window(days, bucket)
+        bucket_column = WeatherDataService._bucket_expression(bucket).label('bucket')
+        
+        columns = [bucket_column, db.func.count(WeatherData.id).label('readings')]
+        for metric in WeatherDataService.HISTORY_METRICS:
+            column = getattr(WeatherData, metric)
+            columns.extend([db.func.min(column), db.func.avg(column), db.func.max(column)])
+        
+        rows = db.session.query(*columns).filter(
+            *WeatherHistoryStore._location_filter(location),
+            WeatherData.collected_at >= start_date,
+            WeatherData.collected_at <= end_date
+        ).group_by(bucket_column).order_by(bucket_column).all()
+        
+        buckets = {}
+        for row in rows:
+            key = WeatherDataService._bucket_key(row[0], bucket)
+            entry = {'bucket_start': key, 'readings': row[1], 'source': 'raw'}
+            for index, metric in enumerate(WeatherDataService.HISTORY_METRICS):
+                values = row[2 + index * 3:5 + index * 3]
+                entry[metric] = {
+                    'min': WeatherDataService._round(values[0]),
+                    'avg': WeatherDataService._round(values[1]),
+                    'max': WeatherDataService._round(values[2])
+                }
+            buckets[key] = entry
+        
+        # Dias anteriores às leituras brutas vêm do arquivo compactado
+        if bucket != 'hour':
+            raw_start = db.session.query(db.func.min(WeatherData.collected_at)).filter(
+                *WeatherHistoryStore._location_filter(location),
+                WeatherData.collected_at >= start_date
+            ).scalar()
+            if isinstance(raw_start, str):
+                raw_start = datetime.fromisoformat(raw_start)
+            raw_start_date = raw_start.date() if raw_start else end_date.date() + timedelta(days=1)
+            archived_days = WeatherHistoryStore.get_archived_days(
+                location,
+                start_date.date(),
+                raw_start_date - timedelta(days=1)
+            )
+            for day in archived_days:
+                day_start = day['date'] - timedelta(days=day['date'].weekday() if bucket == 'week' else 0)
+                WeatherDataService._merge_archived_day(buckets, day_start.isoformat(), day)
+        
+        return {
+            'bucket': bucket,
+            'start': start_date.isoformat(),
+            'end': end_date.isoformat(),
+            'metrics': list(WeatherDataService.HISTORY_METRICS),
+            'buckets': [buckets[key] for key in sorted(buckets)]
+        }
+    
+    @staticmethod
+    def _bucket_expression(bucket: str):
+        """Expressão SQL do início do bucket (PostgreSQL ou SQLite)"""
+        column = WeatherData.collected_at
+        if db.engine.dialect.name == 'postgresql':
+            return db.func.date_trunc(bucket, column)
+        if bucket == 'hour':
+            return db.func.strftime('%Y-%m-%d %H:00:00', column)
+        if bucket == 'day':
+            return db.func.date(column)
+        # Segunda-feira da semana
+        return db.func.date(column, 'weekday 0', '-6 days')
+    
+    @staticmethod
+    def _bucket_key(value, bucket: str) -> str:
+        """Normaliza o início do bucket para ISO (data e hora para 'hour', data para os restantes)"""
+        if not isinstance(value, datetime):
+            value = datetime.fromisoformat(str(value))
+        if bucket == 'hour':
+            return value.replace(tzinfo=None).isoformat()
+        return value.date().isoformat()
+    
+    @staticmethod
+    def _round(value) -> Optional[float]:
+        return round(float(value), 2) if value is not None else None
+    
+    @staticmethod
+    def _merge_archived_day(buckets: Dict[str, Dict], key: str, day: Dict[str, any]):
+        """Acrescenta um dia arquivado a um bucket (média ponderada pelas leituras)"""
+        readings = day.get('readings') or 0
+        archived = {
+            'temperature': (day['temp_min'], day['temp_avg'], day['temp_max']),
+            'humidity': (None, day['humidity_avg'], None),
+            'pressure': (None, day['pressure_avg'], None),
+            'wind_speed': (None, day['wind_avg'], day['wind_max'])
+        }
+        
+        entry = buckets.get(key)
+        if entry is None:
+            entry = {'bucket_start': key, 'readings': 0, 'source': 'archive'}
+            for metric in WeatherDataService.HISTORY_METRICS:
+                entry[metric] = {'min': None, 'avg': None, 'max': None}
+            buckets[key] = entry
+        
+        previous_readings = entry['readings']
+        total_readings = previous_readings + readings
+        for metric, (minimum, average, maximum) in archived.items():
+            values = entry[metric]
+            if minimum is not None:
+                values['min'] = minimum if values['min'] is None else min(values['min'], minimum)
+            if maximum is not None:
+                values['max'] = maximum if values['max'] is None else max(values['max'], maximum)
+            if average is not None:
+                if values['avg'] is None or not total_readings:
+                    values['avg'] = WeatherDataService._round(average)
+                else:
+                    values['avg'] = WeatherDataService._round(
+                        (values['avg'] * previous_readings + average * readings) / total_readings
+                    )
+        entry['readings'] = total_readings
+    
     @staticmethod
     def get_weather_statistics(location_name: str = None, period: str = 'daily', days: int = 30) -> Dict[str, any]:
         """
@@ -212,16 +507,8 @@ class WeatherDataService:
             Dict com estatísticas
         """
         try:
-            # Encontrar localização
-            location = None
-            if location_name:
-                location = WeatherLocation.query.filter(
-                    WeatherLocation.name.ilike(f'%{location_name}%'),
-                    WeatherLocation.is_active == True
-                ).first()
-            
-            if not location:
-                location = WeatherLocation.query.filter_by(is_active=True).first()
+            # Encontrar localização (ou a primeira ativa)
+            location = WeatherDataService.find_location(location_name=location_name)
             
             if not location:
                 return {}
@@ -312,6 +599,50 @@ class WeatherDataService:
             logger.error(f"Erro ao listar localizações: {e}")
             return []
     
+    @staticmethod
+    def _current_cache_key(location_name: str = None, lat: float = None, lon: float = None) -> str:
+        """Chave de cache de uma consulta de dados atuais"""
+        if location_name:
+            return f"name:{location_name.strip().lower()}"
+        if lat is not None and lon is not None:
+            return f"coords:{round(lat, 2)}:{round(lon, 2)}"
+        return 'default'
+    
+    @staticmethod
+    def get_current_snapshot() -> Optional[Dict[str, any]]:
+        """
+        Resumo dos registros atuais (última coleta, qualidade e total)
+        
+        Partilhado por get_data_freshness e pelo status do coletor; fica em
+        cache até a próxima gravação do coletor.
+        
+        Returns:
+            Dict com o resumo ou None se não houver dados
+        """
+        snapshot = weather_read_cache.get('snapshot')
+        if snapshot is None:
+            latest_data = WeatherData.query.filter_by(
+                is_current=True
+            ).order_by(WeatherData.collected_at.desc()).first()
+            
+            snapshot = {}
+            if latest_data:
+                collected_at = latest_data.collected_at
+                if collected_at.tzinfo is None:
+                    collected_at = collected_at.replace(tzinfo=timezone.utc)
+                snapshot = {
+                    'collected_at': collected_at.isoformat(),
+                    'data_quality': latest_data.data_quality,
+                    'current_count': WeatherData.query.filter_by(is_current=True).count()
+                }
+            
+            weather_read_cache.set('snapshot', snapshot)
+        
+        if not snapshot:
+            return None
+        # O cache guarda dados simples: a data volta a datetime
+        return {**snapshot, 'collected_at': datetime.fromisoformat(snapshot['collected_at'])}
+    
     @staticmethod
     def get_data_freshness() -> Dict[str, any]:
         """
@@ -321,12 +652,10 @@ class WeatherDataService:
             Dict com informações sobre atualização dos dados
         """
         try:
-            # Buscar dados mais recentes
-            latest_data = WeatherData.query.filter_by(
-                is_current=True
-            ).order_by(WeatherData.collected_at.desc()).first()
+            # Resumo dos dados mais recentes
+            snapshot = WeatherDataService.get_current_snapshot()
             
-            if not latest_data:
+            if not snapshot:
                 return {
                     'status': 'no_data',
                     'message': 'Nenhum dado disponível',
@@ -335,7 +664,7 @@ class WeatherDataService:
             
             # Verificar idade dos dados
             now = datetime.now(timezone.utc)
-            age_hours = (now - latest_data.collected_at).total_seconds() / 3600
+            age_hours = (now - snapshot['collected_at']).total_seconds() / 3600
             
             if age_hours <= 1:
                 status = 'fresh'
@@ -353,11 +682,11 @@ class WeatherDataService:
             return {
                 'status': status,
                 'message': message,
-                'last_collection': latest_data.collected_at.isoformat(),
+                'last_collection': snapshot['collected_at'].isoformat(),
                 'age_hours': round(age_hours, 1),
-                'data_quality': latest_data.data_quality,
+                'data_quality': snapshot['data_quality'],
                 'needs_collection': age_hours > 2,
-                'total_locations': WeatherData.query.filter_by(is_current=True).count()
+                'total_locations': snapshot['current_count']
             }
             
         except Exception as e:
@@ -369,38 +698,43 @@ class WeatherDataService:
             }
     
     @staticmethod
-    def _format_weather_response(weather_data: WeatherData) -> Dict[str, any]:
+    def _format_weather_response(weather_data: WeatherData, forecast_rows: List[WeatherForecast] = None,
+                                 include_forecast: bool = True) -> Dict[str, any]:
         """
         Formata dados para resposta padronizada
         
         Args:
             weather_data: Objeto WeatherData
+            forecast_rows: Previsões já carregadas (evita nova consulta)
+            include_forecast: Incluir previsão na resposta
             
         Returns:
             Dict formatado para resposta
         """
-        # Processar dados de forecast se disponíveis
         forecast = []
-        if weather_data.forecast_data:
+        if include_forecast:
             try:
-                import json
-                if isinstance(weather_data.forecast_data, str):
-                    forecast_data = json.loads(weather_data.forecast_data)
+                if forecast_rows is None:
+                    forecast_rows = WeatherForecast.get_for_coordinates(
+                        weather_data.latitude,
+                        weather_data.longitude
+                    )
+                
+                if forecast_rows:
+                    forecast_days = [row.to_dict() for row in forecast_rows]
                 else:
-                    forecast_data = weather_data.forecast_data
+                    forecast_days = WeatherDataService._parse_legacy_forecast(weather_data)
                 
-                if isinstance(forecast_data, list):
-                    # Limitar a 5 dias e formatar
-                    for day_data in forecast_data[:5]:
-                        if isinstance(day_data, dict):
-                            forecast.append({
-                                'date': day_data.get('date'),
-                                'condition': day_data.get('condition', 'N/A'),
-                                'temp_max': day_data.get('temp_max'),
-                                'temp_min': day_data.get('temp_min'),
-                                'humidity': day_data.get('humidity'),
-                                'icon': WeatherDataService._get_condition_icon(day_data.get('condition', ''))
-                            })
+                # Limitar a 5 dias e formatar
+                for day_data in forecast_days[:5]:
+                    forecast.append({
+                        'date': day_data.get('date'),
+                        'condition': day_data.get('condition') or 'N/A',
+                        'temp_max': day_data.get('temp_max'),
+                        'temp_min': day_data.get('temp_min'),
+                        'humidity': day_data.get('humidity'),
+                        'icon': WeatherDataService._get_condition_icon(day_data.get('condition') or '')
+                    })
             except Exception as e:
                 logger.warning(f"Erro ao processar forecast: {e}")
                 forecast = []
@@ -433,6 +767,31 @@ class WeatherDataService:
             'timestamp': weather_data.collected_at.isoformat()
         }
     
+    @staticmethod
+    def _parse_legacy_forecast(weather_data: WeatherData) -> List[Dict[str, any]]:
+        """
+        Lê a previsão de registros antigos guardada em JSON em forecast_data
+        
+        Args:
+            weather_data: Objeto WeatherData
+            
+        Returns:
+            Lista de dias de previsão
+        """
+        if not weather_data.forecast_data:
+            return []
+        
+        import json
+        if isinstance(weather_data.forecast_data, str):
+            forecast_data = json.loads(weather_data.forecast_data)
+        else:
+            forecast_data = weather_data.forecast_data
+        
+        if not isinstance(forecast_data, list):
+            return []
+        
+        return [day for day in forecast_data if isinstance(day, dict)]
+    
     @staticmethod
     def _get_condition_icon(condition: str) -> str:
         """
@@ -0,0 +1,231 @@
+"""
+Armazenamento em camadas do histórico climático
+Mantém leituras brutas recentes e compacta dados antigos em arquivos diários
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime, timezone, timedelta, date
+from typing import Dict, List
+from flask import current_app
+from app import db
+from app.models.weather import WeatherData, WeatherLocation
+from app.models.weather_history import WeatherHistoryArchive
+
+logger = logging.getLogger(__name__)
+
+
+class WeatherHistoryStore:
+    """
+    Histórico climático em duas camadas:
+    - bruta: linhas horárias de WeatherData dos últimos N dias
+    - arquivo: agregados diários compactados em WeatherHistoryArchive
+    """
+    
+    COORD_TOLERANCE = 0.01
+    
+    @staticmethod
+    def get_raw_retention_days() -> int:
+        """Dias de leituras brutas mantidos antes da compactação"""
+        try:
+            return current_app.config.get('WEATHER_RAW_RETENTION_DAYS', 30)
+        except RuntimeError:
+            return 30
+    
+    @staticmethod
+    def get_raw_cutoff(raw_retention_days: int = None) -> datetime:
+        """
+        Limite das leituras brutas, cortado à meia-noite (UTC) para só
+        arquivar dias completos; a retenção usa o mesmo limite
+        """
+        if raw_retention_days is None:
+            raw_retention_days = WeatherHistoryStore.get_raw_retention_days()
+        cutoff_day = datetime.now(timezone.utc).date() - timedelta(days=raw_retention_days)
+        return datetime.combine(cutoff_day, datetime.min.time()).replace(tzinfo=timezone.utc)
+    
+    @staticmethod
+    def _location_filter(location: WeatherLocation):
+        tolerance = WeatherHistoryStore.COORD_TOLERANCE
+        return (
+            WeatherData.latitude.between(location.latitude - tolerance, location.latitude + tolerance),
+            WeatherData.longitude.between(location.longitude - tolerance, location.longitude + tolerance)
+        )
+    
+    @staticmethod
+    def downsample_raw_data(raw_retention_days: int = None, batch_size: int = 1000) -> Dict[str, any]:
+        """
+        Compacta leituras brutas antigas em arquivos diários e remove as linhas brutas
+        
+        Args:
+            raw_retention_days: Dias de dados brutos a manter (padrão: configuração)
+            batch_size: Tamanho dos lotes de remoção
+        
+        Returns:
+            Dict com resultado da compactação
+        """
+        cutoff = WeatherHistoryStore.get_raw_cutoff(raw_retention_days)
+        
+        result = {
+            'success': True,
+            'cutoff': cutoff.isoformat(),
+            'locations_processed': 0,
+            'days_archived': 0,
+            'rows_removed': 0,
+            'errors': []
+        }
+        
+        for location in WeatherLocation.query.all():
+            try:
+                days_archived, rows_removed = WeatherHistoryStore._downsample_location(
+                    location, cutoff, batch_size
+                )
+                result['locations_processed'] += 1
+                result['days_archived'] += days_archived
+                result['rows_removed'] += rows_removed
+            except Exception as e:
+                db.session.rollback()
+                error_msg = f"Erro ao compactar histórico de {location.name}: {e}"
+                result['errors'].append(error_msg)
+                logger.error(error_msg)
+        
+        result['success'] = not result['errors']
+        logger.info(
+            f"Compactação do histórico: {result['days_archived']} dias arquivados, "
+            f"{result['rows_removed']} leituras brutas removidas"
+        )
+        return result
+    
+    @staticmethod
+    def _downsample_location(location: WeatherLocation, cutoff: datetime, batch_size: int):
+        """Arquivar e remover as leituras antigas de uma localização"""
+        rows = WeatherData.query.with_entities(
+            WeatherData.id,
+            WeatherData.collected_at,
+            WeatherData.temperature,
+            WeatherData.humidity,
+            WeatherData.pressure,
+            WeatherData.wind_speed,
+            WeatherData.condition
+        ).filter(
+            *WeatherHistoryStore._location_filter(location),
+            WeatherData.is_current == False,
+            WeatherData.collected_at < cutoff
+        ).order_by(WeatherData.collected_at).all()
+        
+        if not rows:
+            return 0, 0
+        
+        daily_values = WeatherHistoryStore._aggregate_by_day(rows)
+        
+        # Agrupar por ano e fundir com os arquivos existentes
+        by_year = defaultdict(dict)
+        for day, values in daily_values.items():
+            by_year[day.year][day] = values
+        
+        for year, days in by_year.items():
+            archive = WeatherHistoryArchive.query.filter_by(
+                location_id=location.id,
+                year=year
+            ).first()
+            if not archive:
+                archive = WeatherHistoryArchive(location_id=location.id, year=year)
+                db.session.add(archive)
+            archive.store_days(days)
+        
+        db.session.commit()
+        
+        # Remover as leituras brutas já arquivadas em lotes
+        row_ids = [row.id for row in rows]
+        for start in range(0, len(row_ids), batch_size):
+            chunk = row_ids[start:start + batch_size]
+            WeatherData.query.filter(WeatherData.id.in_(chunk)).delete(synchronize_session=False)
+            db.session.commit()
+        
+        return len(daily_values), len(row_ids)
+    
+    @staticmethod
+    def _aggregate_by_day(rows) -> Dict[date, Dict[str, float]]:
+        """Calcular agregados diários a partir de leituras brutas"""
+        grouped = defaultdict(list)
+        for row in rows:
+            grouped[row.collected_at.date()].append(row)
+        
+        daily_values = {}
+        for day, readings in grouped.items():
+            temperatures = [r.temperature for r in readings]
+            humidities = [r.humidity for r in readings]
+            pressures = [r.pressure for r in readings if r.pressure]
+            wind_speeds = [r.wind_speed for r in readings]
+            conditions = [(r.condition or '').lower() for r in readings]
+            
+            daily_values[day] = {
+                'temp_min': min(temperatures),
+                'temp_avg': sum(temperatures) / len(temperatures),
+                'temp_max': max(temperatures),
+                'humidity_avg': sum(humidities) / len(humidities),
+                'pressure_avg': sum(pressures) / len(pressures) if pressures else None,
+                'wind_avg': sum(wind_speeds) / len(wind_speeds),
+                'wind_max': max(wind_speeds),
+                'rainy_hours': sum(1 for c in conditions if 'chuva' in c or 'rain' in c),
+                'readings': len(readings)
+            }
+        
+        return daily_values
+    
+    @staticmethod
+    def get_archived_days(location: WeatherLocation, start_date: date, end_date: date) -> List[Dict[str, any]]:
+        """
+        Obter agregados diários arquivados num intervalo
+        
+        Args:
+            location: Localização
+            start_date: Primeiro dia (inclusive)
+            end_date: Último dia (inclusive)
+        
+        Returns:
+            Lista ordenada por data com os agregados diários
+        """
+        archives = WeatherHistoryArchive.query.filter(
+            WeatherHistoryArchive.location_id == location.id,
+            WeatherHistoryArchive.year >= start_date.year,
+            WeatherHistoryArchive.year <= end_date.year
+        ).order_by(WeatherHistoryArchive.year).all()
+        
+        days = []
+        for archive in archives:
+            days.extend(archive.get_days(start_date, end_date))
+        return days
+    
+    @staticmethod
+    def format_archived_day(location: WeatherLocation, day: Dict[str, any]) -> Dict[str, any]:
+        """Formatar um agregado diário no formato das respostas de histórico"""
+        timestamp = datetime.combine(day['date'], datetime.min.time()).replace(tzinfo=timezone.utc).isoformat()
+        return {
+            'temperature': day['temp_avg'],
+            'temp_min': day['temp_min'],
+            'temp_max': day['temp_max'],
+            'humidity': day['humidity_avg'],
+            'pressure': day['pressure_avg'],
+            'wind_speed': day['wind_avg'],
+            'wind_max': day['wind_max'],
+            'rainy_hours': day['rainy_hours'],
+            'readings': day['readings'],
+            'location_name': location.name,
+            'latitude': location.latitude,
+            'longitude': location.longitude,
+            'collected_at': timestamp,
+            'timestamp': timestamp,
+            'resolution': 'daily',
+            'source': 'history_archive'
+        }
+    
+    @staticmethod
+    def get_storage_stats() -> Dict[str, any]:
+        """Tamanho do arquivo compactado"""
+        total_bytes = db.session.query(
+            db.func.sum(db.func.length(WeatherHistoryArchive.packed_columns))
+        ).scalar() or 0
+        return {
+            'archives': WeatherHistoryArchive.query.count(),
+            'days_archived': db.session.query(db.func.sum(WeatherHistoryArchive.days_filled)).scalar() or 0,
+            'packed_bytes': int(total_bytes)
+        }
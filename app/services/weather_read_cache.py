@@ -0,0 +1,85 @@
+"""
+Cache de leitura de dados climáticos atuais
+Respostas formatadas ficam no cache em camadas e são invalidadas pelo coletor após cada gravação
+"""
+import logging
+from typing import Any, Dict, Optional
+
+from app.utils.tiered_cache import tiered_cache
+
+logger = logging.getLogger(__name__)
+
+
+class WeatherReadCache:
+    """
+    Cache read-through das respostas climáticas atuais
+    
+    As entradas ficam no namespace 'weather:current' do cache em camadas (L1
+    por processo, Redis partilhado). O coletor chama invalidate() após gravar,
+    o que cria uma nova geração do namespace (INCR partilhado entre workers);
+    as entradas antigas deixam de ser lidas e expiram pelo TTL. Como o
+    namespace é filho de 'weather', invalidar 'weather' também o invalida.
+    
+    As consultas por nome ou coordenadas guardam apenas um alias para a
+    entrada da localização resolvida.
+    """
+    
+    NAMESPACE = 'weather:current'
+    ALIAS_FIELD = '__alias__'
+    
+    def __init__(self, ttl: int = 300):
+        self.ttl = ttl
+    
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Obter uma entrada válida (cópia desserializada)
+        
+        Args:
+            key: Chave da consulta (ou alias resolvido para a localização)
+        """
+        value = tiered_cache.get(key, self.NAMESPACE)
+        if isinstance(value, dict) and self.ALIAS_FIELD in value:
+            value = tiered_cache.get(value[self.ALIAS_FIELD], self.NAMESPACE)
+        return value
+    
+    def set(self, key: str, value: Any, location_id: int = None):
+        """
+        Guardar uma resposta
+        
+        Args:
+            key: Chave da consulta
+            value: Resposta formatada
+            location_id: Localização resolvida; a resposta fica guardada por id
+                         e a chave da consulta passa a ser um alias
+        """
+        if location_id is None:
+            tiered_cache.set(key, value, self.ttl, self.NAMESPACE)
+            return
+        
+        location_key = f"location:{location_id}"
+        tiered_cache.set_many({
+            location_key: value,
+            key: {self.ALIAS_FIELD: location_key}
+        }, self.ttl, self.NAMESPACE)
+    
+    def invalidate(self):
+        """Invalidar todas as entradas (chamado após gravações do coletor)"""
+        try:
+            tiered_cache.clear_namespace(self.NAMESPACE)
+        except Exception as e:
+            logger.warning(f"Erro ao invalidar cache climático: {e}")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Estatísticas do namespace no cache em camadas"""
+        stats = tiered_cache.get_stats()
+        namespace = self.NAMESPACE.split(':', 1)[0]
+        return {
+            'namespace': self.NAMESPACE,
+            'ttl': self.ttl,
+            'backend': 'redis' if stats['redis_connected'] else 'memory',
+            **stats['namespaces'].get(namespace, {})
+        }
+
+
+# Instância global do cache de leitura
+weather_read_cache = WeatherReadCache()
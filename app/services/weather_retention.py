@@ -0,0 +1,185 @@
+"""
+Retenção de dados climáticos
+Remove dados antigos em lotes curtos por faixa de chave primária, por camada
+"""
+import time
+import logging
+from datetime import datetime, timezone, timedelta
+from typing import Dict, List
+from flask import current_app
+from app import db
+from app.models.weather import WeatherData, WeatherStats, WeatherForecast
+from app.services.weather_history_store import WeatherHistoryStore
+
+logger = logging.getLogger(__name__)
+
+
+class WeatherRetentionService:
+    """
+    Motor de retenção por camadas:
+    - raw: leituras horárias não-atuais fora da retenção bruta
+    - stats: estatísticas agregadas fora da retenção de estatísticas
+    - forecasts: previsões de dias já passados
+    
+    Cada lote seleciona as próximas N chaves que cumprem o critério e remove a
+    faixa [primeira, última] numa transação curta, com pausa entre lotes.
+    Registros atuais nunca cumprem o critério, pelo que a remoção pode correr
+    durante a coleta.
+    """
+    
+    TIERS = ('raw', 'stats', 'forecasts')
+    
+    @staticmethod
+    def _config(name: str, default):
+        try:
+            return current_app.config.get(name, default)
+        except RuntimeError:
+            return default
+    
+    @staticmethod
+    def get_policies() -> Dict[str, Dict[str, any]]:
+        """
+        Critérios de remoção de cada camada
+        
+        Returns:
+            Dict camada -> {'model', 'criteria', 'cutoff'}
+        """
+        now = datetime.now(timezone.utc)
+        raw_days = WeatherRetentionService._config('WEATHER_RAW_RETENTION_DAYS', 30)
+        stats_days = WeatherRetentionService._config('WEATHER_STATS_RETENTION_DAYS', 730)
+        
+        # Mesmo limite da compactação: só remove dias já arquivados
+        raw_cutoff = WeatherHistoryStore.get_raw_cutoff(raw_days)
+        stats_cutoff = (now - timedelta(days=stats_days)).date()
+        today = now.date()
+        
+        return {
+            'raw': {
+                'model': WeatherData,
+                'criteria': (WeatherData.is_current == False, WeatherData.collected_at < raw_cutoff),
+                'cutoff': raw_cutoff.isoformat()
+            },
+            'stats': {
+                'model': WeatherStats,
+                'criteria': (WeatherStats.period_date < stats_cutoff,),
+                'cutoff': stats_cutoff.isoformat()
+            },
+            'forecasts': {
+                'model': WeatherForecast,
+                'criteria': (WeatherForecast.target_date < today,),
+                'cutoff': today.isoformat()
+            }
+        }
+    
+    @staticmethod
+    def ensure_indexes():
+        """Criar os índices usados pelos critérios de retenção em tabelas já existentes"""
+        for model in (WeatherData, WeatherForecast):
+            for index in model.__table__.indexes:
+                try:
+                    index.create(bind=db.engine, checkfirst=True)
+                except Exception as e:
+                    logger.warning(f"Não foi possível criar o índice {index.name}: {e}")
+    
+    @staticmethod
+    def delete_in_chunks(model, criteria, batch_size: int = None, batch_sleep: float = None) -> Dict[str, any]:
+        """
+        Remove as linhas que cumprem o critério em lotes por faixa de chave primária
+        
+        Args:
+            model: Modelo SQLAlchemy
+            criteria: Condições de remoção
+            batch_size: Linhas por lote (padrão: configuração)
+            batch_sleep: Pausa entre lotes em segundos (padrão: configuração)
+        
+        Returns:
+            Dict com linhas removidas, lotes, duração e taxa
+        """
+        if batch_size is None:
+            batch_size = WeatherRetentionService._config('WEATHER_RETENTION_BATCH_SIZE', 5000)
+        if batch_sleep is None:
+            batch_sleep = WeatherRetentionService._config('WEATHER_RETENTION_BATCH_SLEEP', 0.05)
+        
+        started = time.perf_counter()
+        rows_deleted = 0
+        batches = 0
+        last_id = 0
+        
+        while True:
+            chunk = db.session.query(model.id).filter(
+                *criteria,
+                model.id > last_id
+            ).order_by(model.id).limit(batch_size).all()
+            
+            if not chunk:
+                break
+            
+            first_id, last_id = chunk[0][0], chunk[-1][0]
+            rows_deleted += model.query.filter(
+                model.id.between(first_id, last_id),
+                *criteria
+            ).delete(synchronize_session=False)
+            db.session.commit()
+            batches += 1
+            
+            if len(chunk) < batch_size:
+                break
+            if batch_sleep:
+                time.sleep(batch_sleep)
+        
+        elapsed = time.perf_counter() - started
+        return {
+            'rows_deleted': rows_deleted,
+            'batches': batches,
+            'elapsed_seconds': round(elapsed, 3),
+            'rows_per_second': round(rows_deleted / elapsed, 1) if elapsed > 0 else 0
+        }
+    
+    @staticmethod
+    def apply_policies(tiers: List[str] = None, batch_size: int = None, batch_sleep: float = None) -> Dict[str, any]:
+        """
+        Aplica a retenção às camadas indicadas
+        
+        Args:
+            tiers: Camadas a processar (padrão: todas)
+            batch_size: Linhas por lote
+            batch_sleep: Pausa entre lotes
+        
+        Returns:
+            Dict com relatório por camada
+        """
+        result = {
+            'success': True,
+            'tiers': {},
+            'rows_deleted': 0,
+            'errors': []
+        }
+        
+        WeatherRetentionService.ensure_indexes()
+        policies = WeatherRetentionService.get_policies()
+        
+        for tier in tiers or WeatherRetentionService.TIERS:
+            policy = policies[tier]
+            try:
+                report = WeatherRetentionService.delete_in_chunks(
+                    policy['model'],
+                    policy['criteria'],
+                    batch_size,
+                    batch_sleep
+                )
+                report['cutoff'] = policy['cutoff']
+                result['tiers'][tier] = report
+                result['rows_deleted'] += report['rows_deleted']
+                
+                logger.info(
+                    f"Retenção '{tier}': {report['rows_deleted']} linhas removidas em "
+                    f"{report['batches']} lotes ({report['rows_per_second']} linhas/s)"
+                )
+            except Exception as e:
+                db.session.rollback()
+                error_msg = f"Erro na retenção '{tier}': {e}"
+                result['errors'].append(error_msg)
+                logger.error(error_msg)
+        
+        result['success'] = not result['errors']
+        return result
@@ -2,9 +2,13 @@
 Sistema de Agendamento para Coleta Automática de Dados Climáticos
 Executa coleta a cada hora usando APScheduler
 """
+import os
+import atexit
 import logging
+import threading
 from datetime import datetime, timezone
 from flask import Flask
+from sqlalchemy import text
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from apscheduler.triggers.cron import CronTrigger
@@ -16,6 +20,142 @@ logger = logging.getLogger(__name__)
 weather_scheduler = None
 
 
+class SchedulerLeaderLock:
+    """
+    Lock de liderança entre processos para os jobs agendados
+    
+    Com vários workers gunicorn apenas o processo que detém o lock executa
+    os jobs. PostgreSQL usa um advisory lock de sessão numa conexão dedicada;
+    SQLite (e outros bancos) usa um lock exclusivo de arquivo.
+    O lock é libertado automaticamente se o processo morrer.
+    
+    Outras tarefas partilhadas entre workers (ex: aquecimento do cache)
+    usam a mesma classe com outro lock_id e nome.
+    """
+    
+    ADVISORY_LOCK_ID = 7243010
+    
+    def __init__(self, app: Flask, lock_id: int = None, name: str = 'weather_scheduler'):
+        self.app = app
+        self.lock_id = lock_id or self.ADVISORY_LOCK_ID
+        self.name = name
+        self._lock = threading.Lock()
+        self._connection = None
+        self._lock_file = None
+        self.backend = None
+        self.is_held = False
+    
+    def acquire(self) -> bool:
+        """
+        Tenta obter (ou confirmar) a liderança sem bloquear
+        
+        Returns:
+            bool: True se este processo é o líder
+        """
+        with self._lock:
+            if self.is_held and self._still_valid():
+                return True
+            
+            self._release_resources()
+            
+            try:
+                from app import db
+                if db.engine.dialect.name == 'postgresql':
+                    self.is_held = self._acquire_advisory_lock(db)
+                else:
+                    self.is_held = self._acquire_file_lock()
+            except Exception as e:
+                logger.error(f"Erro ao obter lock de liderança '{self.name}': {e}")
+                self._release_resources()
+                self.is_held = False
+            
+            if self.is_held:
+                logger.info(f"Processo {os.getpid()} detém o lock '{self.name}' ({self.backend})")
+            
+            return self.is_held
+    
+    def release(self):
+        """Liberta a liderança"""
+        with self._lock:
+            self._release_resources()
+            self.is_held = False
+    
+    def _acquire_advisory_lock(self, db) -> bool:
+        self.backend = 'postgresql_advisory'
+        self._connection = db.engine.connect()
+        acquired = self._connection.execute(
+            text("SELECT pg_try_advisory_lock(:lock_id)"),
+            {'lock_id': self.lock_id}
+        ).scalar()
+        self._connection.commit()
+        
+        if not acquired:
+            self._release_resources()
+        return bool(acquired)
+    
+    def _acquire_file_lock(self) -> bool:
+        self.backend = 'file'
+        lock_path = self.app.config.get(f"{self.name.upper()}_LOCK_FILE") or os.path.join(
+            self.app.instance_path, f"{self.name}.lock"
+        )
+        os.makedirs(os.path.dirname(lock_path), exist_ok=True)
+        
+        self._lock_file = open(lock_path, 'a+')
+        try:
+            try:
+                import fcntl
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except ImportError:
+                import msvcrt
+                self._lock_file.seek(0)
+                msvcrt.locking(self._lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            self._release_resources()
+            return False
+        
+        self._lock_file.seek(0)
+        self._lock_file.truncate()
+        self._lock_file.write(str(os.getpid()))
+        self._lock_file.flush()
+        return True
+    
+    def _still_valid(self) -> bool:
+        """Confirma que a conexão que segura o advisory lock continua viva"""
+        if self._connection is None:
+            return self._lock_file is not None
+        
+        try:
+            self._connection.execute(text("SELECT 1"))
+            self._connection.commit()
+            return True
+        except Exception as e:
+            logger.warning(f"Conexão do lock de liderança perdida: {e}")
+            return False
+    
+    def _release_resources(self):
+        if self._connection is not None:
+            try:
+                self._connection.execute(
+                    text("SELECT pg_advisory_unlock(:lock_id)"),
+                    {'lock_id': self.lock_id}
+                )
+                self._connection.commit()
+            except Exception:
+                pass
+            try:
+                self._connection.close()
+            except Exception:
+                pass
+            self._connection = None
+        
+        if self._lock_file is not None:
+            try:
+                self._lock_file.close()
+            except Exception:
+                pass
+            self._lock_file = None
+
+
 class WeatherScheduler:
     """
     Gerenciador de agendamento para coleta automática
@@ -26,6 +166,7 @@ class WeatherScheduler:
         self.scheduler = None
         self.app = app
         self.is_running = False
+        self.leader_lock = None
         
         if app:
             self.init_app(app)
@@ -38,6 +179,7 @@ class WeatherScheduler:
             app: Instância Flask
         """
         self.app = app
+        self.leader_lock = SchedulerLeaderLock(app)
         
         # Configurar scheduler
         self.scheduler = BackgroundScheduler(
@@ -50,8 +192,8 @@ class WeatherScheduler:
         # Adicionar job de coleta automática
         self.setup_collection_jobs()
         
-        # Registrar cleanup no encerramento da app
-        app.teardown_appcontext(self._cleanup_handler)
+        # Registrar cleanup no encerramento do processo
+        atexit.register(self._cleanup_handler)
     
     def setup_collection_jobs(self):
         """
@@ -63,7 +205,8 @@ class WeatherScheduler:
         try:
             # Job principal: coleta a cada hora
             self.scheduler.add_job(
-                func=self._scheduled_collection,
+                func=self._run_as_leader,
+                args=[self._scheduled_collection],
                 trigger=CronTrigger(minute=0),  # A cada hora no minuto 0
                 id='weather_collection_hourly',
                 name='Coleta Automática de Dados Climáticos',
@@ -74,7 +217,8 @@ class WeatherScheduler:
             
             # Job de limpeza: remove dados antigos (diário às 2:00)
             self.scheduler.add_job(
-                func=self._scheduled_cleanup,
+                func=self._run_as_leader,
+                args=[self._scheduled_cleanup],
                 trigger=CronTrigger(hour=2, minute=0),  # Diariamente às 2:00
                 id='weather_cleanup_daily',
                 name='Limpeza de Dados Antigos',
@@ -85,7 +229,8 @@ class WeatherScheduler:
             
             # Job de estatísticas: atualiza estatísticas (diário às 1:00)
             self.scheduler.add_job(
-                func=self._scheduled_statistics,
+                func=self._run_as_leader,
+                args=[self._scheduled_statistics],
                 trigger=CronTrigger(hour=1, minute=0),  # Diariamente às 1:00
                 id='weather_statistics_daily',
                 name='Atualização de Estatísticas',
@@ -99,6 +244,20 @@ class WeatherScheduler:
         except Exception as e:
             logger.error(f"Erro ao configurar jobs: {e}")
     
+    def _run_as_leader(self, job_func):
+        """
+        Executa um job apenas no processo líder e dentro do contexto da app
+        
+        Args:
+            job_func: Função do job
+        """
+        with self.app.app_context():
+            if not self.leader_lock.acquire():
+                logger.debug(f"Job {job_func.__name__} ignorado: processo {os.getpid()} não é o líder")
+                return None
+            
+            return job_func()
+    
     def start(self):
         """
         Inicia o scheduler
@@ -124,6 +283,7 @@ class WeatherScheduler:
         if self.scheduler and self.is_running:
             try:
                 self.scheduler.shutdown(wait=False)
+                self.leader_lock.release()
                 self.is_running = False
                 logger.info("Sistema de coleta automática parado")
             except Exception as e:
@@ -171,6 +331,9 @@ class WeatherScheduler:
         return {
             'scheduler_status': 'running' if self.is_running else 'stopped',
             'is_running': self.is_running,
+            'is_leader': bool(self.leader_lock and self.leader_lock.is_held),
+            'leader_lock_backend': self.leader_lock.backend if self.leader_lock else None,
+            'pid': os.getpid(),
             'jobs': jobs_info,
             'current_time': datetime.now(timezone.utc).isoformat()
         }
@@ -211,21 +374,17 @@ class WeatherScheduler:
         try:
             logger.info("Iniciando limpeza automática de dados antigos")
             
-            from app.models.weather import WeatherData
-            from app import db
-            from datetime import timedelta
-            
-            # Remover dados não-atuais com mais de 30 dias
-            cutoff_date = datetime.now(timezone.utc) - timedelta(days=30)
+            from app.services.weather_history_store import WeatherHistoryStore
+            from app.services.weather_retention import WeatherRetentionService
             
-            deleted_count = WeatherData.query.filter(
-                WeatherData.is_current == False,
-                WeatherData.collected_at < cutoff_date
-            ).delete()
+            # Compactar leituras antigas em agregados diários antes de remover
+            downsample_result = WeatherHistoryStore.downsample_raw_data()
+            logger.info(f"Histórico compactado: {downsample_result['days_archived']} dias arquivados")
             
-            db.session.commit()
+            # Remover dados fora da retenção de cada camada, em lotes
+            retention_result = WeatherRetentionService.apply_policies()
             
-            logger.info(f"Limpeza concluída: {deleted_count} registros removidos")
+            logger.info(f"Limpeza concluída: {retention_result['rows_deleted']} registros removidos")
             
         except Exception as e:
             logger.error(f"Erro na limpeza automática: {e}")
@@ -244,9 +403,9 @@ class WeatherScheduler:
         except Exception as e:
             logger.error(f"Erro na atualização de estatísticas: {e}")
     
-    def _cleanup_handler(self, exception=None):
+    def _cleanup_handler(self):
         """
-        Handler de cleanup para encerramento da aplicação
+        Handler de cleanup para encerramento do processo
         """
         if self.is_running:
             self.stop()
@@ -0,0 +1,97 @@
+/**
+ * Auto-refresh do Dashboard
+ * Consulta /api com If-None-Match e ?since=<versão>: sem alterações a
+ * resposta é um 304; com alterações chegam apenas as secções alteradas
+ */
+
+class DashboardAutoRefresh {
+    constructor(options = {}) {
+        this.url = options.url || '/api';
+        this.updateInterval = options.interval || 60 * 1000; // 1 minuto
+        this.version = null;
+        this.etag = null;
+        this.data = {};
+        this.timer = null;
+        this.init();
+    }
+
+    init() {
+        this.poll();
+        this.start();
+
+        // Pausar enquanto o separador não está visível
+        document.addEventListener('visibilitychange', () => {
+            if (document.hidden) {
+                this.stop();
+            } else {
+                this.poll();
+                this.start();
+            }
+        });
+    }
+
+    start() {
+        if (!this.timer) {
+            this.timer = setInterval(() => this.poll(), this.updateInterval);
+        }
+    }
+
+    stop() {
+        clearInterval(this.timer);
+        this.timer = null;
+    }
+
+    async poll() {
+        try {
+            const url = this.version ? `${this.url}?since=${encodeURIComponent(this.version)}` : this.url;
+            const headers = { 'Accept': 'application/json' };
+            if (this.etag) {
+                headers['If-None-Match'] = this.etag;
+            }
+
+            // no-store: o 304 chega ao script em vez de ser resolvido pela cache do browser
+            const response = await fetch(url, { headers, cache: 'no-store', credentials: 'same-origin' });
+            if (response.status === 304 || !response.ok) {
+                return;
+            }
+
+            const result = await response.json();
+            if (!result.success) {
+                return;
+            }
+
+            this.etag = response.headers.get('ETag');
+            this.version = result.version;
+
+            const sections = result.changed || Object.keys(result.data || {});
+            sections.forEach((section) => {
+                this.data[section] = result.data[section];
+            });
+
+            if (sections.length) {
+                this.applyChanges(sections);
+            }
+        } catch (error) {
+            console.error('❌ Erro no auto-refresh do dashboard:', error);
+        }
+    }
+
+    applyChanges(sections) {
+        if (sections.includes('alerts_count')) {
+            const alertsCount = document.querySelector('.alerts-count');
+            if (alertsCount) {
+                alertsCount.textContent = `${this.data.alerts_count || 0} não lidos`;
+            }
+        }
+
+        // Restantes widgets reagem ao evento com as secções alteradas
+        document.dispatchEvent(new CustomEvent('dashboard:updated', {
+            detail: { sections, data: this.data, version: this.version }
+        }));
+        console.log('🔄 Dashboard atualizado:', sections);
+    }
+}
+
+document.addEventListener('DOMContentLoaded', () => {
+    window.dashboardAutoRefresh = new DashboardAutoRefresh();
+});
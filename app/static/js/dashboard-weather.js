@@ -67,17 +67,26 @@ class WeatherDashboard {
             // Mostrar loading específico
             this.showLoadingWithMessage('Coletando dados da API...');
             
-            // Usar endpoint que força coleta da API
+            // Iniciar coleta em segundo plano (ou reaproveitar a que está em curso)
             const response = await fetch('/weather/force-collect');
             const result = await response.json();
             
-            if (result.success && result.data) {
+            if (result.data) {
                 this.displayWeatherData(result.data);
+            }
+            
+            if (result.collection && result.collection.job_id) {
+                const job = await this.waitForCollection(result.collection.status_url);
+                
+                // Recarregar dados assim que a localização do usuário foi coletada
+                await this.loadWeatherData();
                 this.lastUpdateTime = new Date();
-                console.log(`✅ Dados atualizados: ${result.collection.message}`);
                 
-                // Mostrar notificação de sucesso
-                this.showSuccessToast(result.collection.message);
+                if (job) {
+                    const message = `${job.locations_processed} localizações atualizadas`;
+                    console.log(`✅ Dados atualizados: ${message}`);
+                    this.showSuccessToast(message);
+                }
             } else {
                 console.error('❌ Falha na coleta:', result);
                 // Tentar carregar dados existentes como fallback
@@ -98,6 +107,33 @@ class WeatherDashboard {
         }
     }
 
+    async waitForCollection(statusUrl, timeoutMs = 120000) {
+        // Consultar o progresso até a localização do usuário estar coletada
+        const startedAt = Date.now();
+        
+        while (Date.now() - startedAt < timeoutMs) {
+            await new Promise(resolve => setTimeout(resolve, 2000));
+            
+            try {
+                const response = await fetch(statusUrl);
+                if (!response.ok) return null;
+                
+                const result = await response.json();
+                const job = result.job;
+                if (!job) return null;
+                
+                if (job.priority_location_done || job.status === 'completed' || job.status === 'failed') {
+                    return job;
+                }
+            } catch (error) {
+                console.warn('⚠️ Erro ao consultar progresso da coleta:', error);
+                return null;
+            }
+        }
+        
+        return null;
+    }
+
     displayWeatherData(data) {
         if (!this.weatherContainer) return;
 
@@ -5,6 +5,7 @@ Sistema robusto de integração com APIs externas - Sprint 4 Prompt 2
 import requests
 import time
 import logging
+import threading
 from typing import Dict, Any, Optional, Callable
 from functools import wraps
 from datetime import datetime, timedelta
@@ -146,8 +147,11 @@ class APIIntegrationManager:
             # Fazer request
             response = self.session.request(method, url, **kwargs)
             
-            # Registrar sucesso no circuit breaker
-            self.circuit_breakers[api_name].record_success()
+            # Registrar resultado no circuit breaker (5xx conta como falha do provedor)
+            if response.status_code >= 500:
+                self.circuit_breakers[api_name].record_failure()
+            else:
+                self.circuit_breakers[api_name].record_success()
             
             # Calcular métricas
             duration = time.time() - start_time
@@ -283,6 +287,135 @@ class APICache:
         return self.cache.set(cache_key, response_data, ttl)
 
 
+class SingleFlight:
+    """Coalescência de chamadas concorrentes com a mesma chave (single-flight)"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self.coalesced_calls = 0
+    
+    def do(self, key: str, func: Callable):
+        """
+        Executar func uma única vez por chave enquanto houver chamada em curso
+        
+        Chamadas concorrentes com a mesma chave aguardam o resultado da primeira
+        """
+        with self._lock:
+            call = self._in_flight.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = {'event': threading.Event(), 'result': None, 'error': None}
+                self._in_flight[key] = call
+            else:
+                self.coalesced_calls += 1
+        
+        if not is_leader:
+            call['event'].wait()
+            if call['error'] is not None:
+                raise call['error']
+            return call['result']
+        
+        try:
+            call['result'] = func()
+            return call['result']
+        except Exception as e:
+            call['error'] = e
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+            call['event'].set()
+
+
+class TTLResponseCache:
+    """Cache em memória de respostas de API com expiração por TTL"""
+    
+    def __init__(self, default_ttl: int = 600, max_entries: int = 5000):
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key: str):
+        """Obter resposta se ainda válida"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            if entry:
+                del self._entries[key]
+            self.misses += 1
+            return None
+    
+    def set(self, key: str, value, ttl: int = None):
+        """Armazenar resposta"""
+        expires_at = time.time() + (ttl or self.default_ttl)
+        with self._lock:
+            if len(self._entries) >= self.max_entries and key not in self._entries:
+                # Descartar a entrada que expira primeiro
+                oldest_key = min(self._entries, key=lambda k: self._entries[k][0])
+                del self._entries[oldest_key]
+            self._entries[key] = (expires_at, value)
+    
+    def invalidate(self, key: str = None):
+        """Invalidar uma chave ou todo o cache"""
+        with self._lock:
+            if key is None:
+                cleared = len(self._entries)
+                self._entries.clear()
+                return cleared
+            return 1 if self._entries.pop(key, None) is not None else 0
+    
+    def __len__(self):
+        return len(self._entries)
+
+
+class APIQuotaBudget:
+    """Controle de orçamento diário de chamadas a uma API paga"""
+    
+    def __init__(self, daily_limit: int):
+        self.daily_limit = daily_limit
+        self._lock = threading.Lock()
+        self._day = datetime.utcnow().date()
+        self.used_today = 0
+        self.rejected_today = 0
+    
+    def _roll_day(self):
+        today = datetime.utcnow().date()
+        if today != self._day:
+            self._day = today
+            self.used_today = 0
+            self.rejected_today = 0
+    
+    def try_consume(self, calls: int = 1) -> bool:
+        """Reservar chamadas do orçamento; False se o orçamento esgotou"""
+        with self._lock:
+            self._roll_day()
+            if self.daily_limit and self.used_today + calls > self.daily_limit:
+                self.rejected_today += calls
+                return False
+            self.used_today += calls
+            return True
+    
+    def get_status(self) -> Dict[str, Any]:
+        """Estado atual do orçamento"""
+        with self._lock:
+            self._roll_day()
+            remaining = max(0, self.daily_limit - self.used_today) if self.daily_limit else None
+            return {
+                'day': self._day.isoformat(),
+                'daily_limit': self.daily_limit,
+                'used_today': self.used_today,
+                'remaining_today': remaining,
+                'rejected_today': self.rejected_today
+            }
+
+
 # Decorators para APIs específicas
 def cached_api_call(ttl: int = 300, cache_key_func: Callable = None):
     """Decorator para cache de chamadas de API"""
@@ -591,8 +724,149 @@ class BatchAPIProcessor:
         )
 
 
+class WeatherFetchLayer:
+    """
+    Camada de busca à OpenWeatherMap usada pelo coletor
+    
+    Combina coalescência por coordenadas arredondadas, cache de respostas com TTL
+    e orçamento diário de chamadas, passando pelo rate limiter e circuit breaker
+    do APIIntegrationManager
+    """
+    
+    BASE_URL = "https://api.openweathermap.org/data/2.5"
+    ENDPOINTS = {
+        'current': 'weather',
+        'forecast': 'forecast'
+    }
+    
+    def __init__(self, api_manager: APIIntegrationManager, api_name: str = 'openweather'):
+        self.api_manager = api_manager
+        self.api_name = api_name
+        self.single_flight = SingleFlight()
+        self.response_cache = TTLResponseCache(default_ttl=600)
+        self.budget = APIQuotaBudget(daily_limit=1000)
+        self.api_calls = 0
+        self.api_failures = 0
+        self.budget_rejections = 0
+    
+    @staticmethod
+    def _config(name: str, default):
+        """Ler configuração da app se houver contexto"""
+        try:
+            from flask import current_app
+            return current_app.config.get(name, default)
+        except RuntimeError:
+            return default
+    
+    def _round_coordinates(self, lat: float, lon: float):
+        precision = self._config('WEATHER_COORD_PRECISION', 2)
+        return round(float(lat), precision), round(float(lon), precision)
+    
+    def fetch_current(self, lat: float, lon: float, api_key: str) -> Optional[Dict]:
+        """Obter clima atual (JSON bruto da API) ou None"""
+        return self.fetch('current', lat, lon, api_key)
+    
+    def fetch_forecast(self, lat: float, lon: float, api_key: str) -> Optional[Dict]:
+        """Obter previsão de 5 dias (JSON bruto da API) ou None"""
+        return self.fetch('forecast', lat, lon, api_key)
+    
+    def fetch(self, kind: str, lat: float, lon: float, api_key: str) -> Optional[Dict]:
+        """
+        Buscar um endpoint da API com cache, coalescência e orçamento
+        
+        Args:
+            kind: 'current' ou 'forecast'
+            lat: Latitude
+            lon: Longitude
+            api_key: Chave da API
+        
+        Returns:
+            Dict com JSON da API ou None se falhou
+        """
+        rounded_lat, rounded_lon = self._round_coordinates(lat, lon)
+        key = f"{kind}:{rounded_lat}:{rounded_lon}"
+        
+        cached_response = self.response_cache.get(key)
+        if cached_response is not None:
+            logger.debug(f"Resposta meteorológica obtida do cache: {key}")
+            return cached_response
+        
+        return self.single_flight.do(
+            key,
+            lambda: self._fetch_and_cache(key, kind, rounded_lat, rounded_lon, api_key)
+        )
+    
+    def _fetch_and_cache(self, key: str, kind: str, lat: float, lon: float, api_key: str) -> Optional[Dict]:
+        # Outra thread pode ter preenchido o cache enquanto aguardávamos
+        cached_response = self.response_cache.get(key)
+        if cached_response is not None:
+            return cached_response
+        
+        self.budget.daily_limit = self._config('WEATHER_API_DAILY_QUOTA', self.budget.daily_limit)
+        if not self.budget.try_consume():
+            self.budget_rejections += 1
+            logger.warning(f"Orçamento diário da API meteorológica esgotado, chamada ignorada: {key}")
+            return None
+        
+        params = {
+            'lat': lat,
+            'lon': lon,
+            'appid': api_key,
+            'units': 'metric',
+            'lang': 'pt'
+        }
+        
+        try:
+            self.api_calls += 1
+            base_url = self._config('WEATHER_API_BASE_URL', None) or self.BASE_URL
+            response = self.api_manager.make_request(
+                self.api_name, 'GET', f"{base_url}/{self.ENDPOINTS[kind]}", params=params
+            )
+        except APIIntegrationException as e:
+            self.api_failures += 1
+            logger.warning(f"Chamada meteorológica bloqueada ({key}): {e}")
+            return None
+        
+        if not response.success:
+            self.api_failures += 1
+            logger.error(f"Erro na requisição da API ({key}): {response.error or response.status_code}")
+            return None
+        
+        data = response.json_data
+        if data:
+            ttl = self._config('WEATHER_FETCH_CACHE_TTL', self.response_cache.default_ttl)
+            self.response_cache.set(key, data, ttl)
+        
+        return data
+    
+    def invalidate(self, lat: float = None, lon: float = None) -> int:
+        """Invalidar respostas em cache (todas ou de uma coordenada)"""
+        if lat is None or lon is None:
+            return self.response_cache.invalidate()
+        
+        rounded_lat, rounded_lon = self._round_coordinates(lat, lon)
+        return sum(
+            self.response_cache.invalidate(f"{kind}:{rounded_lat}:{rounded_lon}")
+            for kind in self.ENDPOINTS
+        )
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Estatísticas da camada de busca"""
+        return {
+            'api_calls': self.api_calls,
+            'api_failures': self.api_failures,
+            'cache_hits': self.response_cache.hits,
+            'cache_misses': self.response_cache.misses,
+            'cached_responses': len(self.response_cache),
+            'coalesced_calls': self.single_flight.coalesced_calls,
+            'budget_rejections': self.budget_rejections,
+            'budget': self.budget.get_status()
+        }
+
+
 # Instância global do gerenciador
 api_manager = APIIntegrationManager()
 weather_api = WeatherAPIIntegration(api_manager)
 ai_api = AIAPIIntegration(api_manager)
 batch_processor = BatchAPIProcessor(api_manager)
+weather_fetch_layer = WeatherFetchLayer(api_manager, weather_api.api_name)
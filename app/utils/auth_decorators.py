@@ -52,6 +52,7 @@ def get_public_routes():
         'auth.register',
         'health.health_check',
         'health.status',
+        'health.prometheus_metrics',
         'migration_web.migrate_interesses_web',
         'migration_web.check_migration'
     ]
@@ -1,157 +1,105 @@
 # app/utils/cache.py
-import redis
 import json
-import pickle
-from datetime import datetime, timedelta
 from functools import wraps
 from flask import current_app
 import hashlib
 import logging
 
+from app.utils.tiered_cache import tiered_cache, LocalCache
+
 logger = logging.getLogger(__name__)
 
 class CacheManager:
-    """Gerenciador de cache Redis"""
+    """Adaptador do cache em camadas (chaves sem namespace explícito)"""
     
     def __init__(self, redis_url=None):
         self.redis_url = redis_url
-        self._redis = None
+        self._memory = None
     
     @property
     def redis(self):
-        """Conexão lazy com Redis"""
-        if self._redis is None:
-            try:
-                # Tentar obter URL do contexto da aplicação se disponível
-                redis_url = self.redis_url
-                try:
-                    from flask import current_app
-                    if current_app:
-                        redis_url = current_app.config.get('REDIS_URL') or self.redis_url
-                except RuntimeError:
-                    # Fora do contexto da aplicação, usar URL fornecida
-                    pass
-                
-                # Verificar se temos uma URL válida (não placeholder)
-                if redis_url and redis_url != '${{Redis.REDIS_URL}}':
-                    self._redis = redis.from_url(
-                        redis_url, 
-                        decode_responses=False,
-                        socket_timeout=10,
-                        socket_connect_timeout=10,
-                        retry_on_timeout=True
-                    )
-                    # Testar conexão com diagnóstico detalhado
-                    try:
-                        result = self._redis.ping()
-                        if result:
-                            logger.info(f"✅ Conexão Redis estabelecida com sucesso via URL: {redis_url.split('@')[1] if '@' in redis_url else redis_url[:30]}...")
-                        else:
-                            raise Exception("Ping retornou False")
-                    except Exception as ping_error:
-                        logger.error(f"❌ Falha no ping Redis: {ping_error}")
-                        raise ping_error
-                else:
-                    logger.info("⚠️ REDIS_URL não configurada, usando cache em memória")
-                    self._redis = InMemoryCache()
-            except Exception as e:
-                logger.error(f"❌ Erro ao conectar com Redis: {e}")
-                logger.info("🔄 Usando cache em memória como fallback")
-                # Fallback para cache em memória
-                self._redis = InMemoryCache()
+        """Cliente Redis do L2, ou InMemoryCache quando não há Redis"""
+        client = tiered_cache.l2
+        if client is not None:
+            return client
         
-        return self._redis
+        # Mantido para quem distingue o modo memória com isinstance
+        if self._memory is None:
+            self._memory = InMemoryCache()
+        return self._memory
     
-    def get(self, key, default=None):
+    def get(self, key, default=None, local=True, namespace=None):
         """Obter valor do cache"""
-        try:
-            value = self.redis.get(key)
-            if value is not None:
-                return pickle.loads(value)
-            return default
-        except Exception as e:
-            logger.error(f"Erro ao obter cache {key}: {e}")
-            return default
-    
-    def set(self, key, value, timeout=3600):
+        return tiered_cache.get(key, namespace, default=default, local=local)
+    
+    def set(self, key, value, timeout=3600, local=True, namespace=None):
         """Definir valor no cache"""
-        try:
-            serialized_value = pickle.dumps(value)
-            self.redis.setex(key, timeout, serialized_value)
-            return True
-        except Exception as e:
-            logger.error(f"Erro ao definir cache {key}: {e}")
-            return False
-    
-    def delete(self, key):
+        return tiered_cache.set(key, value, timeout, namespace, local=local)
+    
+    def get_or_set(self, key, compute, timeout=3600, namespace=None, stale_ttl=0,
+                   early_refresh=True, local=True, refresh=None):
+        """Obter valor ou calculá-lo uma só vez (proteção contra stampede)"""
+        return tiered_cache.get_or_set(key, compute, timeout, namespace, stale_ttl=stale_ttl,
+                                       early_refresh=early_refresh, local=local, refresh=refresh)
+    
+    def delete(self, key, namespace=None):
         """Deletar chave do cache"""
-        try:
-            return self.redis.delete(key)
-        except Exception as e:
-            logger.error(f"Erro ao deletar cache {key}: {e}")
-            return False
+        return tiered_cache.delete(key, namespace)
+    
+    def get_many(self, keys, local=True, namespace=None):
+        """Obter várias chaves (um MGET no Redis); dict apenas com as encontradas"""
+        return tiered_cache.get_many(keys, namespace, local=local)
+    
+    def set_many(self, mapping, timeout=3600, local=True, namespace=None):
+        """Definir vários valores (um pipeline no Redis)"""
+        return tiered_cache.set_many(mapping, timeout, namespace, local=local)
+    
+    def delete_many(self, keys, namespace=None):
+        """Deletar várias chaves (um DEL no Redis)"""
+        return tiered_cache.delete_many(keys, namespace)
+    
+    def clear_namespace(self, namespace):
+        """Invalidar um namespace (nova geração; chaves antigas expiram pelo TTL)"""
+        return tiered_cache.clear_namespace(namespace)
     
     def clear_pattern(self, pattern):
-        """Limpar chaves que correspondem ao padrão"""
-        try:
-            keys = self.redis.keys(pattern)
-            if keys:
-                return self.redis.delete(*keys)
-            return 0
-        except Exception as e:
-            logger.error(f"Erro ao limpar padrão {pattern}: {e}")
-            return 0
+        """Limpar chaves que correspondem ao padrão (Redis em segundo plano)"""
+        return tiered_cache.clear_pattern(pattern)
     
     def get_stats(self):
         """Obter estatísticas do cache"""
-        try:
-            info = self.redis.info()
-            return {
-                'used_memory': info.get('used_memory_human', 'N/A'),
-                'connected_clients': info.get('connected_clients', 0),
-                'total_commands_processed': info.get('total_commands_processed', 0),
-                'keyspace_hits': info.get('keyspace_hits', 0),
-                'keyspace_misses': info.get('keyspace_misses', 0),
-                'hit_rate': self._calculate_hit_rate(info)
-            }
-        except Exception as e:
-            logger.error(f"Erro ao obter estatísticas: {e}")
-            return {}
-    
-    def _calculate_hit_rate(self, info):
-        """Calcular taxa de acerto do cache"""
-        hits = info.get('keyspace_hits', 0)
-        misses = info.get('keyspace_misses', 0)
-        total = hits + misses
-        
-        if total > 0:
-            return round((hits / total) * 100, 2)
-        return 0
+        stats = tiered_cache.get_stats()
+        l2 = stats['l2']
+        stats.update({
+            'used_memory': l2.get('used_memory') or f"{stats['memory_cache_size']} keys",
+            'connected_clients': l2.get('connected_clients', 1),
+            'total_commands_processed': l2.get('total_commands_processed', 0),
+            'keyspace_hits': l2.get('keyspace_hits', 0),
+            'keyspace_misses': l2.get('keyspace_misses', 0)
+        })
+        return stats
 
 class InMemoryCache:
-    """Cache em memória como fallback"""
+    """Cache em memória (interface mínima do cliente Redis) sobre um LRU limitado"""
     
-    def __init__(self):
-        self._cache = {}
-        self._expiry = {}
+    def __init__(self, max_entries=10000, max_bytes=0):
+        self._cache = LocalCache(max_entries, max_bytes)
     
     def get(self, key):
-        if key in self._expiry and datetime.now() > self._expiry[key]:
-            self.delete(key)
-            return None
-        return self._cache.get(key)
+        return self._cache.get(key)[1]
+    
+    def mget(self, keys):
+        found = self._cache.get_many(keys)
+        return [found.get(key) for key in keys]
     
     def setex(self, key, timeout, value):
-        self._cache[key] = value
-        self._expiry[key] = datetime.now() + timedelta(seconds=timeout)
+        self._cache.set(key, value, timeout)
     
-    def delete(self, key):
-        self._cache.pop(key, None)
-        self._expiry.pop(key, None)
-        return 1
+    def delete(self, *keys):
+        return sum(1 for key in keys if self._cache.delete(key))
     
     def keys(self, pattern):
-        # Implementação simples de pattern matching
+        # Padrões exigem percorrer as chaves; get/set/delete são O(1)
         import fnmatch
         return [k for k in self._cache.keys() if fnmatch.fnmatch(k, pattern)]
     
@@ -170,29 +118,50 @@ class InMemoryCache:
 # Instância global do cache
 cache = CacheManager()
 
-def cached(timeout=3600, key_prefix='', vary_on=None):
-    """Decorator para cache de funções"""
+def app_context_task(func, *args, **kwargs):
+    """Função sem argumentos que executa func no app context atual (para outras threads)"""
+    try:
+        app = current_app._get_current_object()
+    except RuntimeError:
+        return lambda: func(*args, **kwargs)
+    
+    def task():
+        with app.app_context():
+            return func(*args, **kwargs)
+    return task
+
+def cached(timeout=3600, key_prefix='', vary_on=None, stale_ttl=0, early_refresh=True):
+    """
+    Decorator para cache de funções
+    
+    O key_prefix é o namespace das chaves (ou, sem prefixo, o nome
+    qualificado da função); clear_cache invalida esse namespace.
+    Falhas concorrentes da mesma chave calculam o valor uma só vez.
+    
+    stale_ttl > 0 serve o valor expirado durante esse período enquanto é
+    recalculado em segundo plano; usar apenas em funções que não dependem
+    do request nem de current_user.
+    """
     def decorator(func):
+        namespace = key_prefix or f"{func.__module__}.{func.__name__}"
+        
         @wraps(func)
         def wrapper(*args, **kwargs):
             # Gerar chave do cache
             cache_key = _generate_cache_key(func, key_prefix, args, kwargs, vary_on)
             
-            # Tentar obter do cache
-            cached_result = cache.get(cache_key)
-            if cached_result is not None:
-                logger.debug(f"Cache hit para {cache_key}")
-                return cached_result
-            
-            # Executar função e cachear resultado
-            logger.debug(f"Cache miss para {cache_key}")
-            result = func(*args, **kwargs)
-            
-            cache.set(cache_key, result, timeout)
-            return result
+            return cache.get_or_set(
+                cache_key,
+                lambda: func(*args, **kwargs),
+                timeout,
+                namespace=namespace,
+                stale_ttl=stale_ttl,
+                early_refresh=early_refresh,
+                refresh=app_context_task(func, *args, **kwargs) if stale_ttl else None
+            )
         
         # Adicionar método para limpar cache
-        wrapper.clear_cache = lambda: cache.clear_pattern(f"{key_prefix}:{func.__name__}:*")
+        wrapper.clear_cache = lambda: cache.clear_namespace(namespace)
         
         return wrapper
     return decorator
@@ -210,9 +179,9 @@ def cache_ai_recommendations(user_id, timeout=3600):
     return cached(timeout=timeout, key_prefix=f"ai_rec:{user_id}")
 
 def _generate_cache_key(func, prefix, args, kwargs, vary_on):
-    """Gerar chave única para cache"""
+    """Gerar chave única para cache (o prefixo vai no namespace)"""
     # Criar string base
-    base_string = f"{prefix}:{func.__module__}:{func.__name__}"
+    base_string = f"{func.__module__}:{func.__name__}"
     
     # Adicionar argumentos se especificado
     if vary_on:
@@ -233,7 +202,7 @@ def _generate_cache_key(func, prefix, args, kwargs, vary_on):
     # Gerar hash para chaves muito longas
     if len(base_string) > 200:
         hash_object = hashlib.md5(base_string.encode())
-        return f"{prefix}:hash:{hash_object.hexdigest()}"
+        return f"hash:{hash_object.hexdigest()}"
     
     return base_string
 
@@ -252,11 +221,9 @@ class WeatherCache:
     def invalidate_weather_cache(self, lat=None, lng=None):
         """Invalidar cache meteorológico"""
         if lat and lng:
-            pattern = f"weather:*lat={lat}*lng={lng}*"
-        else:
-            pattern = "weather:*"
+            return cache.clear_pattern(f"weather:*lat={lat}*lng={lng}*")
         
-        return cache.clear_pattern(pattern)
+        return cache.clear_namespace("weather")
 
 class UserDataCache:
     """Cache especializado para dados do usuário"""
@@ -265,24 +232,25 @@ class UserDataCache:
         self.cache_timeout = 1800  # 30 minutos
     
     def get_user_cultures(self, user_id):
-        """Obter culturas do usuário com cache"""
+        """Obter culturas do usuário (dicts) com cache"""
         @cache_user_data(user_id, timeout=self.cache_timeout)
         def _get_cultures():
             from app.models import Culture
-            return Culture.query.filter_by(user_id=user_id).all()
+            # Dicts e não objetos ORM: o cache não guarda instâncias ligadas à sessão
+            return [culture.to_dict() for culture in Culture.query.filter_by(user_id=user_id).all()]
         
         return _get_cultures()
     
     def get_user_recommendations(self, user_id):
-        """Obter recomendações do usuário com cache"""
+        """Obter recomendações do usuário (dicts) com cache"""
         @cache_ai_recommendations(user_id, timeout=3600)
         def _get_recommendations():
             try:
                 from app.models.ai import Recommendation, RecommendationStatus
-                return Recommendation.query.filter_by(
+                return [recommendation.to_dict() for recommendation in Recommendation.query.filter_by(
                     user_id=user_id,
                     status=RecommendationStatus.ACTIVE
-                ).limit(10).all()
+                ).limit(10).all()]
             except ImportError:
                 # Fallback se modelo AI não existir
                 logger.warning("Modelo AI não encontrado, retornando lista vazia")
@@ -291,17 +259,16 @@ class UserDataCache:
         return _get_recommendations()
     
     def invalidate_user_cache(self, user_id):
-        """Invalidar cache do usuário"""
-        patterns = [
-            f"user:{user_id}:*",
-            f"ai_rec:{user_id}:*"
+        """Invalidar cache do usuário (devolve o número de namespaces invalidados)"""
+        namespaces = [
+            f"user:{user_id}",
+            f"ai_rec:{user_id}"
         ]
         
-        total_deleted = 0
-        for pattern in patterns:
-            total_deleted += cache.clear_pattern(pattern)
+        for namespace in namespaces:
+            cache.clear_namespace(namespace)
         
-        return total_deleted
+        return len(namespaces)
 
 # Instâncias especializadas
 weather_cache = WeatherCache()
@@ -0,0 +1,335 @@
+# app/utils/cache_metrics.py
+"""
+Métricas do cache
+
+Histogramas de latência por namespace, o relatório único usado pelas rotas
+de estatísticas (/cache/stats e /api/performance/cache/stats) e a exportação
+no formato de texto do Prometheus (rota /metrics, ver monitoring/prometheus.yml).
+
+Os contadores exportados são somados entre os workers do servidor através de
+um arquivo por processo (ProcessCounterFiles), pelo que rate() no Prometheus
+não depende do worker que atende cada scrape.
+"""
+import os
+import json
+import time
+import atexit
+import bisect
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+METRIC_PREFIX = 'agrotech_cache'
+
+
+class LatencyHistogram:
+    """Histograma de latências com buckets fixos (em segundos, como no Prometheus)"""
+    
+    BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+    
+    def __init__(self):
+        self.counts = [0] * (len(self.BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+    
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(self.BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+    
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """Buckets acumulados [(le, contagem)], incluindo +Inf"""
+        result = []
+        total = 0
+        for bound, count in zip(self.BUCKETS + (float('inf'),), self.counts):
+            total += count
+            result.append(('+Inf' if bound == float('inf') else repr(bound), total))
+        return result
+    
+    def quantile(self, fraction: float) -> float:
+        """Limite superior do bucket que contém o quantil (segundos)"""
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        total = 0
+        for bound, count in zip(self.BUCKETS, self.counts):
+            total += count
+            if total >= target:
+                return bound
+        return self.BUCKETS[-1]
+    
+    def summary(self) -> Dict[str, Any]:
+        return {
+            'count': self.count,
+            'avg_ms': round(self.sum / self.count * 1000, 3) if self.count else 0,
+            'p50_ms': round(self.quantile(0.5) * 1000, 3),
+            'p99_ms': round(self.quantile(0.99) * 1000, 3)
+        }
+    
+    def copy(self) -> 'LatencyHistogram':
+        histogram = LatencyHistogram()
+        histogram.counts = list(self.counts)
+        histogram.sum = self.sum
+        histogram.count = self.count
+        return histogram
+
+
+def _merge(total: Dict[str, Any], values: Dict[str, Any]):
+    """Somar contadores aninhados (dicts, listas de buckets e números)"""
+    for key, value in values.items():
+        if isinstance(value, dict):
+            _merge(total.setdefault(key, {}), value)
+        elif isinstance(value, list):
+            current = total.get(key) or [0] * len(value)
+            total[key] = [a + b for a, b in zip(current, value)]
+        else:
+            total[key] = total.get(key, 0) + value
+
+
+class ProcessCounterFiles:
+    """
+    Contadores do cache somados entre processos
+    
+    Como no modo multiprocesso do prometheus_client, cada worker grava os
+    seus contadores em <pid>.json no diretório CACHE_METRICS_DIR (a cada
+    CACHE_METRICS_PUBLISH_INTERVAL segundos e à saída) e o /metrics soma
+    todos os arquivos. Os arquivos de workers terminados (ex: --max-requests
+    do gunicorn) são somados a dead.json, para que os totais nunca recuem;
+    os medidores (ocupação do L1) somam apenas os processos vivos.
+    """
+    
+    DEAD_FILE = 'dead.json'
+    LOCK_FILE = '.lock'
+    
+    def __init__(self, directory: str = None, interval: float = 10.0):
+        self.directory = directory
+        self.interval = interval
+        self._started = False
+    
+    def init_app(self, app):
+        """Configurar o diretório e publicar periodicamente em segundo plano"""
+        self.directory = app.config.get('CACHE_METRICS_DIR') or os.path.join(app.instance_path, 'cache_metrics')
+        self.interval = app.config.get('CACHE_METRICS_PUBLISH_INTERVAL', self.interval)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+        except OSError as e:
+            logger.warning(f"Métricas do cache apenas deste processo ({self.directory}): {e}")
+            self.directory = None
+            return
+        
+        if not self._started and not app.config.get('TESTING', False):
+            self._started = True
+            threading.Thread(target=self._publish_loop, name='cache-metrics', daemon=True).start()
+            atexit.register(self.publish)
+    
+    def _publish_loop(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.publish()
+            except Exception as e:
+                logger.warning(f"Erro ao publicar métricas do cache: {e}")
+    
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+    
+    def _read(self, name: str) -> Dict[str, Any]:
+        try:
+            with open(self._path(name)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _write(self, name: str, data: Dict[str, Any]):
+        path = self._path(name)
+        with open(f"{path}.tmp", 'w') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(f"{path}.tmp", path)
+    
+    @contextmanager
+    def _file_lock(self):
+        with open(self._path(self.LOCK_FILE), 'a') as lock_file:
+            try:
+                import fcntl
+            except ImportError:
+                yield
+                return
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+    
+    @staticmethod
+    def _alive(pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+    
+    def publish(self):
+        """Gravar os contadores deste processo"""
+        if not self.directory:
+            return
+        from app.utils.tiered_cache import tiered_cache
+        self._write(f"{os.getpid()}.json", tiered_cache.get_counters())
+    
+    def _compact_dead(self, names: List[str]) -> List[str]:
+        """Somar a dead.json os arquivos de processos terminados (só POSIX)"""
+        if os.name != 'posix':
+            return names
+        
+        dead_names = [
+            name for name in names
+            if name[:-5].isdigit() and int(name[:-5]) != os.getpid() and not self._alive(int(name[:-5]))
+        ]
+        if not dead_names:
+            return names
+        
+        dead = self._read(self.DEAD_FILE)
+        for name in dead_names:
+            data = self._read(name)
+            data.pop('gauges', None)
+            _merge(dead, data)
+        self._write(self.DEAD_FILE, dead)
+        for name in dead_names:
+            try:
+                os.remove(self._path(name))
+            except OSError:
+                pass
+        return [name for name in names if name not in dead_names] + [self.DEAD_FILE]
+    
+    def collect(self) -> Dict[str, Any]:
+        """Contadores somados de todos os processos e medidores dos processos vivos"""
+        if not self.directory:
+            from app.utils.tiered_cache import tiered_cache
+            return tiered_cache.get_counters()
+        
+        self.publish()
+        totals = {}
+        gauges = {}
+        with self._file_lock():
+            names = [name for name in os.listdir(self.directory) if name.endswith('.json')]
+            for name in set(self._compact_dead(names)):
+                data = self._read(name)
+                process_gauges = data.pop('gauges', None)
+                _merge(totals, data)
+                if process_gauges and name != self.DEAD_FILE:
+                    _merge(gauges, process_gauges)
+        totals['gauges'] = gauges
+        return totals
+
+
+# Contadores partilhados entre os workers
+process_counters = ProcessCounterFiles()
+
+
+def build_cache_report(hot_keys: int = 10) -> Dict[str, Any]:
+    """
+    Estatísticas completas do cache (mesma vista em todas as rotas)
+    
+    Inclui os contadores por namespace, latências, chaves mais lidas e
+    maiores, o aquecimento, a memoização por pedido e o cache de IA.
+    """
+    from flask import current_app
+    from app.utils.tiered_cache import tiered_cache
+    from app.services.cache_warmer import cache_warmer
+    from app.utils.request_memo import get_request_memo_stats
+    
+    stats = tiered_cache.get_stats()
+    stats['cache_enabled'] = current_app.config.get('CACHE_ENABLED', False)
+    stats['hot_keys'] = [{'key': key, 'reads': reads} for key, reads in tiered_cache.hot_keys(hot_keys)]
+    stats['warming'] = cache_warmer.get_stats()
+    stats['request_memo'] = get_request_memo_stats()['totals']
+    
+    # Estatísticas do namespace de IA completadas pelas do serviço
+    from app.services.ai_service import AIService
+    namespace_stats = stats.setdefault('namespaces', {})
+    namespace_stats['ai'] = {**namespace_stats.get('ai', {}), **AIService.get_ai_cache_stats()}
+    return stats
+
+
+def _label(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_prometheus() -> str:
+    """
+    Métricas do cache no formato de texto do Prometheus, somadas entre os
+    processos (as chaves mais lidas e maiores ficam apenas em /cache/stats,
+    que exige login, por conterem IDs de usuários)
+    """
+    from app.utils.tiered_cache import tiered_cache
+    
+    counters = process_counters.collect()
+    lines = []
+    
+    def metric(name: str, kind: str, help_text: str, samples):
+        full_name = f"{METRIC_PREFIX}_{name}"
+        lines.append(f"# HELP {full_name} {help_text}")
+        lines.append(f"# TYPE {full_name} {kind}")
+        for labels, value, suffix in samples:
+            label_text = ','.join(f'{key}="{_label(val)}"' for key, val in labels.items())
+            lines.append(f"{full_name}{suffix}{{{label_text}}} {value}" if label_text else f"{full_name}{suffix} {value}")
+    
+    namespaces = {
+        ns: {field: values.get(field, 0) for field in ('hits',) + tiered_cache.NAMESPACE_COUNTERS}
+        for ns, values in counters.get('namespaces', {}).items()
+    }
+    gauges = counters.get('gauges', {})
+    metric('requests_total', 'counter', 'Leituras do cache por resultado', [
+        ({'namespace': ns, 'result': result}, values[field], '')
+        for ns, values in namespaces.items()
+        for result, field in (('l1_hit', 'l1_hits'), ('l2_hit', 'l2_hits'), ('miss', 'misses'))
+    ])
+    for name, field, help_text in (
+        ('sets_total', 'sets', 'Escritas no cache'),
+        ('deletes_total', 'deletes', 'Remoções de chaves'),
+        ('errors_total', 'errors', 'Erros do cache'),
+        ('invalidations_total', 'invalidations', 'Invalidações de namespace'),
+        ('written_bytes_total', 'bytes_written', 'Bytes serializados escritos'),
+    ):
+        metric(name, 'counter', help_text, [({'namespace': ns}, values[field], '') for ns, values in namespaces.items()])
+    metric('l1_evictions_total', 'counter', 'Entradas removidas do L1 (lru: limite; ttl: expiradas)', [
+        ({'namespace': ns, 'reason': reason}, values[field], '')
+        for ns, values in namespaces.items()
+        for reason, field in (('lru', 'evictions'), ('ttl', 'expirations'))
+    ])
+    metric('l1_entries', 'gauge', 'Entradas no L1 (soma dos processos ativos)', [
+        ({'namespace': ns}, value, '') for ns, value in sorted(gauges.get('l1_entries', {}).items())
+    ])
+    metric('l1_bytes', 'gauge', 'Bytes no L1 (soma dos processos ativos)', [
+        ({'namespace': ns}, value, '') for ns, value in sorted(gauges.get('l1_bytes', {}).items())
+    ])
+    metric('hit_ratio', 'gauge', 'Taxa de acerto acumulada (0-1)', [
+        ({'namespace': ns}, round(values['hits'] / (values['hits'] + values['misses']), 4)
+         if values['hits'] + values['misses'] else 0, '')
+        for ns, values in namespaces.items()
+    ])
+    
+    samples = []
+    for name, values in sorted(counters.get('latency', {}).items()):
+        operation, ns = name.split('|', 1)
+        histogram = LatencyHistogram()
+        histogram.counts = values['counts']
+        histogram.sum = values['sum']
+        histogram.count = values['count']
+        labels = {'namespace': ns, 'operation': operation}
+        for bound, count in histogram.cumulative():
+            samples.append(({**labels, 'le': bound}, count, '_bucket'))
+        samples.append((labels, repr(histogram.sum), '_sum'))
+        samples.append((labels, histogram.count, '_count'))
+    metric('operation_duration_seconds', 'histogram', 'Latência de get/set do cache', samples)
+    
+    metric('stampede_total', 'counter', 'Eventos da proteção contra stampede', [
+        ({'event': event}, value, '') for event, value in sorted(counters.get('stampede', {}).items())
+    ])
+    metric('redis_connected', 'gauge', 'L2 (Redis) ligado', [({}, int(tiered_cache.l2 is not None), '')])
+    
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,185 @@
+# app/utils/cache_serializer.py
+"""
+Serialização das entradas do cache
+
+Cada entrada guarda um cabeçalho de 2 bytes (versão do esquema + flags) seguido
+do conteúdo em msgpack (se instalado) ou JSON compacto, comprimido com zlib
+acima de um limiar. Só dados simples são aceites: modelos são convertidos
+explicitamente para dict (to_dict ou conversor registado) e nada é guardado
+com pickle, pelo que uma entrada nunca devolve objetos ORM destacados.
+"""
+import json
+import time
+import zlib
+import logging
+import threading
+from datetime import date, datetime, time as dt_time
+from decimal import Decimal
+from enum import Enum
+from typing import Any, Callable, Dict
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class CacheSerializationError(ValueError):
+    """Valor que não pode ser guardado ou entrada que não pode ser lida"""
+
+
+class CacheSerializer:
+    """
+    Serializador versionado das entradas do cache
+    
+    Formato: [versão][flags][conteúdo]; flags indicam o codec (msgpack/JSON)
+    e a compressão. Entradas com outra versão (ex: pickle antigo) são
+    rejeitadas e tratadas como ausentes.
+    """
+    
+    SCHEMA_VERSION = 1
+    
+    FLAG_MSGPACK = 0x01
+    FLAG_ZLIB = 0x02
+    
+    # Conversores explícitos de modelos sem to_dict()
+    _converters: Dict[type, Callable[[Any], Any]] = {}
+    
+    def __init__(self, codec: str = 'auto', compress_threshold: int = 1024, compress_level: int = 6):
+        """
+        Args:
+            codec: 'msgpack', 'json' ou 'auto' (msgpack se instalado)
+            compress_threshold: Bytes a partir dos quais o conteúdo é comprimido (0 desliga)
+            compress_level: Nível do zlib
+        """
+        self.codec = codec
+        self.compress_threshold = compress_threshold
+        self.compress_level = compress_level
+        self._lock = threading.Lock()
+        self._stats = {
+            'encoded': 0,
+            'decoded': 0,
+            'encode_seconds': 0.0,
+            'decode_seconds': 0.0,
+            'raw_bytes': 0,
+            'stored_bytes': 0,
+            'compressed': 0,
+            'rejected': 0
+        }
+    
+    @property
+    def use_msgpack(self) -> bool:
+        return MSGPACK_AVAILABLE and self.codec in ('auto', 'msgpack')
+    
+    @classmethod
+    def register(cls, model: type, converter: Callable[[Any], Any]):
+        """Registar o conversor para dict de um tipo sem to_dict()"""
+        cls._converters[model] = converter
+    
+    @classmethod
+    def to_plain(cls, value: Any) -> Any:
+        """Conversão de tipos não nativos (hook 'default' do codec)"""
+        for model, converter in cls._converters.items():
+            if isinstance(value, model):
+                return converter(value)
+        if hasattr(value, 'to_dict') and callable(value.to_dict):
+            return value.to_dict()
+        if isinstance(value, (datetime, date, dt_time)):
+            return value.isoformat()
+        if isinstance(value, Decimal):
+            return float(value)
+        if isinstance(value, Enum):
+            return value.value
+        if isinstance(value, (set, frozenset)):
+            return list(value)
+        raise CacheSerializationError(f"Tipo não serializável no cache: {type(value).__name__}")
+    
+    def dumps(self, value: Any) -> bytes:
+        """Serializar um valor (CacheSerializationError se não for possível)"""
+        started = time.perf_counter()
+        flags = 0
+        try:
+            if self.use_msgpack:
+                payload = msgpack.packb(value, default=self.to_plain, use_bin_type=True)
+                flags |= self.FLAG_MSGPACK
+            else:
+                payload = json.dumps(value, default=self.to_plain, separators=(',', ':'),
+                                     ensure_ascii=False).encode('utf-8')
+        except CacheSerializationError:
+            with self._lock:
+                self._stats['rejected'] += 1
+            raise
+        except (TypeError, ValueError, OverflowError) as e:
+            with self._lock:
+                self._stats['rejected'] += 1
+            raise CacheSerializationError(str(e)) from e
+        
+        raw_size = len(payload)
+        if self.compress_threshold and raw_size >= self.compress_threshold:
+            compressed = zlib.compress(payload, self.compress_level)
+            if len(compressed) < raw_size:
+                payload = compressed
+                flags |= self.FLAG_ZLIB
+        
+        data = bytes((self.SCHEMA_VERSION, flags)) + payload
+        
+        with self._lock:
+            self._stats['encoded'] += 1
+            self._stats['encode_seconds'] += time.perf_counter() - started
+            self._stats['raw_bytes'] += raw_size
+            self._stats['stored_bytes'] += len(data)
+            if flags & self.FLAG_ZLIB:
+                self._stats['compressed'] += 1
+        return data
+    
+    def loads(self, data: bytes) -> Any:
+        """Ler uma entrada (CacheSerializationError se a versão ou o formato não servirem)"""
+        started = time.perf_counter()
+        if len(data) < 2 or data[0] != self.SCHEMA_VERSION:
+            raise CacheSerializationError("Versão de entrada do cache desconhecida")
+        
+        flags = data[1]
+        payload = data[2:]
+        try:
+            if flags & self.FLAG_ZLIB:
+                payload = zlib.decompress(payload)
+            if flags & self.FLAG_MSGPACK:
+                if not MSGPACK_AVAILABLE:
+                    raise CacheSerializationError("Entrada em msgpack sem msgpack instalado")
+                value = msgpack.unpackb(payload, raw=False, strict_map_key=False)
+            else:
+                value = json.loads(payload)
+        except CacheSerializationError:
+            raise
+        except Exception as e:
+            raise CacheSerializationError(str(e)) from e
+        
+        with self._lock:
+            self._stats['decoded'] += 1
+            self._stats['decode_seconds'] += time.perf_counter() - started
+        return value
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Tamanhos e tempos de serialização"""
+        with self._lock:
+            stats = dict(self._stats)
+        
+        encoded = stats['encoded']
+        decoded = stats['decoded']
+        return {
+            'codec': 'msgpack' if self.use_msgpack else 'json',
+            'schema_version': self.SCHEMA_VERSION,
+            'compress_threshold': self.compress_threshold,
+            'encoded': encoded,
+            'decoded': decoded,
+            'rejected': stats['rejected'],
+            'compressed': stats['compressed'],
+            'avg_encode_us': round(stats['encode_seconds'] / encoded * 1e6, 1) if encoded else 0,
+            'avg_decode_us': round(stats['decode_seconds'] / decoded * 1e6, 1) if decoded else 0,
+            'avg_raw_bytes': round(stats['raw_bytes'] / encoded, 1) if encoded else 0,
+            'avg_stored_bytes': round(stats['stored_bytes'] / encoded, 1) if encoded else 0,
+            'compression_ratio': round(stats['stored_bytes'] / stats['raw_bytes'], 3) if stats['raw_bytes'] else 1
+        }
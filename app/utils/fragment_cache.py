@@ -0,0 +1,131 @@
+# app/utils/fragment_cache.py
+"""
+Cache de fragmentos HTML renderizados
+
+Cada fragmento é guardado por (template, âmbito, versão dos dados): o âmbito
+é o usuário ou um recurso partilhado (ex: localização do clima) e a versão é
+um hash dos dados, pelo que dados alterados geram uma chave nova sem
+necessidade de invalidação explícita.
+
+Uma página com várias secções pode ler todos os fragmentos de uma vez com
+prefetch (um único MGET) antes de os renderizar.
+"""
+import json
+import hashlib
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+from flask import g, has_request_context
+
+from app.utils.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+class FragmentCache:
+    """Fragmentos renderizados no cache partilhado, com contadores por template"""
+    
+    def __init__(self, prefix: str = 'fragment', ttl: int = 600):
+        self.prefix = prefix
+        self.ttl = ttl
+        self._stats = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def data_version(data: Any) -> str:
+        """Hash curto do conteúdo dos dados"""
+        content = json.dumps(data, sort_keys=True, default=str, separators=(',', ':'))
+        return hashlib.md5(content.encode()).hexdigest()[:12]
+    
+    def _record(self, name: str, hit: bool):
+        with self._lock:
+            stats = self._stats.setdefault(name, {'hits': 0, 'misses': 0})
+            stats['hits' if hit else 'misses'] += 1
+    
+    def make_key(self, name: str, scope: str, data: Any, version: Optional[str] = None) -> str:
+        return f"{self.prefix}:{name}:{scope}:{version or self.data_version(data)}"
+    
+    def prefetch(self, fragments: Iterable[Tuple[str, str, Any, Optional[str]]]) -> int:
+        """
+        Ler de uma vez os fragmentos que o pedido vai renderizar
+        
+        O resultado (encontrados e em falta) fica no pedido atual e
+        get_or_render usa-o sem nova leitura do cache.
+        
+        Args:
+            fragments: (nome, âmbito, dados, versão) como em get_or_render
+        
+        Returns:
+            Número de fragmentos encontrados
+        """
+        if not has_request_context():
+            return 0
+        
+        keys = [self.make_key(*fragment) for fragment in fragments]
+        found = cache.get_many(keys)
+        prefetched = g.setdefault('_fragment_prefetch', {})
+        for key in keys:
+            prefetched[key] = found.get(key)
+        return len(found)
+    
+    def get_or_render(self, name: str, scope: str, data: Any, render: Callable[[], str],
+                      version: Optional[str] = None) -> str:
+        """
+        Obter o fragmento do cache ou renderizá-lo e guardá-lo
+        
+        Args:
+            name: Nome do template/fragmento
+            scope: 'user:<id>' ou um âmbito partilhado (ex: 'location:<id>')
+            data: Dados usados na renderização (para a versão)
+            render: Função que renderiza o fragmento
+            version: Versão explícita (senão hash dos dados)
+        """
+        key = self.make_key(name, scope, data, version)
+        
+        prefetched = g.get('_fragment_prefetch') if has_request_context() else None
+        if prefetched is not None and key in prefetched:
+            html = prefetched.pop(key)
+        else:
+            html = cache.get(key)
+        if html is not None:
+            self._record(name, True)
+            return html
+        
+        self._record(name, False)
+        html = str(render())
+        cache.set(key, html, self.ttl)
+        return html
+    
+    def clear(self) -> int:
+        """
+        Remover todos os fragmentos (ex: após alterar templates)
+        
+        Returns:
+            Número de fragmentos removidos da memória (Redis em segundo plano)
+        """
+        return cache.clear_pattern(f"{self.prefix}:*")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Taxa de acerto por fragmento e total"""
+        with self._lock:
+            fragments = {name: dict(stats) for name, stats in self._stats.items()}
+        
+        total_hits = 0
+        total_misses = 0
+        for stats in fragments.values():
+            requests = stats['hits'] + stats['misses']
+            stats['hit_ratio'] = round(stats['hits'] / requests, 4) if requests else 0
+            total_hits += stats['hits']
+            total_misses += stats['misses']
+        
+        total = total_hits + total_misses
+        return {
+            'hits': total_hits,
+            'misses': total_misses,
+            'hit_ratio': round(total_hits / total, 4) if total else 0,
+            'fragments': fragments
+        }
+
+
+# Instância global do cache de fragmentos
+fragment_cache = FragmentCache()
@@ -0,0 +1,131 @@
+# app/utils/request_memo.py
+"""
+Memoização por pedido
+
+Durante um pedido os mesmos dados são carregados por vários serviços
+(usuário, preferências de alerta, culturas da base de conhecimento,
+localizações climáticas). O decorador request_memo guarda o resultado em
+flask.g, pelo que chamadas repetidas com os mesmos argumentos no mesmo
+pedido não voltam a consultar o banco; tudo é descartado no fim do pedido.
+Fora de um pedido (jobs, CLI, aquecimento do cache) a função é sempre
+executada.
+"""
+import logging
+import threading
+from functools import wraps
+from typing import Any, Callable, Dict, Optional
+from flask import Flask, g, has_request_context
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+# Totais do processo (expostos no relatório do cache)
+_totals = {'requests': 0, 'hits': 0, 'misses': 0}
+_totals_lock = threading.Lock()
+
+
+def _store() -> Dict[str, Any]:
+    store = g.get('_request_memo')
+    if store is None:
+        store = {'values': {}, 'hits': 0, 'misses': 0, 'functions': {}}
+        g._request_memo = store
+    return store
+
+
+def request_memo(key_func: Optional[Callable[..., Any]] = None, name: Optional[str] = None):
+    """
+    Memoizar o resultado de uma função durante o pedido atual
+    
+    Resultados None também são memoizados. Argumentos não hasheáveis fazem
+    a chamada passar sem memoização.
+    
+    Args:
+        key_func: Recebe os mesmos argumentos e devolve a chave (ex: para
+            normalizar nomes ou ignorar self); por omissão args + kwargs
+        name: Nome da função nas estatísticas (padrão: módulo.qualname)
+    
+    A função decorada ganha forget() para descartar os seus resultados no
+    pedido atual (ex: depois de uma escrita que os altera).
+    """
+    def decorator(func):
+        func_name = name or f"{func.__module__}.{func.__qualname__}"
+        
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not has_request_context():
+                return func(*args, **kwargs)
+            
+            try:
+                key = (func_name, key_func(*args, **kwargs) if key_func else (args, frozenset(kwargs.items())))
+                hash(key)
+            except TypeError:
+                return func(*args, **kwargs)
+            
+            store = _store()
+            value = store['values'].get(key, _MISSING)
+            if value is not _MISSING:
+                store['hits'] += 1
+                store['functions'][func_name] = store['functions'].get(func_name, 0) + 1
+                return value
+            
+            store['misses'] += 1
+            value = func(*args, **kwargs)
+            store['values'][key] = value
+            return value
+        
+        def forget():
+            if has_request_context() and g.get('_request_memo') is not None:
+                values = g._request_memo['values']
+                for key in [key for key in values if key[0] == func_name]:
+                    del values[key]
+        
+        wrapper.forget = forget
+        return wrapper
+    return decorator
+
+
+def get_request_memo_stats() -> Dict[str, Any]:
+    """Chamadas evitadas no pedido atual e totais do processo"""
+    current = None
+    if has_request_context() and g.get('_request_memo') is not None:
+        store = g._request_memo
+        current = {
+            'hits': store['hits'],
+            'misses': store['misses'],
+            'functions': dict(store['functions'])
+        }
+    
+    with _totals_lock:
+        totals = dict(_totals)
+    calls = totals['hits'] + totals['misses']
+    totals['avoided_rate'] = round(totals['hits'] / calls * 100, 2) if calls else 0
+    return {'current_request': current, 'totals': totals}
+
+
+def init_app(app: Flask):
+    """Registar o descarte no fim do pedido e o contador de depuração"""
+    
+    @app.after_request
+    def _request_memo_header(response):
+        store = g.get('_request_memo')
+        if store is not None and app.debug:
+            response.headers['X-Request-Memo-Avoided'] = str(store['hits'])
+        return response
+    
+    @app.teardown_request
+    def _request_memo_teardown(exc):
+        store = g.pop('_request_memo', None)
+        if store is None:
+            return
+        
+        with _totals_lock:
+            _totals['requests'] += 1
+            _totals['hits'] += store['hits']
+            _totals['misses'] += store['misses']
+        
+        if store['hits']:
+            logger.debug(
+                f"Memo do pedido: {store['hits']} chamadas repetidas evitadas "
+                f"({store['misses']} executadas) {store['functions']}"
+            )
@@ -0,0 +1,1274 @@
+# app/utils/tiered_cache.py
+"""
+Cache em camadas da aplicação
+
+L1: cache por processo, limitado em entradas e bytes (LRU com TTL curto).
+L2: Redis partilhado entre workers, quando REDIS_URL estiver configurado.
+
+Todas as chaves seguem o esquema '{prefixo}{namespace}:v{gerações}:{chave}'
+e todas as leituras contam para as mesmas estatísticas; app.utils.cache e
+app.utils.cache_manager são apenas adaptadores sobre esta instância.
+
+Invalidar um namespace incrementa o seu contador de geração (INCR no Redis):
+as chaves antigas deixam de ser lidas e expiram pelo TTL, sem KEYS/DELETE.
+Namespaces hierárquicos ('culture:user_5') incluem a geração de cada nível,
+pelo que invalidar 'culture' invalida também todos os 'culture:*'.
+
+Os valores são guardados serializados (CacheSerializer) em ambos os níveis.
+"""
+import os
+import sys
+import math
+import time
+import heapq
+import uuid
+import pickle
+import random
+import fnmatch
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from app.utils.cache_serializer import CacheSerializer, CacheSerializationError
+from app.utils.cache_metrics import LatencyHistogram
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL_PLACEHOLDER = '${{Redis.REDIS_URL}}'
+
+
+class LocalCache:
+    """
+    L1: LRU limitado por número de entradas e por bytes, com TTL por entrada
+    
+    get/set/eviction em O(1) (OrderedDict); as expirações ficam num heap
+    ordenado por prazo e são removidas em cada set em O(log n) amortizado,
+    sem varrer o dicionário.
+    """
+    
+    def __init__(self, max_entries: int = 2000, max_bytes: int = 0, on_evict: Callable[[str, str], None] = None):
+        """
+        Args:
+            max_entries: Número máximo de entradas
+            max_bytes: Bytes máximos (0 sem limite)
+            on_evict: Chamada com (chave, 'evictions' ou 'expirations') a cada remoção automática
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.on_evict = on_evict
+        self._entries = OrderedDict()
+        self._expiry_heap = []
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+    
+    @staticmethod
+    def estimate_size(value: Any) -> int:
+        """Tamanho aproximado em bytes (serializado)"""
+        if isinstance(value, (bytes, bytearray, str)):
+            return len(value)
+        try:
+            return len(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            return sys.getsizeof(value)
+    
+    def get(self, key: str):
+        """Devolve (encontrado, valor)"""
+        with self._lock:
+            return self._get_locked(key, time.monotonic())
+    
+    def get_many(self, keys) -> Dict[str, Any]:
+        """Entradas encontradas de várias chaves (um único lock)"""
+        found = {}
+        with self._lock:
+            now = time.monotonic()
+            for key in keys:
+                hit, value = self._get_locked(key, now)
+                if hit:
+                    found[key] = value
+        return found
+    
+    def _get_locked(self, key: str, now: float):
+        # Chamado com _lock
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        
+        expires_at, value, size = entry
+        if expires_at <= now:
+            del self._entries[key]
+            self._bytes -= size
+            self.expirations += 1
+            if self.on_evict:
+                self.on_evict(key, 'expirations')
+            return False, None
+        
+        self._entries.move_to_end(key)
+        return True, value
+    
+    def set(self, key: str, value: Any, ttl: float, size: int = None):
+        """
+        Guardar uma entrada
+        
+        Args:
+            key: Chave completa
+            value: Valor
+            ttl: Segundos até expirar
+            size: Tamanho em bytes, se já conhecido (ex: valor serializado para o L2)
+        """
+        self.set_many([(key, value, size)], ttl)
+    
+    def set_many(self, entries, ttl: float):
+        """
+        Guardar várias entradas com o mesmo TTL (um único lock e uma única
+        passagem de expiração/eviction)
+        
+        Args:
+            entries: Lista de (chave, valor, tamanho ou None)
+            ttl: Segundos até expirar
+        """
+        entries = [
+            (key, value, self.estimate_size(value) if self.max_bytes else 0) if size is None else (key, value, size)
+            for key, value, size in entries
+        ]
+        
+        with self._lock:
+            now = time.monotonic()
+            expires_at = now + ttl
+            for key, value, size in entries:
+                previous = self._entries.pop(key, None)
+                if previous is not None:
+                    self._bytes -= previous[2]
+                
+                # Valores maiores do que o L1 inteiro não são guardados
+                if self.max_bytes and size > self.max_bytes:
+                    continue
+                
+                self._entries[key] = (expires_at, value, size)
+                self._bytes += size
+                heapq.heappush(self._expiry_heap, (expires_at, key))
+            
+            self._remove_expired(now)
+            while len(self._entries) > self.max_entries or (self.max_bytes and self._bytes > self.max_bytes):
+                evicted_key, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+                if self.on_evict:
+                    self.on_evict(evicted_key, 'evictions')
+            
+            # Entradas do heap já substituídas ou removidas acumulam-se; reconstruir de vez em quando
+            if len(self._expiry_heap) > 2 * len(self._entries) + 64:
+                self._expiry_heap = [(entry[0], entry_key) for entry_key, entry in self._entries.items()]
+                heapq.heapify(self._expiry_heap)
+    
+    def _remove_expired(self, now: float):
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now:
+            expires_at, key = heapq.heappop(heap)
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == expires_at:
+                del self._entries[key]
+                self._bytes -= entry[2]
+                self.expirations += 1
+                if self.on_evict:
+                    self.on_evict(key, 'expirations')
+    
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return False
+            self._bytes -= entry[2]
+            return True
+    
+    def delete_many(self, keys) -> int:
+        """Remover várias chaves; devolve quantas existiam"""
+        deleted = 0
+        with self._lock:
+            for key in keys:
+                entry = self._entries.pop(key, None)
+                if entry is not None:
+                    self._bytes -= entry[2]
+                    deleted += 1
+        return deleted
+    
+    def delete_matching(self, pattern: str) -> int:
+        """Remover entradas cuja chave corresponde ao padrão (glob)"""
+        with self._lock:
+            keys = [key for key in self._entries if fnmatch.fnmatchcase(key, pattern)]
+            for key in keys:
+                self._bytes -= self._entries.pop(key)[2]
+            return len(keys)
+    
+    def keys(self):
+        with self._lock:
+            return list(self._entries)
+    
+    def sizes(self):
+        """Lista de (chave, bytes) das entradas atuais"""
+        with self._lock:
+            return [(key, entry[2]) for key, entry in self._entries.items()]
+    
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+    
+    def __len__(self):
+        return len(self._entries)
+
+
+class TieredCache:
+    """
+    Cache L1 (processo) + L2 (Redis opcional)
+    
+    Com Redis, o L1 guarda cada entrada no máximo CACHE_L1_TTL segundos.
+    Invalidações por namespace chegam aos outros workers em até
+    CACHE_GENERATION_TTL segundos (a geração faz parte da chave, também no
+    L1). Sem Redis o L1 é o único nível e usa o TTL pedido.
+    """
+    
+    # Segundos até nova tentativa de ligação ao Redis após uma falha
+    RECONNECT_INTERVAL = 60
+    
+    # Chaves por iteração do SCAN nas limpezas por padrão
+    SCAN_COUNT = 500
+    
+    # Contagem de acessos por chave (base do aquecimento do cache)
+    ACCESS_MAX_KEYS = 5000
+    ACCESS_FLUSH_INTERVAL = 30
+    ACCESS_TTL = 7 * 24 * 3600
+    
+    # Maiores chaves guardadas no relatório de tamanhos
+    LARGE_KEYS_MAX = 20
+    
+    # Contadores por namespace (primeiro nível do namespace ou da chave)
+    NAMESPACE_COUNTERS = ('l1_hits', 'l2_hits', 'misses', 'sets', 'deletes', 'invalidations', 'errors',
+                          'evictions', 'expirations', 'bytes_written')
+    
+    _cleanup_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='cache-cleanup')
+    _refresh_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='cache-refresh')
+    
+    # Liberta o lock partilhado apenas se ainda for do mesmo dono
+    RELEASE_LOCK_SCRIPT = (
+        "if redis.call('get', KEYS[1]) == ARGV[1] then "
+        "return redis.call('del', KEYS[1]) else return 0 end"
+    )
+    
+    # Intervalo de espera por um lock partilhado (segundos)
+    LOCK_POLL_INTERVAL = 0.05
+    
+    def __init__(self, prefix: str = 'agagri:', l1_max_entries: int = 2000, l1_ttl: int = 30,
+                 l1_max_bytes: int = 0, generation_ttl: float = 1.0, serializer: CacheSerializer = None,
+                 lock_timeout: float = 10.0, early_refresh_beta: float = 1.0, stats_sample_rate: float = 1.0):
+        self.prefix = prefix
+        self.serializer = serializer or CacheSerializer()
+        self.l1_ttl = l1_ttl
+        self.l1 = LocalCache(l1_max_entries, l1_max_bytes, on_evict=self._on_l1_evict)
+        self.generation_ttl = generation_ttl
+        # Gerações lidas do Redis, guardadas por generation_ttl segundos
+        self._generations = LocalCache(max_entries=10000)
+        # Gerações sem Redis (nunca podem ser perdidas)
+        self._local_generations = {}
+        self._generations_lock = threading.Lock()
+        self._redis_url = None
+        self._l2 = None
+        self._l2_retry_at = 0.0
+        self._l2_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {'l1_hits': 0, 'l2_hits': 0, 'misses': 0, 'sets': 0, 'deletes': 0, 'invalidations': 0, 'errors': 0}
+        self._namespaces = {}
+        self._latency = {}
+        # Fração das leituras/escritas usadas nos relatórios de chaves mais lidas e maiores
+        self.stats_sample_rate = stats_sample_rate
+        self._large_keys = {}
+        # Proteção contra stampede
+        self.lock_timeout = lock_timeout
+        self.early_refresh_beta = early_refresh_beta
+        self._key_locks = {}
+        self._key_locks_lock = threading.Lock()
+        self._refreshing = set()
+        self._stampede = {
+            'recomputes': 0,
+            'coalesced': 0,
+            'early_refreshes': 0,
+            'stale_served': 0,
+            'background_refreshes': 0,
+            'lock_timeouts': 0
+        }
+        # Acessos por chave lógica; com Redis acumulados num sorted set partilhado
+        self._access = {}
+        self._access_pending = {}
+        self._access_flushed_at = time.monotonic()
+    
+    def init_app(self, app):
+        """Aplicar a configuração da aplicação"""
+        self.prefix = app.config.get('CACHE_KEY_PREFIX', self.prefix)
+        self.l1_ttl = app.config.get('CACHE_L1_TTL', self.l1_ttl)
+        self.l1.max_entries = app.config.get('CACHE_L1_MAX_ENTRIES', self.l1.max_entries)
+        self.l1.max_bytes = app.config.get('CACHE_L1_MAX_BYTES', self.l1.max_bytes)
+        self.generation_ttl = app.config.get('CACHE_GENERATION_TTL', self.generation_ttl)
+        self.serializer.codec = app.config.get('CACHE_SERIALIZER', self.serializer.codec)
+        self.serializer.compress_threshold = app.config.get('CACHE_COMPRESS_THRESHOLD', self.serializer.compress_threshold)
+        self._redis_url = app.config.get('REDIS_URL') or os.environ.get('REDIS_URL')
+        self.lock_timeout = app.config.get('CACHE_LOCK_TIMEOUT', self.lock_timeout)
+        self.early_refresh_beta = app.config.get('CACHE_EARLY_REFRESH_BETA', self.early_refresh_beta)
+        self.stats_sample_rate = app.config.get('CACHE_STATS_SAMPLE_RATE', self.stats_sample_rate)
+    
+    def _get_redis_url(self) -> Optional[str]:
+        url = self._redis_url or os.environ.get('REDIS_URL')
+        if not url or url == REDIS_URL_PLACEHOLDER:
+            return None
+        return url
+    
+    @property
+    def l2(self):
+        """Cliente Redis (bytes), ou None sem Redis configurado/disponível"""
+        if self._l2 is not None or not REDIS_AVAILABLE:
+            return self._l2
+        
+        redis_url = self._get_redis_url()
+        if not redis_url or time.monotonic() < self._l2_retry_at:
+            return None
+        
+        with self._l2_lock:
+            if self._l2 is None and time.monotonic() >= self._l2_retry_at:
+                try:
+                    client = redis.from_url(
+                        redis_url,
+                        decode_responses=False,
+                        socket_timeout=10,
+                        socket_connect_timeout=10,
+                        retry_on_timeout=True,
+                        health_check_interval=30
+                    )
+                    client.ping()
+                    self._l2 = client
+                    logger.info(f"✅ Cache L2 (Redis) ligado: {redis_url.split('@')[-1][:30]}...")
+                except Exception as e:
+                    self._l2_retry_at = time.monotonic() + self.RECONNECT_INTERVAL
+                    logger.error(f"❌ Erro ao conectar com Redis, cache apenas em memória: {e}")
+        
+        return self._l2
+    
+    @staticmethod
+    def _namespace_levels(namespace: str):
+        """'culture:user_5' -> ['culture', 'culture:user_5']"""
+        parts = namespace.split(':')
+        return [':'.join(parts[:index + 1]) for index in range(len(parts))]
+    
+    def _generation_key(self, namespace: str) -> str:
+        return f"{self.prefix}gen:{namespace}"
+    
+    def _access_key(self) -> str:
+        return f"{self.prefix}access"
+    
+    def get_generation(self, namespace: str) -> str:
+        """
+        Gerações de todos os níveis do namespace, ex: '3.0'
+        
+        Com Redis cada nível é lido no máximo uma vez por generation_ttl
+        segundos (um MGET para os níveis em falta); erros do Redis propagam.
+        """
+        levels = self._namespace_levels(namespace)
+        client = self.l2
+        
+        if client is None:
+            with self._generations_lock:
+                return '.'.join(str(self._local_generations.get(level, 0)) for level in levels)
+        
+        values = {}
+        missing = []
+        for level in levels:
+            found, value = self._generations.get(level)
+            if found:
+                values[level] = value
+            else:
+                missing.append(level)
+        
+        if missing:
+            fetched = client.mget([self._generation_key(level) for level in missing])
+            for level, raw in zip(missing, fetched):
+                values[level] = int(raw or 0)
+                self._generations.set(level, values[level], self.generation_ttl)
+        
+        return '.'.join(str(values[level]) for level in levels)
+    
+    def make_key(self, key: str, namespace: str = None) -> str:
+        """Chave completa: '{prefixo}{namespace}:v{gerações}:{chave}' (hash se muito longa)"""
+        if namespace:
+            base = f"{self.prefix}{namespace}:v{self.get_generation(namespace)}:"
+        else:
+            base = self.prefix
+        
+        full_key = f"{base}{key}"
+        if len(full_key) > 200:
+            digest = hashlib.md5(full_key.encode()).hexdigest()
+            return f"{base if namespace else self.prefix + 'hashed:'}hash:{digest}"
+        return full_key
+    
+    @staticmethod
+    def _namespace_of(key: str, namespace: str = None) -> str:
+        """Namespace para estatísticas (primeiro nível do namespace ou da chave)"""
+        return (namespace or key).split(':', 1)[0] or 'default'
+    
+    def _namespace_stats(self, namespace: str) -> Dict[str, int]:
+        # Chamado com _stats_lock
+        stats = self._namespaces.get(namespace)
+        if stats is None:
+            stats = self._namespaces[namespace] = dict.fromkeys(('hits',) + self.NAMESPACE_COUNTERS, 0)
+        return stats
+    
+    def _count(self, name: str, namespace: str, amount: int = 1):
+        with self._stats_lock:
+            if name in self._stats:
+                self._stats[name] += amount
+            stats = self._namespace_stats(namespace)
+            stats[name] += amount
+            if name in ('l1_hits', 'l2_hits'):
+                stats['hits'] += amount
+    
+    def _observe(self, operation: str, namespace: str, started: float):
+        """Latência de uma operação (histograma por operação e namespace)"""
+        elapsed = time.perf_counter() - started
+        with self._stats_lock:
+            histogram = self._latency.get((operation, namespace))
+            if histogram is None:
+                histogram = self._latency[(operation, namespace)] = LatencyHistogram()
+            histogram.observe(elapsed)
+    
+    def _on_l1_evict(self, cache_key: str, reason: str):
+        self._count(reason, self._namespace_of(cache_key[len(self.prefix):]))
+    
+    def _sampled(self) -> bool:
+        return self.stats_sample_rate >= 1 or random.random() < self.stats_sample_rate
+    
+    def _record_size(self, name: str, size: int):
+        """Relatório das maiores chaves (amostrado)"""
+        if not self._sampled():
+            return
+        with self._stats_lock:
+            self._large_keys[name] = size
+            if len(self._large_keys) > 2 * self.LARGE_KEYS_MAX:
+                top = heapq.nlargest(self.LARGE_KEYS_MAX, self._large_keys.items(), key=lambda item: item[1])
+                self._large_keys = dict(top)
+    
+    def _record_access(self, name: str):
+        """Contar uma leitura da chave (amostrada); envia as contagens ao Redis em lotes"""
+        if not self._sampled():
+            return
+        now = time.monotonic()
+        with self._stats_lock:
+            self._access[name] = self._access.get(name, 0) + 1
+            self._access_pending[name] = self._access_pending.get(name, 0) + 1
+            if len(self._access) > self.ACCESS_MAX_KEYS:
+                # Manter apenas a metade mais acedida
+                top = heapq.nlargest(self.ACCESS_MAX_KEYS // 2, self._access.items(), key=lambda item: item[1])
+                self._access = dict(top)
+            if len(self._access_pending) > self.ACCESS_MAX_KEYS:
+                top = heapq.nlargest(self.ACCESS_MAX_KEYS // 2, self._access_pending.items(), key=lambda item: item[1])
+                self._access_pending = dict(top)
+            
+            flush_due = now - self._access_flushed_at >= self.ACCESS_FLUSH_INTERVAL
+            if flush_due:
+                self._access_flushed_at = now
+        
+        if flush_due and self._get_redis_url():
+            self._cleanup_executor.submit(self._flush_access)
+    
+    def _flush_access(self):
+        """Somar as contagens pendentes ao sorted set partilhado"""
+        client = self.l2
+        if client is None:
+            return
+        
+        with self._stats_lock:
+            pending, self._access_pending = self._access_pending, {}
+        if not pending:
+            return
+        
+        access_key = self._access_key()
+        try:
+            pipe = client.pipeline(transaction=False)
+            for name, count in pending.items():
+                pipe.zincrby(access_key, count, name)
+            pipe.zremrangebyrank(access_key, 0, -(self.ACCESS_MAX_KEYS + 1))
+            pipe.expire(access_key, self.ACCESS_TTL)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"Erro ao guardar acessos do cache: {e}")
+    
+    def hot_keys(self, limit: int = 50, prefix: str = '') -> list:
+        """
+        Chaves mais lidas (as do Redis sobrevivem a reinícios e somam todos os workers)
+        
+        Args:
+            limit: Número máximo de chaves
+            prefix: Apenas chaves lógicas com este início (ex: 'dashboard:snapshot:')
+        
+        Returns:
+            Lista de (chave, acessos) por ordem decrescente
+        """
+        client = self.l2
+        if client is not None:
+            self._flush_access()
+            try:
+                entries = client.zrevrange(self._access_key(), 0, -1, withscores=True)
+                result = []
+                for name, score in entries:
+                    name = name.decode() if isinstance(name, bytes) else name
+                    if name.startswith(prefix):
+                        result.append((name, int(score)))
+                        if len(result) >= limit:
+                            break
+                return result
+            except Exception as e:
+                logger.warning(f"Erro ao ler acessos do cache: {e}")
+        
+        with self._stats_lock:
+            entries = [(name, count) for name, count in self._access.items() if name.startswith(prefix)]
+        return heapq.nlargest(limit, entries, key=lambda item: item[1])
+    
+    def _l1_ttl(self, timeout: int) -> float:
+        # Sem L2 o L1 é o armazenamento completo
+        return min(timeout, self.l1_ttl) if self.l2 is not None else timeout
+    
+    def get(self, key: str, namespace: str = None, default: Any = None, local: bool = True) -> Any:
+        """
+        Obter valor (L1, depois L2)
+        
+        Args:
+            key: Chave
+            namespace: Namespace da chave
+            default: Valor devolvido se não existir
+            local: False para dados alterados por outros workers: com Redis
+                   lê-se sempre do L2
+        """
+        stats_namespace = self._namespace_of(key, namespace)
+        started = time.perf_counter()
+        result = self._get(key, namespace, default, local, stats_namespace)
+        self._observe('get', stats_namespace, started)
+        return result
+    
+    def _get(self, key: str, namespace: str, default: Any, local: bool, stats_namespace: str) -> Any:
+        """Leitura sem medição de latência (ver get)"""
+        self._record_access(f"{namespace}:{key}" if namespace else key)
+        try:
+            cache_key = self.make_key(key, namespace)
+        except Exception as e:
+            self._count('errors', stats_namespace)
+            self._count('misses', stats_namespace)
+            logger.error(f"Erro ao obter geração do namespace {namespace}: {e}")
+            return default
+        client = self.l2
+        
+        if local or client is None:
+            found, data = self.l1.get(cache_key)
+            if found:
+                try:
+                    value = self.serializer.loads(data)
+                    self._count('l1_hits', stats_namespace)
+                    return value
+                except CacheSerializationError as e:
+                    self.l1.delete(cache_key)
+                    logger.warning(f"Entrada inválida no cache {cache_key}: {e}")
+        
+        if client is not None:
+            try:
+                data = client.get(cache_key)
+                if data is not None:
+                    value = self.serializer.loads(data)
+                    if local:
+                        self.l1.set(cache_key, data, self.l1_ttl, len(data))
+                    self._count('l2_hits', stats_namespace)
+                    return value
+            except CacheSerializationError as e:
+                # Entrada de outra versão do esquema (ex: pickle antigo): tratada como ausente
+                logger.debug(f"Entrada ignorada no cache {cache_key}: {e}")
+            except Exception as e:
+                self._count('errors', stats_namespace)
+                logger.error(f"Erro ao obter cache {cache_key}: {e}")
+        
+        self._count('misses', stats_namespace)
+        return default
+    
+    def set(self, key: str, value: Any, timeout: int = 3600, namespace: str = None, local: bool = True) -> bool:
+        """
+        Guardar valor em ambos os níveis
+        
+        Args:
+            key: Chave
+            value: Valor com dados simples (modelos via to_dict; ver CacheSerializer)
+            timeout: TTL em segundos
+            namespace: Namespace da chave
+            local: False para não guardar no L1 quando há Redis
+        """
+        stats_namespace = self._namespace_of(key, namespace)
+        started = time.perf_counter()
+        result = self._set(key, value, timeout, namespace, local, stats_namespace)
+        self._observe('set', stats_namespace, started)
+        return result
+    
+    def _set(self, key: str, value: Any, timeout: int, namespace: str, local: bool, stats_namespace: str) -> bool:
+        """Escrita sem medição de latência (ver set)"""
+        try:
+            cache_key = self.make_key(key, namespace)
+        except Exception as e:
+            self._count('errors', stats_namespace)
+            logger.error(f"Erro ao obter geração do namespace {namespace}: {e}")
+            return False
+        try:
+            data = self.serializer.dumps(value)
+        except CacheSerializationError as e:
+            self._count('errors', stats_namespace)
+            logger.error(f"Valor não serializável para o cache {cache_key}: {e}")
+            return False
+        client = self.l2
+        success = True
+        
+        if client is not None:
+            try:
+                client.setex(cache_key, int(timeout), data)
+            except Exception as e:
+                success = False
+                self._count('errors', stats_namespace)
+                logger.error(f"Erro ao definir cache {cache_key}: {e}")
+        
+        # O L1 guarda a entrada serializada: cada leitura devolve uma cópia, como o L2
+        if local or client is None:
+            self.l1.set(cache_key, data, self._l1_ttl(timeout), len(data))
+        else:
+            self.l1.delete(cache_key)
+        
+        self._count('sets', stats_namespace)
+        self._count('bytes_written', stats_namespace, len(data))
+        self._record_size(f"{namespace}:{key}" if namespace else key, len(data))
+        return success
+    
+    def delete(self, key: str, namespace: str = None) -> bool:
+        """Remover a chave de ambos os níveis"""
+        try:
+            cache_key = self.make_key(key, namespace)
+        except Exception as e:
+            self._count('errors', self._namespace_of(key, namespace))
+            logger.error(f"Erro ao obter geração do namespace {namespace}: {e}")
+            return False
+        deleted = self.l1.delete(cache_key)
+        
+        client = self.l2
+        if client is not None:
+            try:
+                deleted = bool(client.delete(cache_key)) or deleted
+            except Exception as e:
+                self._count('errors', self._namespace_of(key, namespace))
+                logger.error(f"Erro ao deletar cache {cache_key}: {e}")
+                return False
+        
+        self._count('deletes', self._namespace_of(key, namespace))
+        return deleted
+    
+    def get_many(self, keys, namespace: str = None, local: bool = True) -> Dict[str, Any]:
+        """
+        Obter várias chaves de uma vez: o L1 com um único lock e as que faltam
+        com um único MGET no L2
+        
+        Args:
+            keys: Chaves (do mesmo namespace)
+            namespace: Namespace das chaves
+            local: Ver get()
+        
+        Returns:
+            Dict chave -> valor apenas com as chaves encontradas
+        """
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        started = time.perf_counter()
+        result = self._get_many(keys, namespace, local)
+        self._observe('get_many', self._namespace_of(keys[0], namespace), started)
+        return result
+    
+    def _get_many(self, keys: list, namespace: str, local: bool) -> Dict[str, Any]:
+        """Leitura em lote sem medição de latência (ver get_many)"""
+        result = {}
+        for key in keys:
+            self._record_access(f"{namespace}:{key}" if namespace else key)
+        try:
+            cache_keys = {key: self.make_key(key, namespace) for key in keys}
+        except Exception as e:
+            for key in keys:
+                self._count('errors', self._namespace_of(key, namespace))
+                self._count('misses', self._namespace_of(key, namespace))
+            logger.error(f"Erro ao obter geração do namespace {namespace}: {e}")
+            return result
+        client = self.l2
+        pending = keys
+        
+        if local or client is None:
+            found = self.l1.get_many(cache_keys.values())
+            pending = []
+            for key in keys:
+                cache_key = cache_keys[key]
+                if cache_key not in found:
+                    pending.append(key)
+                    continue
+                try:
+                    result[key] = self.serializer.loads(found[cache_key])
+                    self._count('l1_hits', self._namespace_of(key, namespace))
+                except CacheSerializationError as e:
+                    self.l1.delete(cache_key)
+                    pending.append(key)
+                    logger.warning(f"Entrada inválida no cache {cache_key}: {e}")
+        
+        if client is not None and pending:
+            try:
+                fetched = client.mget([cache_keys[key] for key in pending])
+            except Exception as e:
+                fetched = [None] * len(pending)
+                self._count('errors', self._namespace_of(pending[0], namespace))
+                logger.error(f"Erro ao obter {len(pending)} chaves do cache: {e}")
+            
+            l1_entries = []
+            for key, data in zip(pending, fetched):
+                if data is None:
+                    continue
+                try:
+                    result[key] = self.serializer.loads(data)
+                except CacheSerializationError as e:
+                    logger.debug(f"Entrada ignorada no cache {cache_keys[key]}: {e}")
+                    continue
+                self._count('l2_hits', self._namespace_of(key, namespace))
+                if local:
+                    l1_entries.append((cache_keys[key], data, len(data)))
+            if l1_entries:
+                self.l1.set_many(l1_entries, self.l1_ttl)
+        
+        for key in keys:
+            if key not in result:
+                self._count('misses', self._namespace_of(key, namespace))
+        return result
+    
+    def set_many(self, mapping: Dict[str, Any], timeout: int = 3600, namespace: str = None,
+                 local: bool = True) -> bool:
+        """
+        Guardar vários valores com o mesmo TTL (um único pipeline no L2)
+        
+        Args:
+            mapping: Dict chave -> valor
+            timeout: TTL em segundos
+            namespace: Namespace das chaves
+            local: Ver set()
+        
+        Returns:
+            True se todos os valores foram guardados
+        """
+        if not mapping:
+            return True
+        started = time.perf_counter()
+        result = self._set_many(mapping, timeout, namespace, local)
+        self._observe('set_many', self._namespace_of(next(iter(mapping)), namespace), started)
+        return result
+    
+    def _set_many(self, mapping: Dict[str, Any], timeout: int, namespace: str, local: bool) -> bool:
+        """Escrita em lote sem medição de latência (ver set_many)"""
+        success = True
+        entries = []
+        for key, value in mapping.items():
+            stats_namespace = self._namespace_of(key, namespace)
+            try:
+                cache_key = self.make_key(key, namespace)
+            except Exception as e:
+                self._count('errors', stats_namespace)
+                logger.error(f"Erro ao obter geração do namespace {namespace}: {e}")
+                return False
+            try:
+                entries.append((key, cache_key, self.serializer.dumps(value)))
+            except CacheSerializationError as e:
+                success = False
+                self._count('errors', stats_namespace)
+                logger.error(f"Valor não serializável para o cache {cache_key}: {e}")
+        if not entries:
+            return success
+        client = self.l2
+        
+        if client is not None:
+            try:
+                pipe = client.pipeline(transaction=False)
+                for _, cache_key, data in entries:
+                    pipe.setex(cache_key, int(timeout), data)
+                pipe.execute()
+            except Exception as e:
+                success = False
+                self._count('errors', self._namespace_of(entries[0][0], namespace))
+                logger.error(f"Erro ao definir {len(entries)} chaves do cache: {e}")
+        
+        if local or client is None:
+            self.l1.set_many([(cache_key, data, len(data)) for _, cache_key, data in entries], self._l1_ttl(timeout))
+        else:
+            self.l1.delete_many(cache_key for _, cache_key, _ in entries)
+        
+        for key, _, data in entries:
+            stats_namespace = self._namespace_of(key, namespace)
+            self._count('sets', stats_namespace)
+            self._count('bytes_written', stats_namespace, len(data))
+            self._record_size(f"{namespace}:{key}" if namespace else key, len(data))
+        return success
+    
+    def delete_many(self, keys, namespace: str = None) -> int:
+        """
+        Remover várias chaves de ambos os níveis (um único DEL no L2)
+        
+        Returns:
+            Número de chaves removidas
+        """
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return 0
+        try:
+            cache_keys = [self.make_key(key, namespace) for key in keys]
+        except Exception as e:
+            self._count('errors', self._namespace_of(keys[0], namespace))
+            logger.error(f"Erro ao obter geração do namespace {namespace}: {e}")
+            return 0
+        deleted = self.l1.delete_many(cache_keys)
+        
+        client = self.l2
+        if client is not None:
+            try:
+                deleted = client.delete(*cache_keys)
+            except Exception as e:
+                self._count('errors', self._namespace_of(keys[0], namespace))
+                logger.error(f"Erro ao deletar {len(cache_keys)} chaves do cache: {e}")
+                return 0
+        
+        for key in keys:
+            self._count('deletes', self._namespace_of(key, namespace))
+        return deleted
+    
+    def prime_many(self, mapping: Dict[str, Any], timeout: int = 3600, namespace: str = None,
+                   stale_ttl: int = 0, local: bool = True) -> bool:
+        """
+        Guardar valores já calculados no formato lido por get_or_set (ex: os
+        detalhes de cada item ao calcular uma listagem)
+        """
+        expires_at = time.time() + timeout
+        entries = {
+            key: {'__entry__': 1, 'value': value, 'expires_at': expires_at, 'delta': 0}
+            for key, value in mapping.items() if value is not None
+        }
+        return self.set_many(entries, timeout + stale_ttl, namespace, local=local)
+    
+    def _count_stampede(self, name: str):
+        with self._stats_lock:
+            self._stampede[name] += 1
+    
+    @contextmanager
+    def _key_lock(self, name: str):
+        """Lock por chave neste processo (removido quando ninguém o usa)"""
+        with self._key_locks_lock:
+            entry = self._key_locks.setdefault(name, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            yield entry[0]
+        finally:
+            with self._key_locks_lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    self._key_locks.pop(name, None)
+    
+    def _acquire_shared_lock(self, client, lock_key: str, timeout: float, lock_ttl: float) -> Optional[str]:
+        """SET NX com expiração; espera pelo dono atual até timeout"""
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + timeout
+        while True:
+            if client.set(lock_key, token, nx=True, px=int(lock_ttl * 1000)):
+                return token
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(self.LOCK_POLL_INTERVAL)
+    
+    @contextmanager
+    def single_flight(self, key: str, namespace: str = None, timeout: float = None, lock_ttl: float = None):
+        """
+        Apenas um pedido por chave recalcula o valor
+        
+        Os restantes esperam pelo primeiro (neste processo com um lock local e,
+        com Redis, entre workers com um lock SET NX) e devem voltar a ler o
+        cache ao entrar. Devolve False se o lock não foi obtido dentro do
+        prazo: quem chamou calcula na mesma (disponibilidade acima de tudo).
+        O lock partilhado expira após lock_ttl segundos (por omissão timeout).
+        
+        Uso:
+            with tiered_cache.single_flight(key, namespace):
+                value = tiered_cache.get(key, namespace)
+                if value is None:
+                    value = compute()
+                    tiered_cache.set(key, value, timeout, namespace)
+        """
+        timeout = timeout or self.lock_timeout
+        try:
+            name = self.make_key(key, namespace)
+        except Exception as e:
+            logger.error(f"Erro ao obter geração do namespace {namespace}: {e}")
+            yield False
+            return
+        
+        with self._key_lock(name) as local_lock:
+            local_held = local_lock.acquire(timeout=timeout)
+            acquired = local_held
+            client = self.l2 if local_held else None
+            lock_key = f"{self.prefix}lock:{name[len(self.prefix):]}"
+            token = None
+            try:
+                if client is not None:
+                    try:
+                        token = self._acquire_shared_lock(client, lock_key, timeout, lock_ttl or timeout)
+                        acquired = token is not None
+                    except Exception as e:
+                        logger.warning(f"Lock partilhado do cache indisponível para {name}: {e}")
+                if not acquired:
+                    self._count_stampede('lock_timeouts')
+                yield acquired
+            finally:
+                if token is not None:
+                    try:
+                        client.eval(self.RELEASE_LOCK_SCRIPT, 1, lock_key, token)
+                    except Exception as e:
+                        logger.warning(f"Erro ao libertar lock do cache {lock_key}: {e}")
+                if local_held:
+                    local_lock.release()
+    
+    @staticmethod
+    def _is_entry(value: Any) -> bool:
+        return isinstance(value, dict) and value.get('__entry__') == 1
+    
+    def _early_refresh_due(self, entry: Dict[str, Any], now: float) -> bool:
+        """Expiração probabilística (XFetch): mais provável perto do fim e para valores caros"""
+        delta = entry.get('delta') or 0
+        if not delta or not self.early_refresh_beta:
+            return False
+        return now - delta * self.early_refresh_beta * math.log(1.0 - random.random()) >= entry['expires_at']
+    
+    def _compute_and_store(self, key: str, compute: Callable[[], Any], timeout: int,
+                           namespace: str, stale_ttl: int, local: bool) -> Any:
+        started = time.perf_counter()
+        value = compute()
+        delta = time.perf_counter() - started
+        self._count_stampede('recomputes')
+        
+        if value is not None:
+            entry = {'__entry__': 1, 'value': value, 'expires_at': time.time() + timeout, 'delta': round(delta, 4)}
+            self.set(key, entry, timeout + stale_ttl, namespace, local=local)
+        return value
+    
+    def _refresh_in_background(self, key: str, refresh: Callable[[], Any], timeout: int,
+                               namespace: str, stale_ttl: int, local: bool):
+        """Recalcular fora do pedido (uma vez por chave neste processo)"""
+        name = f"{namespace}|{key}"
+        with self._key_locks_lock:
+            if name in self._refreshing:
+                return
+            self._refreshing.add(name)
+        
+        def run():
+            try:
+                with self.single_flight(key, namespace, timeout=1.0) as acquired:
+                    if acquired:
+                        self._compute_and_store(key, refresh, timeout, namespace, stale_ttl, local)
+                self._count_stampede('background_refreshes')
+            except Exception as e:
+                logger.error(f"Erro ao renovar cache {key} em segundo plano: {e}")
+            finally:
+                with self._key_locks_lock:
+                    self._refreshing.discard(name)
+        
+        self._refresh_executor.submit(run)
+    
+    def get_or_set(self, key: str, compute: Callable[[], Any], timeout: int = 3600, namespace: str = None,
+                   stale_ttl: int = 0, early_refresh: bool = True, local: bool = True,
+                   refresh: Callable[[], Any] = None) -> Any:
+        """
+        Ler a chave ou calcular o valor, com proteção contra stampede
+        
+        - Falhas: apenas um pedido calcula (single_flight); os outros esperam
+          e reutilizam o resultado.
+        - early_refresh: pouco antes de expirar, um pedido ao acaso recalcula
+          antecipadamente (XFetch, ponderado pelo custo do cálculo).
+        - stale_ttl > 0 (stale-while-revalidate): durante stale_ttl segundos
+          após expirar devolve-se o valor antigo e recalcula-se em segundo plano.
+        
+        Args:
+            key: Chave
+            compute: Função que calcula o valor (None não é guardado)
+            timeout: Segundos em que o valor é considerado fresco
+            namespace: Namespace da chave
+            stale_ttl: Segundos adicionais em que o valor antigo pode ser servido
+            early_refresh: Ativar a renovação probabilística antecipada
+            local: Ver get()
+            refresh: Função usada nas renovações em segundo plano (por omissão
+                     compute); deve funcionar fora do pedido (ex: com app context)
+        """
+        refresh = refresh or compute
+        now = time.time()
+        entry = self.get(key, namespace, local=local)
+        
+        if self._is_entry(entry):
+            if now < entry['expires_at']:
+                if not (early_refresh and self._early_refresh_due(entry, now)):
+                    return entry['value']
+                
+                self._count_stampede('early_refreshes')
+                if stale_ttl:
+                    self._refresh_in_background(key, refresh, timeout, namespace, stale_ttl, local)
+                    return entry['value']
+                
+                # Renovação síncrona só se ninguém estiver já a renovar esta chave
+                name = f"{namespace}|{key}"
+                with self._key_locks_lock:
+                    if name in self._refreshing:
+                        return entry['value']
+                    self._refreshing.add(name)
+                try:
+                    return self._compute_and_store(key, compute, timeout, namespace, stale_ttl, local)
+                finally:
+                    with self._key_locks_lock:
+                        self._refreshing.discard(name)
+            
+            if stale_ttl:
+                self._count_stampede('stale_served')
+                self._refresh_in_background(key, refresh, timeout, namespace, stale_ttl, local)
+                return entry['value']
+        
+        with self.single_flight(key, namespace):
+            # Outro pedido pode ter calculado o valor enquanto se esperava
+            entry = self.get(key, namespace, local=local)
+            if self._is_entry(entry) and time.time() < entry['expires_at']:
+                self._count_stampede('coalesced')
+                return entry['value']
+            
+            return self._compute_and_store(key, compute, timeout, namespace, stale_ttl, local)
+    
+    def invalidate_namespace(self, namespace: str) -> int:
+        """
+        Invalidar um namespace (e os seus subníveis) incrementando a geração
+        
+        Returns:
+            Nova geração do namespace
+        """
+        client = self.l2
+        if client is not None:
+            generation = int(client.incr(self._generation_key(namespace)))
+            self._generations.set(namespace, generation, self.generation_ttl)
+        else:
+            with self._generations_lock:
+                generation = self._local_generations.get(namespace, 0) + 1
+                self._local_generations[namespace] = generation
+        
+        self._count('invalidations', self._namespace_of(namespace))
+        return generation
+    
+    def clear_namespace(self, namespace: str) -> int:
+        """Invalidar todas as chaves de um namespace (devolve a nova geração)"""
+        return self.invalidate_namespace(namespace)
+    
+    def clear_pattern(self, pattern: str) -> int:
+        """
+        Remover chaves que correspondem ao padrão (glob, sem o prefixo)
+        
+        O L1 é limpo de imediato; no Redis a remoção corre em segundo plano
+        com SCAN incremental (sem bloquear o servidor como KEYS).
+        
+        Returns:
+            Número de chaves removidas do L1
+        """
+        full_pattern = f"{self.prefix}{pattern}"
+        cleared = self.l1.delete_matching(full_pattern)
+        
+        if self.l2 is not None:
+            self._cleanup_executor.submit(self._scan_delete, full_pattern)
+        
+        return cleared
+    
+    def _scan_delete(self, full_pattern: str) -> int:
+        """Remover do Redis, em lotes, as chaves encontradas pelo SCAN"""
+        client = self.l2
+        # Os contadores de geração nunca são removidos (chaves antigas voltariam a ser lidas);
+        # as contagens de acesso também ficam
+        generation_prefix = self._generation_key('').encode()
+        access_key = self._access_key().encode()
+        deleted = 0
+        batch = []
+        try:
+            for key in client.scan_iter(match=full_pattern, count=self.SCAN_COUNT):
+                if key.startswith(generation_prefix) or key == access_key:
+                    continue
+                batch.append(key)
+                if len(batch) >= self.SCAN_COUNT:
+                    deleted += client.delete(*batch)
+                    batch = []
+            if batch:
+                deleted += client.delete(*batch)
+            logger.info(f"Limpeza do cache por padrão {full_pattern}: {deleted} chaves removidas")
+        except Exception as e:
+            with self._stats_lock:
+                self._stats['errors'] += 1
+            logger.error(f"Erro ao limpar padrão {full_pattern}: {e}")
+        return deleted
+    
+    def get_latency_histograms(self) -> Dict[tuple, LatencyHistogram]:
+        """Cópia dos histogramas de latência por (operação, namespace)"""
+        with self._stats_lock:
+            return {name: histogram.copy() for name, histogram in self._latency.items()}
+    
+    def _l1_usage(self) -> Dict[str, list]:
+        """Entradas e bytes do L1 por namespace"""
+        # Lida antes de _stats_lock (o L1 chama _count com o seu lock)
+        l1_usage = {}
+        for cache_key, size in self.l1.sizes():
+            usage = l1_usage.setdefault(self._namespace_of(cache_key[len(self.prefix):]), [0, 0])
+            usage[0] += 1
+            usage[1] += size
+        return l1_usage
+    
+    def get_counters(self) -> Dict[str, Any]:
+        """
+        Contadores acumulados deste processo e ocupação atual do L1, em JSON
+        simples para serem somados entre processos (ver cache_metrics)
+        """
+        l1_usage = self._l1_usage()
+        with self._stats_lock:
+            namespaces = {name: dict(values) for name, values in self._namespaces.items()}
+            stampede = dict(self._stampede)
+            latency = {
+                f"{operation}|{name}": {'counts': list(histogram.counts), 'sum': histogram.sum, 'count': histogram.count}
+                for (operation, name), histogram in self._latency.items()
+            }
+        
+        return {
+            'namespaces': namespaces,
+            'stampede': stampede,
+            'latency': latency,
+            'gauges': {
+                'l1_entries': {name: usage[0] for name, usage in l1_usage.items()},
+                'l1_bytes': {name: usage[1] for name, usage in l1_usage.items()}
+            }
+        }
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Estatísticas dos dois níveis e por namespace"""
+        l1_usage = self._l1_usage()
+        
+        with self._stats_lock:
+            stats = dict(self._stats)
+            namespaces = {name: dict(values) for name, values in self._namespaces.items()}
+            stampede = dict(self._stampede)
+            latency = {name: histogram.summary() for name, histogram in self._latency.items()}
+            large_keys = heapq.nlargest(self.LARGE_KEYS_MAX, self._large_keys.items(), key=lambda item: item[1])
+        
+        for name in l1_usage:
+            namespaces.setdefault(name, dict.fromkeys(('hits',) + self.NAMESPACE_COUNTERS, 0))
+        
+        for name, values in namespaces.items():
+            requests = values['hits'] + values['misses']
+            values['hit_rate'] = round(values['hits'] / requests * 100, 2) if requests else 0
+            values['l1_entries'], values['l1_bytes'] = l1_usage.get(name, (0, 0))
+            values['get_latency'] = latency.get(('get', name), LatencyHistogram().summary())
+            values['set_latency'] = latency.get(('set', name), LatencyHistogram().summary())
+        
+        hits = stats['l1_hits'] + stats['l2_hits']
+        requests = hits + stats['misses']
+        client = self.l2
+        
+        result = {
+            'hits': hits,
+            'misses': stats['misses'],
+            'hit_rate': round(hits / requests * 100, 2) if requests else 0,
+            'sets': stats['sets'],
+            'deletes': stats['deletes'],
+            'invalidations': stats['invalidations'],
+            'errors': stats['errors'],
+            'l1': {
+                'hits': stats['l1_hits'],
+                'hit_rate': round(stats['l1_hits'] / requests * 100, 2) if requests else 0,
+                'size': len(self.l1),
+                'max_entries': self.l1.max_entries,
+                'bytes': self.l1.size_bytes,
+                'max_bytes': self.l1.max_bytes,
+                'ttl': self.l1_ttl if client is not None else None,
+                'evictions': self.l1.evictions,
+                'expirations': self.l1.expirations
+            },
+            'l2': {
+                'backend': 'redis' if client is not None else None,
+                'hits': stats['l2_hits'],
+                'hit_rate': round(stats['l2_hits'] / requests * 100, 2) if requests else 0
+            },
+            'namespaces': namespaces,
+            'serializer': self.serializer.get_stats(),
+            'stampede': stampede,
+            'large_keys': [{'key': key, 'bytes': size} for key, size in large_keys],
+            'memory_cache_size': len(self.l1),
+            'redis_connected': client is not None
+        }
+        
+        if client is not None:
+            try:
+                info = client.info()
+                result['l2'].update({
+                    'used_memory': info.get('used_memory_human'),
+                    'connected_clients': info.get('connected_clients'),
+                    'total_commands_processed': info.get('total_commands_processed'),
+                    'keyspace_hits': info.get('keyspace_hits', 0),
+                    'keyspace_misses': info.get('keyspace_misses', 0)
+                })
+            except Exception as e:
+                result['l2']['error'] = str(e)
+        
+        return result
+    
+    def health_check(self) -> Dict[str, Any]:
+        """Estado do cache: healthy com Redis, degraded apenas com L1"""
+        health = {
+            'redis_configured': self._get_redis_url() is not None,
+            'redis_connected': False,
+            'memory_fallback': True,
+            'status': 'degraded'
+        }
+        
+        client = self.l2
+        if client is not None:
+            try:
+                client.ping()
+                health['redis_connected'] = True
+                health['status'] = 'healthy'
+            except Exception as e:
+                health['redis_error'] = str(e)
+        
+        return health
+
+
+# Instância global do cache em camadas
+tiered_cache = TieredCache(
+    prefix=os.environ.get('CACHE_KEY_PREFIX', 'agagri:'),
+    l1_max_entries=int(os.environ.get('CACHE_L1_MAX_ENTRIES', 2000)),
+    l1_ttl=int(os.environ.get('CACHE_L1_TTL', 30)),
+    l1_max_bytes=int(os.environ.get('CACHE_L1_MAX_BYTES', 64 * 1024 * 1024)),
+    generation_ttl=float(os.environ.get('CACHE_GENERATION_TTL', 1.0)),
+    serializer=CacheSerializer(
+        codec=os.environ.get('CACHE_SERIALIZER', 'auto'),
+        compress_threshold=int(os.environ.get('CACHE_COMPRESS_THRESHOLD', 1024))
+    ),
+    lock_timeout=float(os.environ.get('CACHE_LOCK_TIMEOUT', 10.0)),
+    early_refresh_beta=float(os.environ.get('CACHE_EARLY_REFRESH_BETA', 1.0)),
+    stats_sample_rate=float(os.environ.get('CACHE_STATS_SAMPLE_RATE', 1.0))
+)
@@ -38,6 +38,26 @@ class Config:
     
     # Configurações de API externa
     WEATHER_API_KEY = os.environ.get('WEATHER_API_KEY')
+    # Camada de busca meteorológica (cache por coordenadas arredondadas e quota diária)
+    WEATHER_FETCH_CACHE_TTL = int(os.environ.get('WEATHER_FETCH_CACHE_TTL', 600))
+    WEATHER_COORD_PRECISION = int(os.environ.get('WEATHER_COORD_PRECISION', 2))
+    WEATHER_API_DAILY_QUOTA = int(os.environ.get('WEATHER_API_DAILY_QUOTA', 1000))
+    WEATHER_API_BASE_URL = os.environ.get('WEATHER_API_BASE_URL')  # ex: servidor falso nos benchmarks
+    # Histórico: dias de leituras horárias brutas antes da compactação diária
+    WEATHER_RAW_RETENTION_DAYS = int(os.environ.get('WEATHER_RAW_RETENTION_DAYS', 30))
+    # Retenção: estatísticas agregadas e remoção em lotes por faixa de chave primária
+    WEATHER_STATS_RETENTION_DAYS = int(os.environ.get('WEATHER_STATS_RETENTION_DAYS', 730))
+    WEATHER_RETENTION_BATCH_SIZE = int(os.environ.get('WEATHER_RETENTION_BATCH_SIZE', 5000))
+    WEATHER_RETENTION_BATCH_SLEEP = float(os.environ.get('WEATHER_RETENTION_BATCH_SLEEP', 0.05))
+    # Agendador de coleta: iniciar nos processos web (apenas o líder executa os jobs)
+    WEATHER_SCHEDULER_ENABLED = os.environ.get('WEATHER_SCHEDULER_ENABLED', 'false').lower() == 'true'
+    WEATHER_SCHEDULER_LOCK_FILE = os.environ.get('WEATHER_SCHEDULER_LOCK_FILE')
+    # Leitura em lote: máximo de localizações por pedido
+    WEATHER_BULK_MAX_LOCATIONS = int(os.environ.get('WEATHER_BULK_MAX_LOCATIONS', 100))
+    # Snapshot do dashboard por usuário (invalidado por eventos; TTL como limite)
+    DASHBOARD_SNAPSHOT_TTL = int(os.environ.get('DASHBOARD_SNAPSHOT_TTL', 300))
+    # Dashboard progressivo: esqueleto enviado de imediato, secções em paralelo
+    DASHBOARD_PROGRESSIVE_RENDERING = os.environ.get('DASHBOARD_PROGRESSIVE_RENDERING', 'false').lower() == 'true'
     
     # Configurações de AI
     OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
@@ -45,6 +65,27 @@ class Config:
     # Cache simplificado - sem Redis
     CACHE_ENABLED = False
     
+    # Cache em camadas: L1 por processo + Redis (L2) quando REDIS_URL existir
+    CACHE_KEY_PREFIX = os.environ.get('CACHE_KEY_PREFIX', 'agagri:')
+    CACHE_L1_MAX_ENTRIES = int(os.environ.get('CACHE_L1_MAX_ENTRIES', 2000))
+    CACHE_L1_TTL = int(os.environ.get('CACHE_L1_TTL', 30))
+    CACHE_L1_MAX_BYTES = int(os.environ.get('CACHE_L1_MAX_BYTES', 64 * 1024 * 1024))
+    # Segundos que cada worker reutiliza a geração lida de um namespace
+    CACHE_GENERATION_TTL = float(os.environ.get('CACHE_GENERATION_TTL', 1.0))
+    # Serialização das entradas: 'auto' (msgpack se instalado), 'msgpack' ou 'json'
+    CACHE_SERIALIZER = os.environ.get('CACHE_SERIALIZER', 'auto')
+    CACHE_COMPRESS_THRESHOLD = int(os.environ.get('CACHE_COMPRESS_THRESHOLD', 1024))
+    # Stampede: espera máxima pelo lock de uma chave e peso da renovação antecipada (0 desliga)
+    CACHE_LOCK_TIMEOUT = float(os.environ.get('CACHE_LOCK_TIMEOUT', 10.0))
+    CACHE_EARLY_REFRESH_BETA = float(os.environ.get('CACHE_EARLY_REFRESH_BETA', 1.0))
+    # Fração das leituras/escritas amostradas para as chaves mais lidas e maiores (/metrics)
+    CACHE_STATS_SAMPLE_RATE = float(os.environ.get('CACHE_STATS_SAMPLE_RATE', 1.0))
+    # Token opcional da rota /metrics (Prometheus: bearer_token)
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    # Contadores do cache somados entre workers (um arquivo por processo; padrão: instance/cache_metrics)
+    CACHE_METRICS_DIR = os.environ.get('CACHE_METRICS_DIR')
+    CACHE_METRICS_PUBLISH_INTERVAL = float(os.environ.get('CACHE_METRICS_PUBLISH_INTERVAL', 10.0))
+    
     # Rate limiting simplificado
     RATELIMIT_ENABLED = True
     RATELIMIT_STORAGE_URL = "memory://"
@@ -67,6 +108,9 @@ class Config:
     
     # Configurações de Cache Warming
     CACHE_WARMING_ENABLED = os.environ.get('CACHE_WARMING_ENABLED', 'true').lower() == 'true'
+    # Usuários mais ativos a aquecer e prazo de cada aquecimento (segundos)
+    CACHE_WARMING_TOP_N = int(os.environ.get('CACHE_WARMING_TOP_N', 50))
+    CACHE_WARMING_TIMEOUT = float(os.environ.get('CACHE_WARMING_TIMEOUT', 20))
     
     # Configurações de Asset Optimization
     ASSET_COMPRESSION_ENABLED = os.environ.get('ASSET_COMPRESSION_ENABLED', 'true').lower() == 'true'
@@ -140,6 +184,10 @@ class ProductionConfig(Config):
     CACHE_TIMEOUT_WEATHER = 30 * 60     # 30 minutos
     CACHE_TIMEOUT_AI = 60 * 60          # 1 hora  
     CACHE_TIMEOUT_DASHBOARD = 15 * 60   # 15 minutos
+    
+    # Desligado por omissão: deploy() e scripts de manutenção não iniciam o
+    # scheduler; o processo web ativa-o (run.py em produção, CMD do Dockerfile.prod, salvo valor explícito)
+    WEATHER_SCHEDULER_ENABLED = os.environ.get('WEATHER_SCHEDULER_ENABLED', 'false').lower() == 'true'
 
 
 class TestingConfig(Config):
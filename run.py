@@ -96,6 +96,9 @@ if __name__ == '__main__':
     config_name = os.getenv('FLASK_ENV', 'development')
     if config_name == 'production':
         config_name = 'production'
+        # Processo web: inicia o agendador climático (salvo se desligado
+        # explicitamente, ex: com run_weather_worker.py num serviço próprio)
+        os.environ.setdefault('WEATHER_SCHEDULER_ENABLED', 'true')
     
     app = create_app(config_name)
     
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Worker dedicado do agendador de coleta climática
+
+Executa os jobs agendados (coleta horária, limpeza e estatísticas) fora dos
+workers web. Com este processo em execução, definir WEATHER_SCHEDULER_ENABLED=false
+no serviço web. Mesmo que ambos iniciem o scheduler, o lock de liderança
+garante que apenas um processo executa os jobs.
+"""
+import signal
+import time
+from app import create_app
+from app.services.weather_scheduler import get_weather_scheduler, init_weather_scheduler
+
+app = create_app()
+running = True
+
+
+def handle_shutdown(signum, frame):
+    global running
+    running = False
+
+
+signal.signal(signal.SIGTERM, handle_shutdown)
+signal.signal(signal.SIGINT, handle_shutdown)
+
+scheduler = get_weather_scheduler()
+if scheduler is None:
+    init_weather_scheduler(app)
+    scheduler = get_weather_scheduler()
+
+if scheduler is None or not scheduler.is_running:
+    print("❌ Não foi possível iniciar o agendador climático")
+    raise SystemExit(1)
+
+print("🌤️ Worker do agendador climático em execução")
+with app.app_context():
+    status = scheduler.get_status()
+    for job in status['jobs']:
+        print(f"   - {job['name']}: próxima execução {job['next_run']}")
+
+while running:
+    time.sleep(1)
+
+scheduler.stop()
+print("👋 Worker do agendador climático encerrado")
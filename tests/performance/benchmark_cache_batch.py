@@ -0,0 +1,147 @@
+"""
+Benchmark das leituras e escritas em lote do cache
+
+Compara N chamadas get/set/delete sequenciais com get_many/set_many/
+delete_many (um MGET, um pipeline e um DEL no Redis). As leituras usam
+local=False para medir sempre o L2.
+
+Sem Redis mede apenas o caminho em memória (um lock por lote). Com
+--fakeredis (pacote fakeredis) ou REDIS_URL (ex: um redis-server local)
+mede também as idas ao Redis; --latency-ms simula a latência de rede por
+comando no fakeredis.
+
+Uso:
+    python tests/performance/benchmark_cache_batch.py --keys 50 --rounds 200 --fakeredis --latency-ms 0.3 --output batch.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime, timezone
+
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from app.utils.tiered_cache import TieredCache
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def fake_redis_client(latency_seconds):
+    """Cliente fakeredis com atraso por comando (um pipeline conta como um comando)"""
+    import fakeredis
+    
+    class SlowFakeRedis(fakeredis.FakeStrictRedis):
+        def execute_command(self, *args, **options):
+            time.sleep(latency_seconds)
+            return super().execute_command(*args, **options)
+        
+        def pipeline(self, transaction=True, shard_hint=None):
+            pipe = super().pipeline(transaction, shard_hint)
+            execute = pipe.execute
+            
+            def delayed_execute(*args, **kwargs):
+                time.sleep(latency_seconds)
+                return execute(*args, **kwargs)
+            
+            pipe.execute = delayed_execute
+            return pipe
+    
+    return SlowFakeRedis()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de operações em lote do cache')
+    parser.add_argument('--keys', type=int, default=50, help='Chaves por lote')
+    parser.add_argument('--rounds', type=int, default=200)
+    parser.add_argument('--fakeredis', action='store_true', help='Usar fakeredis como L2')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Latência simulada por comando (fakeredis)')
+    parser.add_argument('--output', help='Ficheiro JSON de saída (padrão: stdout)')
+    args = parser.parse_args()
+    
+    cache = TieredCache(prefix=f"bench-batch-{os.getpid()}:")
+    if args.fakeredis:
+        cache._l2 = fake_redis_client(args.latency_ms / 1000)
+        backend = 'fakeredis'
+    elif os.environ.get('REDIS_URL'):
+        cache._redis_url = os.environ['REDIS_URL']
+        backend = 'redis' if cache.l2 is not None else 'memory'
+    else:
+        backend = 'memory'
+    
+    namespace = 'bench'
+    keys = [f"item:{index}" for index in range(args.keys)]
+    values = {key: {'id': index, 'name': f"Cultura {index}", 'area': index * 1.5, 'tags': ['a', 'b']}
+              for index, key in enumerate(keys)}
+    
+    def sequential_set():
+        for key, value in values.items():
+            cache.set(key, value, 300, namespace, local=False)
+    
+    def batch_set():
+        cache.set_many(values, 300, namespace, local=False)
+    
+    def sequential_get():
+        for key in keys:
+            cache.get(key, namespace, local=False)
+    
+    def batch_get():
+        cache.get_many(keys, namespace, local=False)
+    
+    def sequential_delete():
+        for key in keys:
+            cache.delete(key, namespace)
+    
+    def batch_delete():
+        cache.delete_many(keys, namespace)
+    
+    scenarios = []
+    for name, sequential, batch, setup in (
+        ('set', sequential_set, batch_set, None),
+        ('get', sequential_get, batch_get, batch_set),
+        ('delete', sequential_delete, batch_delete, batch_set),
+    ):
+        results = {}
+        for mode, operation in (('sequential', sequential), ('batch', batch)):
+            def run():
+                if setup:
+                    setup()
+                started = time.perf_counter()
+                operation()
+                return time.perf_counter() - started
+            
+            timings = [run() for _ in range(args.rounds)]
+            results[mode] = {
+                'p50_ms': round(percentile(timings, 0.5) * 1000, 3),
+                'p99_ms': round(percentile(timings, 0.99) * 1000, 3),
+                'total_ms': round(sum(timings) * 1000, 1)
+            }
+        
+        scenarios.append({
+            'operation': name,
+            'keys': args.keys,
+            'sequential': results['sequential'],
+            'batch': results['batch'],
+            'speedup_p50': round(results['sequential']['p50_ms'] / results['batch']['p50_ms'], 2)
+            if results['batch']['p50_ms'] else None
+        })
+    
+    output = json.dumps({
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'backend': backend,
+        'latency_ms': args.latency_ms if args.fakeredis else None,
+        'rounds': args.rounds,
+        'scenarios': scenarios
+    }, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""
+Benchmark do cache em memória (L1)
+
+Compara o fallback em memória antigo do cache_manager (limpeza por ordenação
+de todo o dicionário ao atingir o limite e varrimento de todas as entradas
+no teardown de cada request) com o LocalCache do cache em camadas (LRU em
+O(1) com heap de expirações), com o cache cheio a 10k e 100k entradas.
+
+Cada "request" simulado faz algumas leituras, uma escrita e o trabalho de
+fim de request de cada implementação.
+
+Uso:
+    python tests/performance/benchmark_cache_memory.py --sizes 10000 100000 --output cache_memory.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from datetime import datetime, timezone, timedelta
+
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from app.utils.tiered_cache import LocalCache
+
+
+class LegacyMemoryCache:
+    """Reprodução do fallback em memória anterior do cache_manager"""
+    
+    def __init__(self, max_items):
+        self.max_items = max_items
+        self.memory_cache = {}
+    
+    def get(self, key):
+        entry = self.memory_cache.get(key)
+        if entry is None:
+            return None
+        if entry['expires_at'] > datetime.now(timezone.utc):
+            return entry['data']
+        del self.memory_cache[key]
+        return None
+    
+    def set(self, key, value, timeout):
+        self._cleanup_if_needed()
+        self.memory_cache[key] = {
+            'data': value,
+            'expires_at': datetime.now(timezone.utc) + timedelta(seconds=timeout)
+        }
+    
+    def _cleanup_if_needed(self):
+        if len(self.memory_cache) >= self.max_items:
+            items_to_remove = self.max_items // 4
+            now = datetime.now(timezone.utc)
+            expired_keys = [k for k, v in self.memory_cache.items() if v['expires_at'] <= now]
+            for key in expired_keys[:items_to_remove]:
+                del self.memory_cache[key]
+            if len(expired_keys) < items_to_remove:
+                remaining = items_to_remove - len(expired_keys)
+                sorted_items = sorted(self.memory_cache.items(), key=lambda x: x[1]['expires_at'])
+                for key, _ in sorted_items[:remaining]:
+                    del self.memory_cache[key]
+    
+    def teardown(self):
+        now = datetime.now(timezone.utc)
+        expired_keys = [k for k, v in self.memory_cache.items() if v['expires_at'] <= now]
+        for key in expired_keys:
+            del self.memory_cache[key]
+
+
+class LocalCacheAdapter:
+    """LocalCache com a mesma interface do benchmark (sem trabalho no teardown)"""
+    
+    def __init__(self, max_items):
+        self.cache = LocalCache(max_entries=max_items, max_bytes=0)
+    
+    def get(self, key):
+        return self.cache.get(key)[1]
+    
+    def set(self, key, value, timeout):
+        self.cache.set(key, value, timeout)
+    
+    def teardown(self):
+        pass
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run_scenario(name, factory, size, requests, reads_per_request):
+    """Cache cheio com `size` entradas; mede o custo de cada request simulado"""
+    cache = factory(size)
+    value = {'temperature': 21.5, 'humidity': 60, 'forecast': list(range(10))}
+    
+    started = time.perf_counter()
+    for i in range(size):
+        cache.set(f"agagri:bench:{i}", value, 3600 + random.randint(0, 600))
+    fill_seconds = time.perf_counter() - started
+    
+    rng = random.Random(42)
+    latencies = []
+    for request in range(requests):
+        started = time.perf_counter()
+        for _ in range(reads_per_request):
+            cache.get(f"agagri:bench:{rng.randrange(size)}")
+        cache.set(f"agagri:bench:new:{request}", value, 3600)
+        cache.teardown()
+        latencies.append(time.perf_counter() - started)
+    
+    return {
+        'implementation': name,
+        'entries': size,
+        'fill_seconds': round(fill_seconds, 3),
+        'requests': requests,
+        'request_p50_us': round(percentile(latencies, 0.5) * 1e6, 1),
+        'request_p99_us': round(percentile(latencies, 0.99) * 1e6, 1),
+        'request_max_us': round(max(latencies) * 1e6, 1),
+        'request_mean_us': round(sum(latencies) / len(latencies) * 1e6, 1)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do cache em memória')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--reads', type=int, default=10, help='Leituras por request')
+    parser.add_argument('--output', help='Ficheiro JSON de saída (padrão: stdout)')
+    args = parser.parse_args()
+    
+    scenarios = []
+    for size in args.sizes:
+        scenarios.append(run_scenario('legacy_memory_cache', LegacyMemoryCache, size, args.requests, args.reads))
+        scenarios.append(run_scenario('local_cache', LocalCacheAdapter, size, args.requests, args.reads))
+    
+    results = {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'requests': args.requests,
+        'reads_per_request': args.reads,
+        'scenarios': scenarios
+    }
+    
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""
+Benchmark de stampede numa chave quente do cache
+
+N threads pedem ao mesmo tempo uma chave expirada cujo cálculo é lento.
+Compara o padrão get/set simples (cada falha recalcula) com get_or_set
+(single flight) e com get_or_set com stale_ttl (valor antigo servido
+enquanto uma única renovação corre em segundo plano).
+
+Sem REDIS_URL o teste cobre apenas a coordenação entre threads do mesmo
+processo; com REDIS_URL os locks também são partilhados no Redis.
+
+Uso:
+    python tests/performance/benchmark_cache_stampede.py --threads 50 --compute-ms 100 --output stampede.json
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from datetime import datetime, timezone
+
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from app.utils.tiered_cache import TieredCache
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run_burst(read, threads):
+    """Dispara `threads` leituras simultâneas e devolve a latência de cada uma"""
+    latencies = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(threads)
+    
+    def worker():
+        barrier.wait()
+        started = time.perf_counter()
+        read()
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+    
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de stampede do cache')
+    parser.add_argument('--threads', type=int, default=50)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--compute-ms', type=int, default=100, help='Duração do cálculo do valor')
+    parser.add_argument('--output', help='Ficheiro JSON de saída (padrão: stdout)')
+    args = parser.parse_args()
+    
+    compute_seconds = args.compute_ms / 1000
+    scenarios = []
+    
+    for name in ('naive_get_set', 'get_or_set', 'get_or_set_stale'):
+        cache = TieredCache(prefix=f"bench-stampede-{os.getpid()}:", early_refresh_beta=0)
+        if os.environ.get('REDIS_URL'):
+            cache._redis_url = os.environ['REDIS_URL']
+        computes = {'count': 0}
+        counter_lock = threading.Lock()
+        
+        def compute():
+            with counter_lock:
+                computes['count'] += 1
+            time.sleep(compute_seconds)
+            return {'temperature': 21.5, 'forecast': list(range(24))}
+        
+        def naive():
+            value = cache.get('hot', 'bench')
+            if value is None:
+                value = compute()
+                cache.set('hot', value, 1, 'bench')
+            return value
+        
+        def single_flight():
+            return cache.get_or_set('hot', compute, 1, 'bench')
+        
+        def stale():
+            return cache.get_or_set('hot', compute, 1, 'bench', stale_ttl=60)
+        
+        read = {'naive_get_set': naive, 'get_or_set': single_flight, 'get_or_set_stale': stale}[name]
+        
+        # Valor inicial já expirado para o cenário com stale_ttl (chave quente que acabou de expirar)
+        if name == 'get_or_set_stale':
+            cache.get_or_set('hot', compute, 1, 'bench', stale_ttl=60)
+            computes['count'] = 0
+        
+        latencies = []
+        for _ in range(args.rounds):
+            # Expirar a chave entre rondas
+            if name == 'get_or_set_stale':
+                time.sleep(1.05 + compute_seconds)
+            else:
+                cache.delete('hot', 'bench')
+            latencies.extend(run_burst(read, args.threads))
+        
+        # Aguardar renovações em segundo plano antes de contar
+        time.sleep(compute_seconds * 2)
+        
+        scenarios.append({
+            'scenario': name,
+            'threads': args.threads,
+            'rounds': args.rounds,
+            'computes': computes['count'],
+            'computes_per_round': round(computes['count'] / args.rounds, 2),
+            'latency_p50_ms': round(percentile(latencies, 0.5) * 1000, 2),
+            'latency_p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+            'latency_max_ms': round(max(latencies) * 1000, 2),
+            'stampede': cache.get_stats()['stampede']
+        })
+    
+    results = {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'compute_ms': args.compute_ms,
+        'redis': bool(os.environ.get('REDIS_URL')),
+        'scenarios': scenarios
+    }
+    
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
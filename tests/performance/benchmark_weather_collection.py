@@ -0,0 +1,173 @@
+"""
+Benchmark da coleta climática contra um servidor falso da OpenWeatherMap
+
+Para cada escala (número de localizações) cria uma base nova, semeia um
+usuário por localização e mede as fases sync_all_users,
+collect_all_locations, update_statistics e get_current_weather:
+tempo total, consultas SQL, linhas escritas e pico de memória.
+O resultado é JSON para comparar regressões entre commits.
+
+Uso:
+    python tests/performance/benchmark_weather_collection.py --sizes 10 100 1000 \\
+        --latency-ms 20 --error-rate 0.01 --output collection.json
+"""
+import os
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+import subprocess
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from weather_seed import create_benchmark_app, seed_users
+from fake_openweather import FakeOpenWeatherServer
+from sqlalchemy import event
+from app import db
+from app.models.weather import WeatherLocation
+from app.services.location_manager import LocationManager
+from app.services.weather_collector import WeatherCollectorService
+from app.services.weather_data_service import WeatherDataService
+from app.services.weather_read_cache import weather_read_cache
+from app.utils.api_integration import api_manager, weather_fetch_layer
+
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE')
+
+
+class QueryCounter:
+    """Conta consultas e linhas escritas no engine"""
+    
+    def __init__(self, engine):
+        self.queries = 0
+        self.rows_written = 0
+        event.listen(engine, 'after_cursor_execute', self._after_execute)
+    
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.queries += 1
+        if statement.lstrip().upper().startswith(WRITE_STATEMENTS) and cursor.rowcount > 0:
+            self.rows_written += cursor.rowcount
+    
+    def snapshot(self):
+        return self.queries, self.rows_written
+
+
+@contextmanager
+def measure_phase(results, name, counter):
+    """Mede tempo, consultas, linhas escritas e pico de memória de uma fase"""
+    queries_before, rows_before = counter.snapshot()
+    tracemalloc.start()
+    started = time.perf_counter()
+    phase = {'phase': name}
+    try:
+        yield phase
+    finally:
+        phase['wall_seconds'] = round(time.perf_counter() - started, 4)
+        phase['peak_memory_kb'] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+        tracemalloc.stop()
+        queries_after, rows_after = counter.snapshot()
+        phase['queries'] = queries_after - queries_before
+        phase['rows_written'] = rows_after - rows_before
+        results.append(phase)
+
+
+def reset_fetch_layer():
+    """Limpar cache e contadores da camada de busca entre escalas"""
+    api_manager.register_api(weather_fetch_layer.api_name, {
+        'rate_limit_calls': 10 ** 9,
+        'rate_limit_period': 60,
+        'failure_threshold': 10 ** 9
+    })
+    weather_fetch_layer.invalidate()
+    weather_read_cache.invalidate()
+
+
+def run_scale(size, server, read_sample):
+    """Executa todas as fases para uma escala"""
+    db_path = os.path.join(tempfile.mkdtemp(prefix='collection_bench_'), 'weather.db')
+    app = create_benchmark_app(
+        db_path,
+        WEATHER_API_KEY='benchmark',
+        WEATHER_API_BASE_URL=server.url,
+        WEATHER_API_DAILY_QUOTA=10 ** 9
+    )
+    phases = []
+    
+    with app.app_context():
+        db.create_all()
+        seed = seed_users(size)
+        counter = QueryCounter(db.engine)
+        reset_fetch_layer()
+        requests_before = server.requests
+        
+        with measure_phase(phases, 'sync_all_users', counter) as phase:
+            LocationManager.sync_all_users()
+            phase['locations'] = WeatherLocation.query.filter_by(is_active=True).count()
+        
+        with measure_phase(phases, 'collect_all_locations', counter) as phase:
+            result = WeatherCollectorService.collect_all_locations()
+            phase['locations_processed'] = result['locations_processed']
+            phase['locations_failed'] = result['locations_failed']
+            phase['api_requests'] = server.requests - requests_before
+        
+        with measure_phase(phases, 'update_statistics', counter):
+            WeatherCollectorService.update_statistics()
+        
+        names = [location.name for location in WeatherLocation.query.limit(read_sample).all()]
+        weather_read_cache.invalidate()
+        with measure_phase(phases, 'get_current_weather', counter) as phase:
+            hits = sum(
+                1 for name in names
+                if WeatherDataService.get_current_weather(location_name=name)['success']
+            )
+            phase['calls'] = len(names)
+            phase['found'] = hits
+        
+        read_phase = phases[-1]
+        if read_phase['calls']:
+            read_phase['per_call_ms'] = round(read_phase['wall_seconds'] * 1000 / read_phase['calls'], 3)
+        
+        db.session.remove()
+    
+    return {'locations': size, 'seed': seed, 'phases': phases}
+
+
+def current_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], text=True).strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark da coleta climática')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--latency-ms', type=int, default=0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--read-sample', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Ficheiro JSON de saída (padrão: stdout)')
+    args = parser.parse_args()
+    
+    server = FakeOpenWeatherServer(latency_ms=args.latency_ms, error_rate=args.error_rate, seed=args.seed).start()
+    try:
+        results = {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'commit': current_commit(),
+            'database': 'sqlite',
+            'fake_api': {'latency_ms': args.latency_ms, 'error_rate': args.error_rate, 'seed': args.seed},
+            'scales': [run_scale(size, server, args.read_sample) for size in args.sizes],
+            'fake_api_stats': server.get_stats()
+        }
+    finally:
+        server.stop()
+    
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
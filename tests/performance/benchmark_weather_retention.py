@@ -0,0 +1,134 @@
+"""
+Benchmark da retenção de dados climáticos
+
+Compara a remoção antiga (um único DELETE ... WHERE collected_at < X) com a
+remoção em lotes do WeatherRetentionService numa tabela weather_data semeada
+(por omissão com um milhão de linhas em SQLite). Durante cada remoção uma
+thread simula a coleta, inserindo leituras e medindo a latência de escrita.
+
+Uso:
+    python tests/performance/benchmark_weather_retention.py --rows 1000000 --output retention.json
+"""
+import os
+import json
+import time
+import sqlite3
+import argparse
+import tempfile
+import threading
+from datetime import datetime, timezone
+
+from weather_seed import create_benchmark_app, seed_weather_data
+from app import db
+from app.models.weather import WeatherData
+from app.services.weather_retention import WeatherRetentionService
+
+
+class CollectorProbe(threading.Thread):
+    """Insere leituras continuamente e regista a latência de cada escrita"""
+    
+    def __init__(self, db_path, interval=0.01):
+        super().__init__(daemon=True)
+        self.db_path = db_path
+        self.interval = interval
+        self.latencies = []
+        self._stop_event = threading.Event()
+    
+    def run(self):
+        connection = sqlite3.connect(self.db_path, timeout=60)
+        while not self._stop_event.is_set():
+            started = time.perf_counter()
+            connection.execute(
+                "INSERT INTO weather_data (location_name, latitude, longitude, collected_at, temperature, "
+                "humidity, pressure, wind_speed, condition, is_current, api_source, data_quality) "
+                "VALUES ('Probe', 0, 0, ?, 20, 50, 1013, 1, 'Clear', 1, 'probe', 'good')",
+                (datetime.now(timezone.utc).isoformat(sep=' '),)
+            )
+            connection.commit()
+            self.latencies.append(time.perf_counter() - started)
+            time.sleep(self.interval)
+        connection.close()
+    
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        latencies = sorted(self.latencies) or [0]
+        return {
+            'writes': len(self.latencies),
+            'p50_ms': round(latencies[len(latencies) // 2] * 1000, 2),
+            'p99_ms': round(latencies[int(len(latencies) * 0.99)] * 1000, 2),
+            'max_ms': round(latencies[-1] * 1000, 2)
+        }
+
+
+def run_scenario(name, rows, db_path, delete_func):
+    """Semeia a tabela, executa a remoção com a sonda de coleta ativa e mede"""
+    db.drop_all()
+    db.create_all()
+    seed = seed_weather_data(rows)
+    
+    probe = CollectorProbe(db_path)
+    probe.start()
+    started = time.perf_counter()
+    rows_deleted = delete_func()
+    elapsed = time.perf_counter() - started
+    collector = probe.stop()
+    
+    return {
+        'scenario': name,
+        'seed': seed,
+        'rows_deleted': rows_deleted,
+        'elapsed_seconds': round(elapsed, 3),
+        'rows_per_second': round(rows_deleted / elapsed, 1) if elapsed > 0 else 0,
+        'collector_writes': collector
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark da retenção de weather_data')
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--batch-sleep', type=float, default=0.0)
+    parser.add_argument('--output', help='Ficheiro JSON de saída (padrão: stdout)')
+    args = parser.parse_args()
+    
+    db_path = os.path.join(tempfile.mkdtemp(prefix='retention_bench_'), 'weather.db')
+    app = create_benchmark_app(db_path, WEATHER_RAW_RETENTION_DAYS=30)
+    
+    with app.app_context():
+        policy = WeatherRetentionService.get_policies()['raw']
+        
+        def single_delete():
+            deleted = WeatherData.query.filter(*policy['criteria']).delete(synchronize_session=False)
+            db.session.commit()
+            return deleted
+        
+        def chunked_delete():
+            return WeatherRetentionService.delete_in_chunks(
+                WeatherData,
+                policy['criteria'],
+                args.batch_size,
+                args.batch_sleep
+            )['rows_deleted']
+        
+        results = {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'database': 'sqlite',
+            'rows': args.rows,
+            'batch_size': args.batch_size,
+            'batch_sleep': args.batch_sleep,
+            'scenarios': [
+                run_scenario('single_delete', args.rows, db_path, single_delete),
+                run_scenario('chunked_delete', args.rows, db_path, chunked_delete)
+            ]
+        }
+    
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+"""
+Servidor falso da OpenWeatherMap para benchmarks
+
+Responde a /weather e /forecast com dados determinísticos derivados das
+coordenadas, com latência e taxa de erros configuráveis. Pode ser usado
+embutido (FakeOpenWeatherServer) ou como processo isolado:
+
+    python tests/performance/fake_openweather.py --port 8099 --latency-ms 50 --error-rate 0.02
+
+e apontar a aplicação com WEATHER_API_BASE_URL=http://127.0.0.1:8099
+"""
+import json
+import time
+import random
+import argparse
+import threading
+from datetime import datetime, timezone, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+CONDITIONS = (
+    (800, 'Clear', 'céu limpo', '01d'),
+    (801, 'Clouds', 'algumas nuvens', '02d'),
+    (803, 'Clouds', 'nublado', '04d'),
+    (500, 'Rain', 'chuva fraca', '10d'),
+    (501, 'Rain', 'chuva moderada', '10d'),
+)
+
+
+def _weather_for(lat, lon, offset_hours=0):
+    """Condições determinísticas para uma coordenada e hora"""
+    rng = random.Random(f"{round(lat, 2)}:{round(lon, 2)}:{offset_hours}")
+    temp = round(8 + 20 * rng.random(), 1)
+    condition_id, main, description, icon = CONDITIONS[rng.randrange(len(CONDITIONS))]
+    return {
+        'main': {
+            'temp': temp,
+            'feels_like': round(temp - 1.5, 1),
+            'temp_min': round(temp - 2 * rng.random(), 1),
+            'temp_max': round(temp + 2 * rng.random(), 1),
+            'pressure': 1000 + rng.randrange(30),
+            'humidity': 40 + rng.randrange(55)
+        },
+        'weather': [{'id': condition_id, 'main': main, 'description': description, 'icon': icon}],
+        'wind': {'speed': round(8 * rng.random(), 1), 'deg': rng.randrange(360)}
+    }
+
+
+def build_current(lat, lon):
+    now = datetime.now(timezone.utc)
+    payload = _weather_for(lat, lon)
+    payload.update({
+        'coord': {'lat': lat, 'lon': lon},
+        'visibility': 10000,
+        'dt': int(now.timestamp()),
+        'sys': {'country': 'PT'},
+        'name': f'Fake {round(lat, 2)},{round(lon, 2)}'
+    })
+    return payload
+
+
+def build_forecast(lat, lon):
+    start = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    items = []
+    for slot in range(40):
+        moment = start + timedelta(hours=3 * slot)
+        item = _weather_for(lat, lon, slot * 3)
+        item.update({'dt': int(moment.timestamp()), 'dt_txt': moment.strftime('%Y-%m-%d %H:%M:%S')})
+        items.append(item)
+    return {'cod': '200', 'cnt': len(items), 'list': items, 'city': {'coord': {'lat': lat, 'lon': lon}}}
+
+
+class FakeOpenWeatherServer:
+    """Servidor HTTP falso numa thread, com contadores de pedidos"""
+    
+    def __init__(self, host='127.0.0.1', port=0, latency_ms=0, error_rate=0.0, seed=42):
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.requests = 0
+        self.errors = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._thread = None
+    
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def _should_fail(self):
+        with self._lock:
+            self.requests += 1
+            failed = self._rng.random() < self.error_rate
+            if failed:
+                self.errors += 1
+            return failed
+    
+    def _make_handler(self):
+        fake = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                query = parse_qs(parsed.query)
+                
+                if fake.latency_ms:
+                    time.sleep(fake.latency_ms / 1000)
+                
+                if fake._should_fail():
+                    return self._send(500, {'cod': 500, 'message': 'erro simulado'})
+                
+                try:
+                    lat = float(query['lat'][0])
+                    lon = float(query['lon'][0])
+                except (KeyError, ValueError):
+                    return self._send(400, {'cod': 400, 'message': 'coordenadas em falta'})
+                
+                if parsed.path.endswith('/weather'):
+                    return self._send(200, build_current(lat, lon))
+                if parsed.path.endswith('/forecast'):
+                    return self._send(200, build_forecast(lat, lon))
+                return self._send(404, {'cod': 404, 'message': 'endpoint desconhecido'})
+            
+            def _send(self, status, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        return Handler
+    
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+    
+    def get_stats(self):
+        return {'requests': self.requests, 'errors': self.errors}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Servidor falso da OpenWeatherMap')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--latency-ms', type=int, default=0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    
+    server = FakeOpenWeatherServer(args.host, args.port, args.latency_ms, args.error_rate, args.seed)
+    print(f"Servidor falso da OpenWeatherMap em {server.url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
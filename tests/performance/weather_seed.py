@@ -0,0 +1,134 @@
+"""
+Semeador de dados para os benchmarks climáticos
+
+Cria uma app mínima ligada a uma base SQLite temporária e semeia usuários,
+localizações e leituras de forma determinística.
+"""
+import os
+import sys
+import time
+from datetime import datetime, timezone, timedelta
+
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, project_root)
+
+from flask import Flask
+from app import db
+from app.models.weather import WeatherData, WeatherLocation
+
+SEED_CHUNK = 50000
+
+# Grelha com espaçamento acima do limiar de proximidade do LocationManager (10 km)
+GRID_ORIGIN = (37.0, -9.5)
+GRID_STEP_LAT = 0.1
+GRID_STEP_LON = 0.15
+GRID_COLUMNS = 100
+
+
+def create_benchmark_app(db_path, **config):
+    """App mínima ligada a uma base SQLite temporária"""
+    # Registrar todos os modelos (relacionamentos do usuário)
+    from app.models import user, farm, culture, activity, conversation, alerts  # noqa: F401
+    
+    app = Flask(__name__)
+    app.config.update({
+        'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+        'WEATHER_RAW_RETENTION_DAYS': 30
+    })
+    app.config.update(config)
+    db.init_app(app)
+    return app
+
+
+def grid_point(index):
+    """Coordenada determinística da posição index na grelha"""
+    row, column = divmod(index, GRID_COLUMNS)
+    return (
+        round(GRID_ORIGIN[0] + row * GRID_STEP_LAT, 4),
+        round(GRID_ORIGIN[1] + column * GRID_STEP_LON, 4)
+    )
+
+
+def seed_users(count):
+    """Semeia usuários ativos, um por ponto da grelha"""
+    from app.models.user import User
+    
+    started = time.perf_counter()
+    rows = []
+    for index in range(count):
+        lat, lon = grid_point(index)
+        rows.append({
+            'email': f'bench{index}@example.com',
+            'password_hash': 'benchmark',
+            'nome_completo': f'Usuário {index}',
+            'cidade': f'Cidade {index}',
+            'latitude': lat,
+            'longitude': lon,
+            'is_active': True
+        })
+    
+    for start in range(0, len(rows), SEED_CHUNK):
+        db.session.execute(User.__table__.insert(), rows[start:start + SEED_CHUNK])
+    db.session.commit()
+    
+    return {'users': count, 'seconds': round(time.perf_counter() - started, 3)}
+
+
+def seed_locations(count):
+    """Semeia localizações ativas nos mesmos pontos dos usuários"""
+    started = time.perf_counter()
+    rows = []
+    for index in range(count):
+        lat, lon = grid_point(index)
+        rows.append({
+            'name': f'Cidade {index}',
+            'latitude': lat,
+            'longitude': lon,
+            'country': 'PT',
+            'timezone': 'Europe/Lisbon',
+            'is_active': True,
+            'is_default': False
+        })
+    
+    db.session.execute(WeatherLocation.__table__.insert(), rows)
+    db.session.commit()
+    
+    return {'locations': count, 'seconds': round(time.perf_counter() - started, 3)}
+
+
+def seed_weather_data(rows, expired_ratio=0.9):
+    """Semeia leituras horárias; expired_ratio fica fora da retenção bruta"""
+    now = datetime.now(timezone.utc)
+    expired_rows = int(rows * expired_ratio)
+    table = WeatherData.__table__
+    
+    started = time.perf_counter()
+    for chunk_start in range(0, rows, SEED_CHUNK):
+        batch = []
+        for index in range(chunk_start, min(chunk_start + SEED_CHUNK, rows)):
+            # Intercalar linhas expiradas e recentes para que os ids não sejam contíguos
+            expired = (index * 7919) % rows < expired_rows
+            age = timedelta(days=31 + index % 300) if expired else timedelta(hours=index % 600)
+            batch.append({
+                'location_name': f'Local {index % 100}',
+                'latitude': 38.7 + (index % 100) / 100,
+                'longitude': -9.1 - (index % 100) / 100,
+                'collected_at': now - age,
+                'temperature': 15 + index % 20,
+                'humidity': 60,
+                'pressure': 1013,
+                'wind_speed': 3.5,
+                'condition': 'Clear',
+                'is_current': False,
+                'api_source': 'benchmark',
+                'data_quality': 'good'
+            })
+        db.session.execute(table.insert(), batch)
+        db.session.commit()
+    
+    return {
+        'rows': rows,
+        'expired_rows': expired_rows,
+        'seconds': round(time.perf_counter() - started, 3)
+    }
@@ -0,0 +1,116 @@
+"""
+Testes das operações em lote do cache em camadas
+get_many / set_many / delete_many em modo apenas memória e com fakeredis como L2
+"""
+import pytest
+
+from app.utils.tiered_cache import TieredCache
+
+
+@pytest.fixture(params=['memory', 'fakeredis'])
+def cache(request, monkeypatch):
+    """Cache isolado em cada modo (fakeredis é opcional)"""
+    monkeypatch.delenv('REDIS_URL', raising=False)
+    tiered = TieredCache(prefix='test-batch:')
+    
+    if request.param == 'fakeredis':
+        fakeredis = pytest.importorskip('fakeredis')
+        tiered._l2 = fakeredis.FakeStrictRedis()
+    
+    yield tiered
+    
+    if tiered._l2 is not None:
+        tiered._l2.flushall()
+
+
+@pytest.mark.unit
+class TestBatchOperations:
+    """Resultados das operações em lote"""
+    
+    def test_set_many_then_get_many_returns_only_found_keys(self, cache):
+        values = {'a': 1, 'b': {'nome': 'Tomate', 'tags': ['horta']}, 'c': [1, 2, 3]}
+        
+        assert cache.set_many(values, 60, 'culture') is True
+        result = cache.get_many(['a', 'b', 'c', 'missing', 'a'], 'culture')
+        
+        assert result == values
+    
+    def test_get_many_matches_single_get(self, cache):
+        cache.set_many({'x': 'um', 'y': 'dois'}, 60, 'culture')
+        
+        assert cache.get_many(['x', 'y'], 'culture') == {
+            'x': cache.get('x', 'culture'),
+            'y': cache.get('y', 'culture')
+        }
+    
+    def test_get_many_empty_keys(self, cache):
+        assert cache.get_many([], 'culture') == {}
+    
+    def test_set_many_skips_unserializable_values(self, cache):
+        assert cache.set_many({'ok': 1, 'bad': object()}, 60, 'culture') is False
+        
+        assert cache.get_many(['ok', 'bad'], 'culture') == {'ok': 1}
+    
+    def test_delete_many_removes_only_given_keys(self, cache):
+        cache.set_many({'a': 1, 'b': 2, 'c': 3}, 60, 'culture')
+        
+        deleted = cache.delete_many(['a', 'b', 'missing'], 'culture')
+        
+        assert deleted == 2
+        assert cache.get_many(['a', 'b', 'c'], 'culture') == {'c': 3}
+    
+    def test_delete_many_empty_keys(self, cache):
+        assert cache.delete_many([], 'culture') == 0
+    
+    def test_namespace_invalidation_hides_batch_entries(self, cache):
+        cache.set_many({'a': 1, 'b': 2}, 60, 'culture:user_1')
+        
+        cache.clear_namespace('culture')
+        
+        assert cache.get_many(['a', 'b'], 'culture:user_1') == {}
+    
+    def test_get_many_counts_hits_and_misses(self, cache):
+        cache.set_many({'a': 1}, 60, 'stats')
+        
+        cache.get_many(['a', 'b'], 'stats')
+        stats = cache.get_stats()['namespaces']['stats']
+        
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['sets'] == 1
+
+
+@pytest.mark.unit
+class TestBatchOperationsRedis:
+    """Comportamento com Redis (fakeredis) como L2"""
+    
+    @pytest.fixture
+    def redis_cache(self, monkeypatch):
+        fakeredis = pytest.importorskip('fakeredis')
+        monkeypatch.delenv('REDIS_URL', raising=False)
+        tiered = TieredCache(prefix='test-batch:')
+        tiered._l2 = fakeredis.FakeStrictRedis()
+        yield tiered
+        tiered._l2.flushall()
+    
+    def test_non_local_set_many_writes_only_to_redis(self, redis_cache):
+        redis_cache.set_many({'a': 1, 'b': 2}, 60, 'culture', local=False)
+        
+        assert len(redis_cache.l1) == 0
+        assert redis_cache.get_many(['a', 'b'], 'culture', local=False) == {'a': 1, 'b': 2}
+    
+    def test_get_many_fills_l1_from_redis(self, redis_cache):
+        redis_cache.set_many({'a': 1, 'b': 2}, 60, 'culture', local=False)
+        
+        assert redis_cache.get_many(['a', 'b'], 'culture') == {'a': 1, 'b': 2}
+        assert len(redis_cache.l1) == 2
+        stats = redis_cache.get_stats()['namespaces']['culture']
+        assert stats['l2_hits'] == 2
+    
+    def test_delete_many_removes_from_both_levels(self, redis_cache):
+        redis_cache.set_many({'a': 1, 'b': 2}, 60, 'culture')
+        
+        assert redis_cache.delete_many(['a', 'b'], 'culture') == 2
+        
+        assert len(redis_cache.l1) == 0
+        assert redis_cache.get_many(['a', 'b'], 'culture', local=False) == {}